@@ -0,0 +1,71 @@
+"""add composite covering indexes for per-user dashboard queries
+
+Revision ID: 3f6c1a9d2b7e
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+First revision: the schema itself comes from app/table.sql. Databases
+created from a table.sql that already has these indexes only need
+`alembic stamp head`.
+
+Each index leads with user_id (every query here is per user) and carries
+every column the query reads, so InnoDB answers it from the index
+without going back to the clustered rows:
+
+- idx_portfolio_user_date_balance: the equity builders' and daily
+  summary's portfolio reads (all rows, or the latest two, by date).
+- idx_transactions_user_date_timing_type: load_cash_flow_index, the
+  per-(date, timing, type) amount sums every equity builder starts from.
+- idx_trades_user_close_entry: list_trades' close_date / entry_date
+  order and the realized-trade scans of the sketch rebuilds.
+- idx_trades_user_ledger: the ledger snapshot and trade stats rebuild,
+  which read symbol / dates / profit_loss of all a user's trades by id.
+- idx_rules_user_date: list_rules' date range.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3f6c1a9d2b7e"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    (
+        "idx_portfolio_user_date_balance",
+        "Portfolio",
+        ["user_id", "entry_date", "balance"],
+    ),
+    (
+        "idx_transactions_user_date_timing_type",
+        "Transactions",
+        ["user_id", "transaction_date", "timing", "transaction_type", "amount"],
+    ),
+    (
+        "idx_trades_user_close_entry",
+        "Trades",
+        ["user_id", "close_date", "entry_date"],
+    ),
+    (
+        "idx_trades_user_ledger",
+        "Trades",
+        ["user_id", "id", "symbol", "entry_date", "close_date", "profit_loss"],
+    ),
+    (
+        "idx_rules_user_date",
+        "Rules",
+        ["user_id", "entry_date"],
+    ),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -1,16 +1,39 @@
 # app/auth.py
 
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
 import bcrypt  # type: ignore
 import jwt     # type: ignore
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from .config import SECRET_KEY, ALGORITHM
-from .database import get_db_connection
+from .config import (
+    SECRET_KEY,
+    ALGORITHM,
+    AUTH_CACHE_TTL_SECONDS,
+    AUTH_CACHE_MAX_ENTRIES,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+)
+from .database import (
+    AsyncDB,
+    AsyncReadSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+    async_session_factory,
+    get_db_connection,
+    read_session_factory,
+)
 from .models import User
 from .schema import UserCreate, UserResponse
 
@@ -35,10 +58,10 @@ def get_password_hash(password: str) -> str:
     """
     try:
         # Most common: bcrypt expects bytes
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(BCRYPT_ROUNDS))
     except TypeError:
         # Fallback: bcrypt in this environment expects str
-        hashed = bcrypt.hashpw(password, bcrypt.gensalt())  # type: ignore[arg-type]
+        hashed = bcrypt.hashpw(password, bcrypt.gensalt(BCRYPT_ROUNDS))  # type: ignore[arg-type]
 
     # Normalize to str for DB storage
     if isinstance(hashed, bytes):
@@ -70,6 +93,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return candidate == hashed_password
 
 
+class PasswordHashPool:
+    """
+    Runs bcrypt off the event loop on its own small pool.
+
+    login and create_user are async, so a bcrypt call made inline would
+    stall every request on the worker. Here it runs on `workers` threads
+    (or processes, for bcrypt builds that hold the GIL), apart from the
+    threadpool the sync routes use. At most max_pending calls wait or run
+    at once; past that the request gets a 503 instead of queueing behind
+    a login storm.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_queued = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    def _get_executor(self):
+        # Created on first use, so importing the app never spawns processes.
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="bcrypt"
+                    )
+            return self._executor
+
+    async def run(self, fn, *args):
+        """await fn(*args) on the pool (fn: get_password_hash / verify_password)."""
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-ins in progress. Try again shortly.",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+            self._submitted += 1
+            self._max_queued = max(self._max_queued, self._in_flight - self.workers)
+
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._total_ms += elapsed_ms
+                self._max_ms = max(self._max_ms, elapsed_ms)
+
+    def snapshot(self) -> dict:
+        """Queue depth and latency (wait + hash) since start or the last reset()."""
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "max_queued": self._max_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "mean_ms": round(self._total_ms / self._completed, 3) if self._completed else 0.0,
+                "max_ms": round(self._max_ms, 3),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset_counters()
+
+
+password_pool = PasswordHashPool(
+    PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+)
+
+
 # -----------------------------
 # JWT helpers
 # -----------------------------
@@ -91,13 +208,100 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_current_user(
-    db: Session = Depends(get_db_connection),
-    token: str = Depends(oauth2_scheme),
-) -> User:
+# -----------------------------
+# Current user
+# -----------------------------
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated user as routes see it: the identity columns only."""
+    id: int
+    username: str
+    email: str
+    account_type: str
+
+
+class PrincipalCache:
+    """
+    Verified token -> UserPrincipal, per worker process.
+
+    Entries live ttl_seconds, or until the token's exp if that is sooner;
+    the oldest go first past max_entries. invalidate_user() drops every
+    token of a user here; other workers catch up within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_user: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[UserPrincipal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(token)
+                return None
+            return principal
+
+    def set(self, token: str, principal: UserPrincipal, exp: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (principal, time.monotonic() + ttl)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].id]
+
+
+principal_cache = PrincipalCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """
+    Forget cached tokens of a user. Call after db.commit() in any route
+    that changes or deletes a Users row.
+    """
+    principal_cache.invalidate_user(user_id)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPrincipal:
     """
     Retrieve the current user from the JWT token.
+
+    Tokens already verified are served from principal_cache without
+    decoding or touching the database; otherwise the user is looked up
+    on the primary.
     """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -111,16 +315,54 @@ def get_current_user(
         if user_id is None:
             raise credentials_exception
 
-        user = db.query(User).filter(User.id == user_id).first()
+        with SessionLocal() as db:
+            user = (
+                db.query(User.id, User.username, User.email, User.account_type)
+                .filter(User.id == user_id)
+                .first()
+            )
         if user is None:
             raise credentials_exception
 
-        return user
+        principal = UserPrincipal(*user)
+        principal_cache.set(token, principal, payload.get("exp"))
+        return principal
 
     except jwt.PyJWTError:
         raise credentials_exception
 
 
+def get_read_db(request: Request, current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    Dependency for GET routes that only read the current user's data:
+    a session on the read replica, or on the primary right after the
+    user's own writes (see database.read_session_factory).
+    """
+    factory = read_session_factory(current_user.id)
+    # The response cache neither stores nor ETags what the replica returns.
+    request.state.read_replica = factory is ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    except Exception as e:
+        db.rollback()
+        print(f"Database session error: {e}")
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_db(request: Request, current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    get_read_db for the async dashboard routes: an AsyncDB on the async
+    replica, or on the async primary right after the user's own writes.
+    Only usable when an async database is configured.
+    """
+    factory = async_session_factory(current_user.id)
+    request.state.read_replica = factory is AsyncReadSessionLocal
+    yield AsyncDB(factory)
+
+
 # -----------------------------
 # Routes
 # -----------------------------
@@ -153,7 +395,7 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.password_hash):
+    if not await password_pool.run(verify_password, form_data.password, user.password_hash):
         print("Password mismatch")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -188,7 +430,7 @@ async def create_user(
         )
 
     # Hash the password
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_pool.run(get_password_hash, user.password)
 
     # Create user record
     db_user = User(
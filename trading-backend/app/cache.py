@@ -0,0 +1,367 @@
+# app/cache.py
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from .config import (
+    CACHE_BACKEND,
+    CACHE_URL,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_BYTES,
+    CACHE_TTL_SECONDS,
+    READ_YOUR_WRITES_SECONDS,
+)
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+class InProcessCacheBackend:
+    """
+    Thread-safe LRU cache living in the worker process.
+
+    Bounded by both entry count and total bytes (keys + values); the least
+    recently used entries are evicted first. Data versions and flags live
+    in separate dicts so they are never evicted.
+
+    Versions restart at 0 with the process, so epoch changes with it too.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.epoch = uuid.uuid4().hex[:8]
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._versions: dict = {}
+        self._flags: dict = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(key) + len(old)
+
+            self._entries[key] = value
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= len(old_key) + len(old_value)
+
+    def get_version(self, key: str) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def incr_version(self, key: str) -> int:
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+    def set_flag(self, key: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._flags[key] = time.monotonic() + ttl_seconds
+
+    def has_flag(self, key: str) -> bool:
+        with self._lock:
+            expires = self._flags.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._flags[key]
+                return False
+            return True
+
+
+class RedisCacheBackend:
+    """
+    Shared cache for multi-worker deployments.
+
+    Works against any Redis-protocol server (including a local stand-in for
+    development). Entries expire after ttl_seconds; the memory cap and LRU
+    eviction are the server's maxmemory / allkeys-lru settings.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int):
+        try:
+            import redis  # type: ignore
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the 'redis' package."
+            ) from e
+
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.Redis.from_url(url)
+
+        # Versions live as long as the server's data; if it is flushed they
+        # restart at 0 and a new epoch is picked.
+        self._client.set("epoch", uuid.uuid4().hex[:8], nx=True)
+        self.epoch = self._client.get("epoch").decode()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._client.set(key, value, ex=self.ttl_seconds)
+
+    def get_version(self, key: str) -> int:
+        value = self._client.get(key)
+        return int(value) if value is not None else 0
+
+    def incr_version(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+    def set_flag(self, key: str, ttl_seconds: float) -> None:
+        self._client.set(key, 1, px=max(1, int(ttl_seconds * 1000)))
+
+    def has_flag(self, key: str) -> bool:
+        return bool(self._client.exists(key))
+
+
+def _build_backend():
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend(CACHE_URL, CACHE_TTL_SECONDS)
+    return InProcessCacheBackend(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+
+backend = _build_backend()
+
+
+# -----------------------------
+# Data versions
+# -----------------------------
+
+def get_data_version(user_id: int) -> int:
+    """Current data version for a user (0 until their first write)."""
+    return backend.get_version(f"version:{user_id}")
+
+
+def bump_data_version(user_id: int) -> int:
+    """
+    Invalidate every cached response for a user.
+
+    Call after db.commit() in any route that changes data the dashboard
+    reads. Entries keyed by the old version are never read again and age
+    out through LRU/TTL.
+
+    Also starts the user's read-your-writes window (see recently_wrote).
+    """
+    if READ_YOUR_WRITES_SECONDS > 0:
+        backend.set_flag(f"wrote:{user_id}", READ_YOUR_WRITES_SECONDS)
+    return backend.incr_version(f"version:{user_id}")
+
+
+def recently_wrote(user_id: int) -> bool:
+    """
+    Whether the user changed data in the last READ_YOUR_WRITES_SECONDS,
+    i.e. a read replica may not have their write yet.
+    """
+    return READ_YOUR_WRITES_SECONDS > 0 and backend.has_flag(f"wrote:{user_id}")
+
+
+# -----------------------------
+# Conditional requests (ETag / If-None-Match)
+# -----------------------------
+
+def _make_etag(user_id: int, version: int, name: str, key_parts) -> str:
+    digest = hashlib.sha1(
+        ":".join([name, *map(str, key_parts)]).encode()
+    ).hexdigest()[:16]
+    return f'"{backend.epoch}-{user_id}-{version}-{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: ignore any W/ prefix.
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return any(t[2:] == etag if t.startswith("W/") else t == etag for t in candidates)
+
+
+def _read_replica(request: Optional[Request]) -> bool:
+    """
+    Whether the request reads from the read replica (set by get_read_db
+    and get_async_db),
+    which may lag the user's data version: bodies and list results read
+    from it are neither cached nor tagged with that version.
+    """
+    return request is not None and getattr(request.state, "read_replica", False)
+
+
+def _check_etag(request: Optional[Request], etag: str) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request is not None and _etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return headers
+
+
+def check_etag(
+    request: Request,
+    response: Response,
+    name: str,
+    user_id: int,
+    *key_parts,
+) -> None:
+    """
+    ETag support for plain (uncached) GET endpoints.
+
+    Call before running the query. Raises a 304 when the client already holds
+    the current representation; otherwise sets ETag on the outgoing response
+    (unless it is read from the replica). The tag is derived from the user's
+    data version, so any write bumps it.
+    """
+    version = get_data_version(user_id)
+    etag = _make_etag(user_id, version, name, key_parts)
+    headers = _check_etag(request, etag)
+    if _read_replica(request):
+        del headers["ETag"]
+    response.headers.update(headers)
+
+
+# -----------------------------
+# Body encoders
+# -----------------------------
+
+def render_json(content) -> bytes:
+    """
+    Same bytes JSONResponse would produce for jsonable_encoder(content).
+
+    json.dumps walks plain containers and numbers in C; jsonable_encoder is
+    only called for leaves it cannot handle (dates, Decimals, ...), instead
+    of for every element of every list.
+    """
+    return json.dumps(
+        content,
+        default=jsonable_encoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def render_msgpack(content) -> bytes:
+    """
+    MessagePack body (bytes values are sent as bin). Requires the optional
+    `msgpack` package.
+    """
+    try:
+        import msgpack  # type: ignore
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="msgpack encoding is not available on this server.",
+        )
+
+    return msgpack.packb(content, default=jsonable_encoder, use_bin_type=True)
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+# -----------------------------
+# Cached responses
+# -----------------------------
+
+def cached_response(
+    name: str,
+    user_id: int,
+    compute: Callable[[], object],
+    *key_parts,
+    request: Optional[Request] = None,
+    render: Callable[[object], bytes] = render_json,
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Return the cached body for (user, data version, name, key_parts), or
+    call compute(), render it (JSON the way FastAPI would, by default) and
+    cache it. Callers offering several encodings must include the encoding
+    in key_parts.
+
+    A hit costs one lookup and returns the stored bytes as-is. When request
+    carries a matching If-None-Match, a 304 is returned before either. A
+    body computed from the read replica is served untagged and not stored.
+    """
+    version = get_data_version(user_id)
+    headers = _check_etag(request, _make_etag(user_id, version, name, key_parts))
+
+    key = _response_key(user_id, version, name, key_parts)
+
+    body = backend.get(key)
+    if body is None:
+        body = render(compute())
+        if _read_replica(request):
+            del headers["ETag"]
+        else:
+            backend.set(key, body)
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _response_key(user_id: int, version: int, name: str, key_parts) -> str:
+    return ":".join(["resp", str(user_id), str(version), name, *map(str, key_parts)])
+
+
+async def _backend_call(fn, *args):
+    # Redis calls block; keep them off the event loop. In-process ones are dict lookups.
+    if isinstance(backend, InProcessCacheBackend):
+        return fn(*args)
+    return await run_in_threadpool(fn, *args)
+
+
+async def cached_response_async(
+    name: str,
+    user_id: int,
+    compute: Callable[[], Awaitable[object]],
+    *key_parts,
+    request: Optional[Request] = None,
+    render: Callable[[object], bytes] = render_json,
+    media_type: str = "application/json",
+) -> Response:
+    """
+    cached_response for async routes: compute is awaited on a miss and the
+    body is rendered in the threadpool. Same keys, so sync and async routes
+    share entries.
+    """
+    version = await _backend_call(get_data_version, user_id)
+    headers = _check_etag(request, _make_etag(user_id, version, name, key_parts))
+
+    key = _response_key(user_id, version, name, key_parts)
+
+    body = await _backend_call(backend.get, key)
+    if body is None:
+        body = await run_in_threadpool(render, await compute())
+        if _read_replica(request):
+            del headers["ETag"]
+        else:
+            await _backend_call(backend.set, key, body)
+
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -12,7 +12,59 @@ RDS_PASSWORD = os.getenv("RDS_PASSWORD")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 DB_URL = os.getenv("DB_URL")
 
+# Connection pool, per engine and worker process. pool_recycle stays under
+# the server / proxy idle timeout; pre-ping replaces connections that died
+# while idle instead of failing the first query on them.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Optional async engine for the dashboard reads: ASYNC_DB_DRIVER=aiomysql
+# (or asyncmy) reuses the RDS settings; ASYNC_DB_URL gives a full URL
+# instead, e.g. sqlite+aiosqlite:///./local.db for local testing.
+ASYNC_DB_DRIVER = os.getenv("ASYNC_DB_DRIVER")
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL")
+
+# Optional read replica for the GET routes (dashboard, trades, transactions,
+# portfolio, financial): READ_DB_HOST reuses the other RDS settings,
+# READ_DB_URL gives a full URL instead. A user's reads stay on the primary
+# for READ_YOUR_WRITES_SECONDS after their own writes, so keep it above
+# the usual replica lag. The window is kept in the cache backend: with more
+# than one worker use CACHE_BACKEND=redis, or other workers read the replica
+# right after a write. Responses read from the replica are never cached.
+# With an async database the async dashboard routes read the same replica
+# through the async driver.
+READ_DB_HOST = os.getenv("READ_DB_HOST")
+READ_DB_URL = os.getenv("READ_DB_URL")
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
 # JWT Config
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 
+# Dashboard response cache ("memory" or "redis")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 3600))
+
+# Streaming exports: rows fetched per server-side cursor batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# POST /trades/bulk
+TRADE_IMPORT_MAX_ROWS = int(os.getenv("TRADE_IMPORT_MAX_ROWS", 50000))
+TRADE_IMPORT_MAX_BYTES = int(os.getenv("TRADE_IMPORT_MAX_BYTES", 20 * 1024 * 1024))
+TRADE_IMPORT_CHUNK_SIZE = int(os.getenv("TRADE_IMPORT_CHUNK_SIZE", 1000))
+
+# get_current_user: verified tokens cached per worker (0 disables)
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+# Password hashing (login / signup)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # or "process"
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
@@ -0,0 +1,469 @@
+# app/curves.py
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+
+# Output order of the per-point fields. A curve only carries the columns it
+# was built with; NaN inside a column marks a point that never had that field
+# (e.g. the initial cash anchor has no pre/after-close split).
+CURVE_FIELDS = (
+    "value",
+    "actual_value",
+    "portfolio_close",
+    "deposits",
+    "withdrawals",
+    "pre_open_net_flow",
+    "after_close_net_flow",
+    "net_flow",
+)
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# int64 view of NaT in a datetime64[D] array.
+NAT_DAYS = np.iinfo(np.int64).min
+
+
+def to_datetime64(dates) -> np.ndarray:
+    """
+    list[date | None] -> datetime64[D], None becoming NaT (via ordinals;
+    much faster than np.array).
+    """
+    days = np.fromiter(
+        (d.toordinal() - _EPOCH_ORDINAL if d is not None else NAT_DAYS for d in dates),
+        dtype=np.int64,
+        count=len(dates),
+    )
+    return days.view("datetime64[D]")
+
+
+def round2(values) -> np.ndarray:
+    return np.round(np.asarray(values, dtype=np.float64), 2)
+
+
+@dataclass
+class Curve:
+    """
+    Array-backed chart series.
+
+    dates: datetime64[D], sorted asc, one entry per point.
+    columns: {field: float64 array}, each the same length as dates and
+    already rounded to cents.
+
+    Everything stays vectorized until to_points(), which is the only place
+    per-point dicts are built.
+    """
+    dates: np.ndarray
+    columns: dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.columns["value"]
+
+    @property
+    def first_date(self) -> date:
+        return self.dates[0].astype(object)
+
+    def prepend(self, anchor_date: date, fields: dict) -> "Curve":
+        """
+        New curve with one point in front. Columns missing on either side
+        are NaN-filled so the point keeps exactly the fields it was given.
+        """
+        names = [n for n in CURVE_FIELDS if n in self.columns or n in fields]
+        n = len(self)
+        columns = {}
+        for name in names:
+            head = fields.get(name, np.nan)
+            tail = self.columns.get(name)
+            if tail is None:
+                tail = np.full(n, np.nan)
+            columns[name] = np.concatenate(([head], tail))
+
+        dates = np.concatenate((to_datetime64([anchor_date]), self.dates))
+        return Curve(dates, columns)
+
+    def take(self, idx) -> "Curve":
+        """Sub-curve of the points at idx (sorted positions)."""
+        return Curve(self.dates[idx], {name: col[idx] for name, col in self.columns.items()})
+
+    def fill_daily(self, start: Optional[date] = None, end: Optional[date] = None) -> "Curve":
+        """
+        One point per calendar day from the first to the last date; missing
+        days carry the latest point forward.
+
+        start / end narrow the output to a window (end may lie past the last
+        date, in which case the last point is carried up to it).
+        """
+        if not len(self):
+            return self
+
+        first = self.dates[0]
+        last = self.dates[-1]
+        if start is not None:
+            first = max(first, np.datetime64(start, "D"))
+        if end is not None:
+            last = np.datetime64(end, "D")
+
+        days = np.arange(first, last + np.timedelta64(1, "D"))
+        idx = np.searchsorted(self.dates, days, side="right") - 1
+        return Curve(days, {name: col[idx] for name, col in self.columns.items()})
+
+    def to_points(self) -> list:
+        """Materialize [{date, value, ...}] for the JSON response."""
+        n = len(self)
+        names = [name for name in CURVE_FIELDS if name in self.columns]
+        cols = [self.columns[name] for name in names]
+        dates = self.dates.astype(object)
+
+        # Rows are grouped by which fields they have (normally all of them,
+        # plus a different set for anchor days), so each group is built
+        # with a single zip over plain lists.
+        present = np.zeros(n, dtype=np.int64)
+        for bit, col in enumerate(cols):
+            present = present + (~np.isnan(col)).astype(np.int64) * (1 << bit)
+
+        points = [None] * n
+        for code in np.unique(present).tolist():
+            idx = [i for i in range(len(names)) if code >> i & 1]
+            keys = ("date", *[names[i] for i in idx])
+            rows = np.flatnonzero(present == code)
+            group = [dates[rows].tolist()] + [cols[i][rows].tolist() for i in idx]
+            for r, row in zip(rows.tolist(), zip(*group)):
+                points[r] = dict(zip(keys, row))
+
+        return points
+
+    def to_columns(self) -> dict:
+        """
+        Columnar form: {"dates": [iso...], field: [values...]}, with each date
+        sent once. Fields a point never had are null.
+        """
+        columns = {"dates": np.datetime_as_string(self.dates, unit="D").tolist()}
+        for name in CURVE_FIELDS:
+            col = self.columns.get(name)
+            if col is None:
+                continue
+            values = col.tolist()
+            if np.isnan(col).any():
+                values = [None if v != v else v for v in values]
+            columns[name] = values
+        return columns
+
+    def to_binary_columns(self) -> dict:
+        """
+        Compact columnar form for binary encodings: dates as little-endian
+        int32 days since 1970-01-01, fields as little-endian float64 (NaN
+        where a point never had the field), all as raw bytes.
+        """
+        columns = {"dates": self.dates.astype("<i4").tobytes()}
+        for name in CURVE_FIELDS:
+            col = self.columns.get(name)
+            if col is not None:
+                columns[name] = col.astype("<f8").tobytes()
+        return columns
+
+
+def linear_regression(curve: Curve) -> Curve:
+    """
+    Same-length best-fit straight line through curve.values, using the point
+    index as x.
+    """
+    n = len(curve)
+    if not n:
+        return Curve(curve.dates, {"value": np.empty(0)})
+
+    ys = curve.values
+    xs = np.arange(n, dtype=np.float64)
+
+    x_mean = xs.mean()
+    y_mean = ys.mean()
+
+    x_dev = xs - x_mean
+    denom = np.dot(x_dev, x_dev)
+    if denom == 0:
+        return Curve(curve.dates, {"value": round2(np.full(n, y_mean))})
+
+    slope = np.dot(x_dev, ys - y_mean) / denom
+    intercept = y_mean - slope * x_mean
+
+    return Curve(curve.dates, {"value": round2(intercept + slope * xs)})
+
+
+def deviation_bands(equity: Curve, ideal: Curve) -> tuple:
+    """
+    Returns (above, below) curves:
+      above: max(equity, ideal)
+      below: min(equity, ideal)
+    """
+    n = min(len(equity), len(ideal))
+    dates = equity.dates[:n]
+    eq = equity.values[:n]
+    idv = ideal.values[:n]
+
+    above = Curve(dates, {"value": np.maximum(eq, idv)})
+    below = Curve(dates, {"value": np.minimum(eq, idv)})
+    return above, below
+
+
+def max_drawdown_indices(values: np.ndarray) -> tuple:
+    """
+    (peak, trough) positions of the largest peak-to-trough drop in values.
+    Both are 0 when the series never drops.
+    """
+    if not len(values):
+        return 0, 0
+
+    running_peak = np.maximum.accumulate(values)
+    trough = int(np.argmax(running_peak - values))
+    peak = int(np.argmax(values[: trough + 1]))
+    return peak, trough
+
+
+def _lttb(xs: np.ndarray, ys: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of n_out points that keep the
+    visual shape of (xs, ys). First and last points are always kept.
+    """
+    n = len(xs)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = xs[next_start:next_end].mean()
+        avg_y = ys[next_start:next_end].mean()
+
+        area = np.abs(
+            (xs[a] - avg_x) * (ys[start:end] - ys[a])
+            - (xs[a] - xs[start:end]) * (avg_y - ys[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_indices(curve: Curve, max_points: int) -> np.ndarray:
+    """
+    Positions to keep so curve has at most max_points points.
+
+    Shape is preserved with LTTB on value; the first point (the initial
+    cash anchor, when there is one), the last point and the max drawdown
+    peak/trough are always kept.
+    """
+    n = len(curve)
+    if n <= max_points:
+        return np.arange(n)
+
+    values = curve.values
+    peak, trough = max_drawdown_indices(values)
+    keep = {0, n - 1, peak, trough}
+
+    xs = curve.dates.astype(np.float64)
+    budget = max(max_points - (len(keep) - 2), 3)
+    selected = _lttb(xs, values, budget)
+
+    return np.union1d(selected, np.fromiter(keep, dtype=np.int64))
+
+
+def weekly_pnl(curve: Curve) -> list:
+    """
+    Sum of day-over-day value changes per "%Y-W%U" week (Sunday-first week
+    of year), keyed by the later day of each pair. Returns
+    [{week, pnl}] sorted by week.
+    """
+    if len(curve) < 2:
+        return []
+
+    deltas = np.diff(curve.values)
+    days = curve.dates[1:]
+
+    years = days.astype("datetime64[Y]")
+    day_of_year = (days - years.astype("datetime64[D]")).astype(np.int64)
+    # 1970-01-01 was a Thursday; shift so Sunday == 0 like %U.
+    weekday_sun0 = (days.astype(np.int64) + 4) % 7
+    week = (day_of_year + 7 - weekday_sun0) // 7
+
+    year_num = years.astype(np.int64) + 1970
+    keys = year_num * 100 + week
+
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.zeros(len(unique_keys))
+    np.add.at(sums, inverse, deltas)
+
+    return [
+        {"week": f"{k // 100}-W{k % 100:02d}", "pnl": v}
+        for k, v in zip(unique_keys.tolist(), round2(sums).tolist())
+    ]
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Max of the trailing window points ending at each position (fewer at the
+    start). O(n) regardless of window: per-block prefix and suffix maxima,
+    where every window spans at most one block boundary (van Herk /
+    Gil-Werman).
+    """
+    n = len(values)
+    if window <= 1 or not n:
+        return values.copy()
+
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, -np.inf)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    out = np.maximum.accumulate(values)
+    ends = np.arange(window - 1, n)
+    out[window - 1:] = np.maximum(suffix[ends - window + 1], prefix[ends])
+    return out
+
+
+@dataclass
+class DrawdownProfile:
+    """
+    Drawdown analysis of one daily curve (see drawdown_profile).
+
+    underwater / rolling curves hold the drawdown in percent (<= 0) as
+    "value". Positions index into the analysed curve; recovery is None
+    while the max drawdown is still open.
+    """
+    dates: np.ndarray
+    underwater: Curve
+    rolling: dict
+    peak: int = 0
+    trough: int = 0
+    recovery: Optional[int] = None
+    longest_days: int = 0
+
+    def _date(self, i: Optional[int]) -> Optional[date]:
+        return self.dates[i].astype(object) if i is not None and len(self.dates) else None
+
+    def _days(self, start: Optional[int], end: Optional[int]) -> Optional[int]:
+        if start is None or end is None or not len(self.dates):
+            return None
+        return int((self.dates[end] - self.dates[start]).astype(np.int64))
+
+    @property
+    def max_drawdown_percent(self) -> float:
+        return float(self.underwater.values[self.trough]) if len(self.dates) else 0.0
+
+    @property
+    def duration_days(self) -> int:
+        """Peak to recovery (or to the last point while still open)."""
+        if not self.max_drawdown_percent:
+            return 0
+        end = self.recovery if self.recovery is not None else len(self.dates) - 1
+        return self._days(self.peak, end)
+
+    @property
+    def current_drawdown_percent(self) -> float:
+        return float(self.underwater.values[-1]) if len(self.dates) else 0.0
+
+    @property
+    def current_drawdown_days(self) -> int:
+        if not len(self.dates) or self.underwater.values[-1] == 0:
+            return 0
+        last_peak = int(np.flatnonzero(self.underwater.values == 0)[-1])
+        return self._days(last_peak, len(self.dates) - 1)
+
+    def summary(self) -> dict:
+        in_drawdown = self.max_drawdown_percent < 0
+        return {
+            "max_drawdown": {
+                "percent": self.max_drawdown_percent,
+                "peak_date": self._date(self.peak) if in_drawdown else None,
+                "trough_date": self._date(self.trough) if in_drawdown else None,
+                "recovery_date": self._date(self.recovery),
+                "decline_days": self._days(self.peak, self.trough) or 0,
+                "recovery_days": self._days(self.trough, self.recovery),
+                "duration_days": self.duration_days,
+            },
+            "longest_drawdown_days": self.longest_days,
+            "current_drawdown": {
+                "percent": self.current_drawdown_percent,
+                "days": self.current_drawdown_days,
+            },
+            "rolling": {
+                f"{window}d": float(curve.values.min()) if len(curve) else 0.0
+                for window, curve in self.rolling.items()
+            },
+        }
+
+
+def _drawdown_percent(values: np.ndarray, peaks: np.ndarray) -> np.ndarray:
+    safe_peaks = np.where(peaks != 0, peaks, 1.0)
+    return round2(np.where(peaks != 0, (values - peaks) / safe_peaks, 0.0) * 100)
+
+
+def drawdown_profile(curve: Curve, windows=(30, 90)) -> DrawdownProfile:
+    """
+    Max drawdown (depth, peak / trough / recovery), longest time under
+    water, current drawdown, the underwater curve and trailing-window
+    drawdown curves for each of windows, all from one set of O(n) array
+    passes over curve.values.
+
+    curve should be daily (Curve.fill_daily) so a window of N points is N
+    calendar days.
+    """
+    values = curve.values
+    n = len(values)
+    if not n:
+        empty = Curve(curve.dates, {"value": np.empty(0)})
+        return DrawdownProfile(curve.dates, empty, {w: empty for w in windows})
+
+    peaks = np.maximum.accumulate(values)
+    underwater = _drawdown_percent(values, peaks)
+    rolling = {
+        w: Curve(curve.dates, {"value": _drawdown_percent(values, rolling_max(values, w))})
+        for w in windows
+    }
+
+    at_peak = underwater == 0
+    trough = int(np.argmin(underwater))
+    peak = int(np.flatnonzero(at_peak[: trough + 1])[-1])
+    after = np.flatnonzero(at_peak[trough:])
+    recovery = trough + int(after[0]) if len(after) and underwater[trough] < 0 else None
+
+    # Each underwater stretch runs from a peak point to the next one (or to
+    # the last point when still open).
+    peak_idx = np.flatnonzero(at_peak)
+    ends = np.append(peak_idx[1:], n - 1)
+    underwater_runs = ends - peak_idx > 1
+    underwater_runs[-1] = ends[-1] > peak_idx[-1]
+    day_numbers = curve.dates.astype(np.int64)
+    spans = day_numbers[ends] - day_numbers[peak_idx]
+    longest = int(spans[underwater_runs].max()) if underwater_runs.any() else 0
+
+    return DrawdownProfile(
+        dates=curve.dates,
+        underwater=Curve(curve.dates, {"value": underwater}),
+        rolling=rolling,
+        peak=peak,
+        trough=trough,
+        recovery=recovery,
+        longest_days=longest,
+    )
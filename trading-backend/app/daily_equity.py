@@ -0,0 +1,90 @@
+# app/daily_equity.py
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .ledger import compute_equity_rows, load_cash_flow_index
+from .models import DailyEquity, Portfolio
+
+
+def refresh_daily_equity(db: Session, user_id: int, from_date: Optional[date] = None) -> int:
+    """
+    Recompute the DailyEquity rows for one user on/after from_date.
+
+    Call this after changing a Portfolio, Transactions or InitialCash row and
+    before db.commit(), so the series is updated in the same transaction:
+
+        refresh_daily_equity(db, user_id, min(old_date, new_date))
+        db.commit()
+
+    Rows before from_date are untouched; the running cumulative_net_flow is
+    picked up from the last row before the window. from_date=None rebuilds
+    the whole series, and so does a from_date with no row before it (first
+    write of a user never backfilled, or a change before their first day).
+
+    Returns the number of rows written.
+    """
+    # Routers stage their changes without autoflush; make them visible here.
+    db.flush()
+
+    cumulative_net_flow = 0.0
+
+    delete_q = db.query(DailyEquity).filter(DailyEquity.user_id == user_id)
+    portfolio_q = (
+        db.query(Portfolio.entry_date, Portfolio.balance)
+        .filter(Portfolio.user_id == user_id)
+    )
+
+    if from_date is not None:
+        previous = (
+            db.query(DailyEquity.cumulative_net_flow)
+            .filter(
+                DailyEquity.user_id == user_id,
+                DailyEquity.entry_date < from_date,
+            )
+            .order_by(DailyEquity.entry_date.desc())
+            .first()
+        )
+        if previous is None:
+            return refresh_daily_equity(db, user_id)
+
+        cumulative_net_flow = float(previous[0])
+        delete_q = delete_q.filter(DailyEquity.entry_date >= from_date)
+        portfolio_q = portfolio_q.filter(Portfolio.entry_date >= from_date)
+
+    delete_q.delete(synchronize_session=False)
+
+    portfolio_rows = portfolio_q.order_by(Portfolio.entry_date.asc()).all()
+    if not portfolio_rows:
+        return 0
+
+    flow_index = load_cash_flow_index(db, user_id, from_date=from_date)
+
+    rows = compute_equity_rows(
+        [r[0] for r in portfolio_rows],
+        [float(r[1]) for r in portfolio_rows],
+        flow_index,
+        cumulative_net_flow=cumulative_net_flow,
+    )
+    for row in rows:
+        row["user_id"] = user_id
+
+    db.bulk_insert_mappings(DailyEquity, rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # Backfill: python -m app.daily_equity
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user_ids = [r[0] for r in db.query(Portfolio.user_id).distinct().all()]
+        for uid in user_ids:
+            written = refresh_daily_equity(db, uid)
+            db.commit()
+            print(f"user {uid}: {written} daily equity rows")
+    finally:
+        db.close()
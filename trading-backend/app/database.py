@@ -1,19 +1,56 @@
 # database.py
+import asyncio
+import warnings
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import QueuePool
-from .config import RDS_HOST, RDS_PORT, RDS_USER, RDS_PASSWORD, DATABASE_NAME
+from .config import (
+    RDS_HOST,
+    RDS_PORT,
+    RDS_USER,
+    RDS_PASSWORD,
+    DATABASE_NAME,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    READ_DB_HOST,
+    CACHE_BACKEND,
+    READ_DB_URL,
+    ASYNC_DB_DRIVER,
+    ASYNC_DB_URL,
+)
+from .cache import recently_wrote
+from .instrumentation import (
+    MeasuredAsyncQueuePool,
+    MeasuredQueuePool,
+    instrument_engine,
+    instrument_pool,
+)
 from .models import Base
 
 DATABASE_URL = f"mysql+pymysql://{RDS_USER}:{RDS_PASSWORD}@{RDS_HOST}:{RDS_PORT}/{DATABASE_NAME}"
 
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
 engine = create_engine(
     DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20
+    poolclass=MeasuredQueuePool,
+    **POOL_SETTINGS,
 )
 
+# Query count / DB time per request and pool checkout stats (GET /metrics)
+instrument_engine(engine)
+instrument_pool("sync", engine, POOL_SETTINGS)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db_connection():
@@ -28,3 +65,141 @@ def get_db_connection():
     finally:
         db.close()
 
+
+# -----------------------------
+# Optional read replica (GET routes)
+# -----------------------------
+
+if READ_DB_URL:
+    READ_DATABASE_URL = READ_DB_URL
+elif READ_DB_HOST:
+    READ_DATABASE_URL = f"mysql+pymysql://{RDS_USER}:{RDS_PASSWORD}@{READ_DB_HOST}:{RDS_PORT}/{DATABASE_NAME}"
+else:
+    READ_DATABASE_URL = None
+
+read_engine = None
+ReadSessionLocal = None
+
+if READ_DATABASE_URL:
+    read_engine = create_engine(
+        READ_DATABASE_URL,
+        poolclass=MeasuredQueuePool,
+        **POOL_SETTINGS,
+    )
+    instrument_engine(read_engine)
+    instrument_pool("read", read_engine, POOL_SETTINGS)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+    if CACHE_BACKEND != "redis":
+        warnings.warn(
+            "A read replica is configured with the in-process cache: read-your-writes "
+            "only holds on the worker that took the write. Use CACHE_BACKEND=redis."
+        )
+
+
+def read_session_factory(user_id: int):
+    """
+    Session factory for reads on behalf of user_id: the replica, or the
+    primary when there is none or the user is inside their read-your-writes
+    window (cache.recently_wrote). Sessions from it must not write.
+    """
+    if ReadSessionLocal is None or recently_wrote(user_id):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+# -----------------------------
+# Optional async engine (dashboard reads)
+# -----------------------------
+
+if ASYNC_DB_URL:
+    ASYNC_DATABASE_URL = ASYNC_DB_URL
+elif ASYNC_DB_DRIVER:
+    ASYNC_DATABASE_URL = f"mysql+{ASYNC_DB_DRIVER}://{RDS_USER}:{RDS_PASSWORD}@{RDS_HOST}:{RDS_PORT}/{DATABASE_NAME}"
+else:
+    ASYNC_DATABASE_URL = None
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_DATABASE_URL:
+    # Needs the async driver (aiomysql / asyncmy / aiosqlite) installed.
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            poolclass=MeasuredAsyncQueuePool,
+            **POOL_SETTINGS,
+        )
+        instrument_pool("async", async_engine.sync_engine, POOL_SETTINGS)
+
+    AsyncSessionLocal = sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+    instrument_engine(async_engine.sync_engine)
+
+# The replica for the async routes: the READ_DB_* database, reached with the
+# async engine's driver (mysql+aiomysql://...@READ_DB_HOST, sqlite+aiosqlite...).
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if async_engine is not None and READ_DATABASE_URL:
+    async_read_url = make_url(READ_DATABASE_URL)
+    if async_read_url.get_backend_name() != async_engine.url.get_backend_name():
+        warnings.warn(
+            "The read replica and the async database use different backends; "
+            "the async dashboard routes read from the primary."
+        )
+    elif async_read_url.get_backend_name() == "sqlite":
+        async_read_engine = create_async_engine(
+            async_read_url.set(drivername=async_engine.url.drivername)
+        )
+    else:
+        async_read_engine = create_async_engine(
+            async_read_url.set(drivername=async_engine.url.drivername),
+            poolclass=MeasuredAsyncQueuePool,
+            **POOL_SETTINGS,
+        )
+        instrument_pool("async-read", async_read_engine.sync_engine, POOL_SETTINGS)
+
+    if async_read_engine is not None:
+        AsyncReadSessionLocal = sessionmaker(
+            bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        instrument_engine(async_read_engine.sync_engine)
+
+
+def async_session_factory(user_id: int):
+    """read_session_factory for the async routes (AsyncSession factories)."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("No async database configured (set ASYNC_DB_DRIVER or ASYNC_DB_URL).")
+    if AsyncReadSessionLocal is None or recently_wrote(user_id):
+        return AsyncSessionLocal
+    return AsyncReadSessionLocal
+
+
+class AsyncDB:
+    """
+    Async database handle for one request.
+
+    Every run_sync() call gets its own AsyncSession, and so its own
+    connection. Calls passed to gather() therefore really run at the same
+    time. The functions are the ordinary sync loaders, called with a
+    Session backed by the async driver.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+
+    async def run_sync(self, fn, *args):
+        """fn(session, *args) on a fresh session."""
+        async with self._session_factory() as session:
+            return await session.run_sync(fn, *args)
+
+    async def gather(self, *calls):
+        """run_sync each (fn, *args) concurrently; results in call order."""
+        return await asyncio.gather(*[self.run_sync(*call) for call in calls])
+
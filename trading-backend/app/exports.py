@@ -0,0 +1,174 @@
+# app/exports.py
+
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Date, Integer, Numeric, select
+
+from . import database
+from .config import EXPORT_BATCH_SIZE
+
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_columns(model) -> list:
+    """[(name, kind)] for every column but user_id; kind is int / money / date / str."""
+    columns = []
+    for column in model.__table__.columns:
+        if column.name == "user_id":
+            continue
+        if isinstance(column.type, Integer):
+            kind = "int"
+        elif isinstance(column.type, Numeric):
+            kind = "money"
+        elif isinstance(column.type, Date):
+            kind = "date"
+        else:
+            kind = "str"
+        columns.append((column.name, kind))
+    return columns
+
+
+def _iter_batches(statement, user_id: int):
+    """
+    Row batches of statement through a server-side cursor, so only one
+    batch is held in memory. Opens its own session (on the read replica
+    when there is one): the request's session is closed before a streamed
+    body is sent.
+    """
+    db = database.read_session_factory(user_id)()
+    try:
+        result = db.execute(statement, execution_options={"stream_results": True})
+        for rows in result.partitions(EXPORT_BATCH_SIZE):
+            yield rows
+    finally:
+        db.close()
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _stream_csv(names, statement, user_id):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(names)
+    for rows in _iter_batches(statement, user_id):
+        writer.writerows(
+            ["" if v is None else v for v in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _stream_ndjson(names, statement, user_id):
+    for rows in _iter_batches(statement, user_id):
+        yield "".join(
+            json.dumps(dict(zip(names, map(_json_value, row)))) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _stream_parquet(columns, statement, user_id, pa, pq):
+    arrow_types = {
+        "int": pa.int64(),
+        "money": pa.decimal128(16, 2),
+        "date": pa.date32(),
+        "str": pa.string(),
+    }
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+
+    # One row group per batch, drained to the client as it is written.
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in _iter_batches(statement, user_id):
+            writer.write_table(pa.Table.from_pylist(
+                [dict(zip(schema.names, row)) for row in rows],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_response(
+    model, filters, order_by, fmt: str, filename: str, user_id: int
+) -> StreamingResponse:
+    """
+    Stream every model row matching filters, read on behalf of user_id,
+    as csv, ndjson or parquet.
+    Memory stays at one batch (EXPORT_BATCH_SIZE rows) whatever the count.
+
+    Parquet needs pyarrow installed; without it the request gets a 406.
+    """
+    columns = export_columns(model)
+    names = [name for name, _ in columns]
+    statement = (
+        select(*[getattr(model, name) for name in names])
+        .where(*filters)
+        .order_by(*order_by)
+    )
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise HTTPException(406, "Parquet export is not available on this server.")
+        body = _stream_parquet(columns, statement, user_id, pa, pq)
+    elif fmt == "ndjson":
+        body = _stream_ndjson(names, statement, user_id)
+    else:
+        body = _stream_csv(names, statement, user_id)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
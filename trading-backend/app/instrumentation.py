@@ -0,0 +1,339 @@
+# app/instrumentation.py
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Longest statement text kept for the slowest query of a route.
+STATEMENT_MAX_CHARS = 500
+
+
+@dataclass
+class RequestStats:
+    """SQL sent while serving one request."""
+    queries: int = 0
+    db_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.queries += 1
+        self.db_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+
+# Set by QueryTimingMiddleware for the duration of a request. The object
+# is shared, not copied, with the threadpool workers that run sync routes
+# and dependencies, so their queries land in it.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+# -----------------------------
+# Engine hooks
+# -----------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement engine sends and charge it to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# -----------------------------
+# Per-route aggregates
+# -----------------------------
+
+class RouteMetrics:
+    """
+    Running totals per "METHOD /route/{template}" for this worker process.
+    Reset with the process (or reset()).
+    """
+
+    def __init__(self):
+        self._routes: dict = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, stats: RequestStats, total_ms: float) -> None:
+        with self._lock:
+            m = self._routes.get(route)
+            if m is None:
+                m = self._routes[route] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_ms": 0.0,
+                    "max_db_ms": 0.0,
+                    "total_ms": 0.0,
+                    "max_total_ms": 0.0,
+                    "slowest_query_ms": 0.0,
+                    "slowest_query": None,
+                }
+            m["requests"] += 1
+            m["queries"] += stats.queries
+            m["max_queries"] = max(m["max_queries"], stats.queries)
+            m["db_ms"] += stats.db_ms
+            m["max_db_ms"] = max(m["max_db_ms"], stats.db_ms)
+            m["total_ms"] += total_ms
+            m["max_total_ms"] = max(m["max_total_ms"], total_ms)
+            if stats.slowest_ms > m["slowest_query_ms"]:
+                m["slowest_query_ms"] = stats.slowest_ms
+                m["slowest_query"] = " ".join(stats.slowest_statement.split())[:STATEMENT_MAX_CHARS]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {route: dict(m) for route, m in self._routes.items()}
+
+        for m in routes.values():
+            n = m["requests"]
+            m["mean_queries"] = round(m["queries"] / n, 2)
+            m["mean_db_ms"] = round(m["db_ms"] / n, 3)
+            m["mean_total_ms"] = round(m["total_ms"] / n, 3)
+            for key in ("db_ms", "max_db_ms", "total_ms", "max_total_ms", "slowest_query_ms"):
+                m[key] = round(m[key], 3)
+        return routes
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_metrics = RouteMetrics()
+
+
+# -----------------------------
+# Connection pools
+# -----------------------------
+
+# Checkout latency (ms) and waiters-at-arrival bucket upper bounds.
+CHECKOUT_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+WAITER_BUCKETS = (0, 1, 2, 5, 10, 20, 50)
+
+
+class Histogram:
+    """Counts per bucket (value <= bound, then +inf) with count / sum / max."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        buckets = {f"le_{bound}": n for bound, n in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "mean": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+        }
+
+
+class PoolMetrics:
+    """
+    Checkout statistics of one engine's pool: how long connect() took
+    (waiting for a free connection, opening one, pre-ping), how many other
+    checkouts were already in progress when one arrived, and timeouts,
+    new connections and invalidations (dead connections found by pre-ping
+    or a failed query).
+    """
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.checkout_ms = Histogram(CHECKOUT_MS_BUCKETS)
+        self.waiters = Histogram(WAITER_BUCKETS)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkout_ms.reset()
+            self.waiters.reset()
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+
+    def checkout_started(self) -> float:
+        with self._lock:
+            self.waiters.observe(self.waiting)
+            self.waiting += 1
+        return time.perf_counter()
+
+    def checkout_finished(self, started: float, timed_out: bool) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkout_ms.observe(elapsed_ms)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            return {
+                "settings": self.settings,
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "waiting": self.waiting,
+                "checkout_ms": self.checkout_ms.snapshot(),
+                "waiters_at_checkout": self.waiters.snapshot(),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+
+
+class _MeasuredPool:
+    """Times connect() into self.metrics (set by instrument_pool)."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        metrics = self.metrics
+        if metrics is None:
+            return super().connect()
+
+        started = metrics.checkout_started()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            metrics.checkout_finished(started, timed_out)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same metrics.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeasuredQueuePool(_MeasuredPool, QueuePool):
+    pass
+
+
+class MeasuredAsyncQueuePool(_MeasuredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+_pools: dict = {}
+
+
+def instrument_pool(name: str, engine, settings: dict) -> None:
+    """Collect PoolMetrics for engine's Measured*Pool under name (GET /metrics)."""
+    metrics = PoolMetrics(settings)
+    engine.pool.metrics = metrics
+    # Pool events registered on the engine follow it through recreate().
+    event.listen(engine, "connect", lambda *args: metrics.count("connects"))
+    event.listen(engine, "invalidate", lambda *args: metrics.count("invalidations"))
+    _pools[name] = (engine, metrics)
+
+
+def pool_metrics() -> dict:
+    return {name: metrics.snapshot(engine.pool) for name, (engine, metrics) in _pools.items()}
+
+
+def reset_pool_metrics() -> None:
+    for _, metrics in _pools.values():
+        metrics.reset()
+
+
+# -----------------------------
+# Middleware
+# -----------------------------
+
+def server_timing(stats: RequestStats, total_ms: float) -> str:
+    return (
+        f'db;dur={stats.db_ms:.2f};desc="{stats.queries} queries", '
+        f"db-slowest;dur={stats.slowest_ms:.2f}, "
+        f"app;dur={total_ms:.2f}"
+    )
+
+
+class QueryTimingMiddleware:
+    """
+    Counts and times the SQL behind each HTTP request.
+
+    Adds a Server-Timing header (db time with the query count, slowest
+    statement, time to response start) and feeds route_metrics, which
+    GET /metrics serves. Rows streamed after the headers (exports) are
+    counted in the metrics but not in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, total_ms).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                route_metrics.add(
+                    f"{scope['method']} {route.path}",
+                    stats,
+                    (time.perf_counter() - started) * 1000,
+                )
@@ -0,0 +1,611 @@
+# app/ledger.py
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import Portfolio, Trades, Transactions, Financial, InitialCash, DailyEquity
+
+
+@dataclass
+class LedgerSnapshot:
+    """
+    Per-request, read-only copy of a user's ledger tables.
+
+    Each table is loaded at most once and stored as parallel column lists
+    (sorted the way the dashboard math expects), so the compute functions
+    never touch the Session and can be fed hand-built snapshots.
+
+    Portfolio: sorted by entry_date asc (only the latest two rows when
+    loaded with portfolio="latest"; portfolio_first_balance still holds
+    the first row's balance when there is no InitialCash).
+    Equity: DailyEquity rows sorted by entry_date asc. When loaded for a
+    window, the columns hold the rows inside it plus the last row before
+    it (the fill seed), and equity_window_* / equity_total_net_flow
+    describe the full series.
+    Trades: every trade, open or closed, in id order.
+    Financial: sorted by entry_date asc (latest row is the last one).
+    flow_index: {(transaction_date, timing, transaction_type): amount}
+    """
+    user_id: int
+
+    portfolio_ids: list = field(default_factory=list)
+    portfolio_dates: list = field(default_factory=list)
+    portfolio_balances: list = field(default_factory=list)
+    portfolio_first_balance: Optional[float] = None
+
+    equity_dates: list = field(default_factory=list)
+    equity_portfolio_close: list = field(default_factory=list)
+    equity_deposits_pre_open: list = field(default_factory=list)
+    equity_withdrawals_pre_open: list = field(default_factory=list)
+    equity_deposits_after_close: list = field(default_factory=list)
+    equity_withdrawals_after_close: list = field(default_factory=list)
+    equity_actual: list = field(default_factory=list)
+    equity_normalized: list = field(default_factory=list)
+    equity_cumulative_net_flow: list = field(default_factory=list)
+
+    equity_window_from: Optional[date] = None
+    equity_window_to: Optional[date] = None
+    equity_total_net_flow: Optional[float] = None
+
+    flow_index: dict = field(default_factory=dict)
+
+    initial_cash_date: Optional[date] = None
+    initial_cash: Optional[float] = None
+
+    trade_symbols: list = field(default_factory=list)
+    trade_entry_dates: list = field(default_factory=list)
+    trade_close_dates: list = field(default_factory=list)
+    trade_profit_loss: list = field(default_factory=list)
+
+    financial_dates: list = field(default_factory=list)
+    financial_income: list = field(default_factory=list)
+    financial_nec: list = field(default_factory=list)
+    financial_ffa: list = field(default_factory=list)
+    financial_play: list = field(default_factory=list)
+    financial_ltss: list = field(default_factory=list)
+    financial_give: list = field(default_factory=list)
+    financial_expenses: list = field(default_factory=list)
+    financial_gains: list = field(default_factory=list)
+    financial_networth: list = field(default_factory=list)
+
+    @property
+    def has_initial_cash(self) -> bool:
+        return self.initial_cash_date is not None
+
+    @property
+    def is_equity_windowed(self) -> bool:
+        return self.equity_window_from is not None or self.equity_window_to is not None
+
+    @property
+    def total_deposits(self) -> float:
+        return sum(
+            amount
+            for (_, _, txn_type), amount in self.flow_index.items()
+            if txn_type == "deposit"
+        )
+
+    @property
+    def total_withdrawals(self) -> float:
+        return sum(
+            amount
+            for (_, _, txn_type), amount in self.flow_index.items()
+            if txn_type == "withdrawal"
+        )
+
+
+EQUITY_COLUMNS = (
+    "portfolio_close",
+    "deposits_pre_open",
+    "withdrawals_pre_open",
+    "deposits_after_close",
+    "withdrawals_after_close",
+    "actual_value",
+    "normalized_value",
+    "cumulative_net_flow",
+)
+
+
+def compute_equity_rows(
+    portfolio_dates,
+    portfolio_balances,
+    flow_index: dict,
+    cumulative_net_flow: float = 0.0,
+) -> list:
+    """
+    Build DailyEquity rows (as dicts) for a run of portfolio dates.
+
+    Portfolio.balance is the market close before after-close flows, so:
+    - actual_value = balance + after_close flows
+    - cumulative_net_flow = all flows on portfolio dates up to this date
+    - normalized_value = actual_value - cumulative_net_flow
+
+    cumulative_net_flow is the running total before the first date, which is
+    what lets a write recompute only the suffix of the series.
+    """
+    rows = []
+
+    for entry_date, balance in zip(portfolio_dates, portfolio_balances):
+        deposits_pre_open = flow_index.get((entry_date, "pre_open", "deposit"), 0.0)
+        withdrawals_pre_open = flow_index.get((entry_date, "pre_open", "withdrawal"), 0.0)
+        deposits_after_close = flow_index.get((entry_date, "after_close", "deposit"), 0.0)
+        withdrawals_after_close = flow_index.get((entry_date, "after_close", "withdrawal"), 0.0)
+
+        actual_value = float(balance) + deposits_after_close - withdrawals_after_close
+        cumulative_net_flow += (
+            deposits_pre_open
+            + deposits_after_close
+            - withdrawals_pre_open
+            - withdrawals_after_close
+        )
+
+        rows.append({
+            "entry_date": entry_date,
+            "portfolio_close": round(float(balance), 2),
+            "deposits_pre_open": round(deposits_pre_open, 2),
+            "withdrawals_pre_open": round(withdrawals_pre_open, 2),
+            "deposits_after_close": round(deposits_after_close, 2),
+            "withdrawals_after_close": round(withdrawals_after_close, 2),
+            "actual_value": round(actual_value, 2),
+            "normalized_value": round(actual_value - cumulative_net_flow, 2),
+            "cumulative_net_flow": round(cumulative_net_flow, 2),
+        })
+
+    return rows
+
+
+def _append_equity_row(ledger: LedgerSnapshot, entry_date, values) -> None:
+    ledger.equity_dates.append(entry_date)
+    ledger.equity_portfolio_close.append(float(values[0]))
+    ledger.equity_deposits_pre_open.append(float(values[1]))
+    ledger.equity_withdrawals_pre_open.append(float(values[2]))
+    ledger.equity_deposits_after_close.append(float(values[3]))
+    ledger.equity_withdrawals_after_close.append(float(values[4]))
+    ledger.equity_actual.append(float(values[5]))
+    ledger.equity_normalized.append(float(values[6]))
+    ledger.equity_cumulative_net_flow.append(float(values[7]))
+
+
+def load_cash_flow_index(
+    db: Session,
+    user_id: int,
+    from_date: Optional[date] = None,
+    on_dates: Optional[list] = None,
+) -> dict:
+    """
+    Load every deposit/withdrawal for a user in one grouped query.
+
+    Returns {(transaction_date, timing, transaction_type): amount}.
+
+    The equity builders look up flows for each portfolio date. Loading the
+    whole index once per request keeps that a dict lookup instead of a
+    SUM query per date/timing/type.
+
+    from_date limits the index to flows on/after that date; on_dates to
+    flows on those dates only.
+    """
+    query = (
+        db.query(
+            Transactions.transaction_date,
+            Transactions.timing,
+            Transactions.transaction_type,
+            func.sum(Transactions.amount),
+        )
+        .filter(Transactions.user_id == user_id)
+    )
+
+    if from_date is not None:
+        query = query.filter(Transactions.transaction_date >= from_date)
+    if on_dates is not None:
+        query = query.filter(Transactions.transaction_date.in_(on_dates))
+
+    rows = (
+        query
+        .group_by(
+            Transactions.transaction_date,
+            Transactions.timing,
+            Transactions.transaction_type,
+        )
+        .all()
+    )
+
+    return {
+        (txn_date, timing, txn_type): float(amount or 0)
+        for txn_date, timing, txn_type, amount in rows
+    }
+
+
+def _load_latest_portfolio(db: Session, ledger: LedgerSnapshot) -> None:
+    rows = (
+        db.query(Portfolio.id, Portfolio.entry_date, Portfolio.balance)
+        .filter(Portfolio.user_id == ledger.user_id)
+        .order_by(Portfolio.entry_date.desc())
+        .limit(2)
+        .all()
+    )
+    for row_id, entry_date, balance in reversed(rows):
+        ledger.portfolio_ids.append(row_id)
+        ledger.portfolio_dates.append(entry_date)
+        ledger.portfolio_balances.append(float(balance))
+
+
+def load_daily_summary_snapshot(db: Session, user_id: int) -> LedgerSnapshot:
+    """
+    Just what compute_daily_trading_summary reads, in two or three queries:
+
+    - the two latest portfolio rows (ORDER BY entry_date DESC LIMIT 2)
+    - every flow on those two dates, in one grouped query
+    - InitialCash, only when the user has a single portfolio row
+
+    Cost does not grow with the length of the history.
+    """
+    ledger = LedgerSnapshot(user_id=user_id)
+
+    _load_latest_portfolio(db, ledger)
+    if not ledger.portfolio_dates:
+        return ledger
+
+    ledger.flow_index = load_cash_flow_index(db, user_id, on_dates=ledger.portfolio_dates)
+
+    if len(ledger.portfolio_dates) == 1:
+        _load_initial_cash(db, ledger)
+
+    return ledger
+
+
+def _load_initial_cash(db: Session, ledger: LedgerSnapshot) -> None:
+    row = (
+        db.query(InitialCash.entry_date, InitialCash.initial_cash)
+        .filter(InitialCash.user_id == ledger.user_id)
+        .first()
+    )
+    if row:
+        ledger.initial_cash_date = row[0]
+        ledger.initial_cash = float(row[1])
+
+
+def _load_portfolio(db: Session, ledger: LedgerSnapshot) -> None:
+    rows = (
+        db.query(Portfolio.id, Portfolio.entry_date, Portfolio.balance)
+        .filter(Portfolio.user_id == ledger.user_id)
+        .order_by(Portfolio.entry_date.asc())
+        .all()
+    )
+    for row_id, entry_date, balance in rows:
+        ledger.portfolio_ids.append(row_id)
+        ledger.portfolio_dates.append(entry_date)
+        ledger.portfolio_balances.append(float(balance))
+
+    if rows:
+        ledger.portfolio_first_balance = ledger.portfolio_balances[0]
+
+
+def _load_first_balance(db: Session, ledger: LedgerSnapshot) -> None:
+    """portfolio="latest" without InitialCash: the first row's balance."""
+    first = (
+        db.query(Portfolio.balance)
+        .filter(Portfolio.user_id == ledger.user_id)
+        .order_by(Portfolio.entry_date.asc())
+        .first()
+    )
+    ledger.portfolio_first_balance = float(first[0])
+
+
+def _load_flows(db: Session, ledger: LedgerSnapshot) -> None:
+    ledger.flow_index = load_cash_flow_index(db, ledger.user_id)
+
+
+def load_ledger_trades(db: Session, ledger: LedgerSnapshot) -> None:
+    """Fill the ledger's trade columns (every trade, in id order)."""
+    rows = (
+        db.query(
+            Trades.symbol,
+            Trades.entry_date,
+            Trades.close_date,
+            Trades.profit_loss,
+        )
+        .filter(Trades.user_id == ledger.user_id)
+        .order_by(Trades.id.asc())
+        .all()
+    )
+    for symbol, entry_date, close_date, profit_loss in rows:
+        ledger.trade_symbols.append(symbol)
+        ledger.trade_entry_dates.append(entry_date)
+        ledger.trade_close_dates.append(close_date)
+        ledger.trade_profit_loss.append(
+            float(profit_loss) if profit_loss is not None else None
+        )
+
+
+def _load_equity(
+    db: Session,
+    ledger: LedgerSnapshot,
+    equity_from: Optional[date] = None,
+    equity_to: Optional[date] = None,
+) -> None:
+    """
+    The materialized DailyEquity series (or a window of it). A user without
+    one is left with no equity rows; see _fill_equity_in_memory.
+    """
+    if equity_from is not None or equity_to is not None:
+        _load_equity_window(db, ledger, equity_from, equity_to)
+        return
+
+    rows = (
+        db.query(DailyEquity.entry_date, *[getattr(DailyEquity, c) for c in EQUITY_COLUMNS])
+        .filter(DailyEquity.user_id == ledger.user_id)
+        .order_by(DailyEquity.entry_date.asc())
+        .all()
+    )
+    for row in rows:
+        _append_equity_row(ledger, row[0], row[1:])
+
+
+def _fill_equity_in_memory(db: Session, ledger: LedgerSnapshot, portfolio, flows: bool) -> None:
+    """
+    Compute the full series from Portfolio + flows, reusing whatever of them
+    the ledger already holds (portfolio is True / flows loaded).
+    """
+    if portfolio is True:
+        portfolio_dates = ledger.portfolio_dates
+        portfolio_balances = ledger.portfolio_balances
+    else:
+        portfolio_rows = (
+            db.query(Portfolio.entry_date, Portfolio.balance)
+            .filter(Portfolio.user_id == ledger.user_id)
+            .order_by(Portfolio.entry_date.asc())
+            .all()
+        )
+        portfolio_dates = [r[0] for r in portfolio_rows]
+        portfolio_balances = [float(r[1]) for r in portfolio_rows]
+
+    if portfolio_dates:
+        flow_index = ledger.flow_index if flows else load_cash_flow_index(db, ledger.user_id)
+        for row in compute_equity_rows(portfolio_dates, portfolio_balances, flow_index):
+            _append_equity_row(
+                ledger,
+                row["entry_date"],
+                [row[c] for c in EQUITY_COLUMNS],
+            )
+
+
+def _load_financial(db: Session, ledger: LedgerSnapshot) -> None:
+    rows = (
+        db.query(
+            Financial.entry_date,
+            Financial.income,
+            Financial.nec,
+            Financial.ffa,
+            Financial.play,
+            Financial.ltss,
+            Financial.give,
+            Financial.expenses,
+            Financial.gains,
+            Financial.networth,
+        )
+        .filter(Financial.user_id == ledger.user_id)
+        .order_by(Financial.entry_date.asc())
+        .all()
+    )
+    for row in rows:
+        ledger.financial_dates.append(row[0])
+        ledger.financial_income.append(float(row[1] or 0))
+        ledger.financial_nec.append(float(row[2] or 0))
+        ledger.financial_ffa.append(float(row[3] or 0))
+        ledger.financial_play.append(float(row[4] or 0))
+        ledger.financial_ltss.append(float(row[5] or 0))
+        ledger.financial_give.append(float(row[6] or 0))
+        ledger.financial_expenses.append(float(row[7] or 0))
+        ledger.financial_gains.append(float(row[8] or 0))
+        ledger.financial_networth.append(float(row[9] or 0))
+
+
+def load_ledger_snapshot(
+    db: Session,
+    user_id: int,
+    portfolio=True,
+    flows: bool = True,
+    initial_cash: bool = True,
+    trades: bool = False,
+    financial: bool = False,
+    equity: bool = False,
+    equity_from: Optional[date] = None,
+    equity_to: Optional[date] = None,
+) -> LedgerSnapshot:
+    """
+    Load the requested tables for one user into a LedgerSnapshot.
+
+    Only narrow column projections are selected; no ORM objects are hydrated.
+    Tables that are not requested stay empty.
+
+    portfolio="latest" loads only the two most recent portfolio rows (all
+    the daily and account summaries need), plus the first row's balance
+    when there is no InitialCash.
+
+    equity reads the materialized DailyEquity series. Users whose series has
+    not been built yet get it computed in memory from Portfolio + flows.
+
+    equity_from / equity_to restrict the equity rows to a date window in SQL
+    (see _load_equity_window).
+
+    load_ledger_snapshot_async loads the same tables concurrently.
+    """
+    ledger = LedgerSnapshot(user_id=user_id)
+
+    if initial_cash:
+        _load_initial_cash(db, ledger)
+
+    if portfolio == "latest":
+        _load_latest_portfolio(db, ledger)
+        if ledger.portfolio_dates and not ledger.has_initial_cash:
+            _load_first_balance(db, ledger)
+    elif portfolio:
+        _load_portfolio(db, ledger)
+
+    if flows:
+        _load_flows(db, ledger)
+
+    if trades:
+        load_ledger_trades(db, ledger)
+
+    if equity:
+        _load_equity(db, ledger, equity_from, equity_to)
+        if not ledger.equity_dates and equity_from is None and equity_to is None:
+            _fill_equity_in_memory(db, ledger, portfolio, flows)
+
+    if financial:
+        _load_financial(db, ledger)
+
+    return ledger
+
+
+async def load_ledger_snapshot_async(
+    db,
+    user_id: int,
+    portfolio=True,
+    flows: bool = True,
+    initial_cash: bool = True,
+    trades: bool = False,
+    financial: bool = False,
+    equity: bool = False,
+    equity_from: Optional[date] = None,
+    equity_to: Optional[date] = None,
+) -> LedgerSnapshot:
+    """
+    load_ledger_snapshot over an AsyncDB (see auth.get_async_db): every
+    table is read at the same time on its own connection, then the two
+    loads that depend on others (the first portfolio balance without
+    InitialCash, the in-memory equity fallback) run after them.
+
+    Same arguments and the same LedgerSnapshot as the sync loader.
+    """
+    ledger = LedgerSnapshot(user_id=user_id)
+
+    loads = []
+    if initial_cash:
+        loads.append(_load_initial_cash)
+    if portfolio == "latest":
+        loads.append(_load_latest_portfolio)
+    elif portfolio:
+        loads.append(_load_portfolio)
+    if flows:
+        loads.append(_load_flows)
+    if trades:
+        loads.append(load_ledger_trades)
+    if equity:
+        loads.append(lambda session, ledger: _load_equity(session, ledger, equity_from, equity_to))
+    if financial:
+        loads.append(_load_financial)
+
+    # Each load fills its own ledger fields, so they can interleave freely.
+    await db.gather(*[(load, ledger) for load in loads])
+
+    if portfolio == "latest" and ledger.portfolio_dates and not ledger.has_initial_cash:
+        await db.run_sync(_load_first_balance, ledger)
+    if equity and not ledger.equity_dates and equity_from is None and equity_to is None:
+        await db.run_sync(_fill_equity_in_memory, ledger, portfolio, flows)
+
+    return ledger
+
+
+def _load_equity_window(
+    db: Session,
+    ledger: LedgerSnapshot,
+    window_from: Optional[date],
+    window_to: Optional[date],
+) -> None:
+    """
+    Load the DailyEquity rows for [window_from, window_to] in two queries:
+
+    1. One aggregate over the user's series: the last entry_date (so the
+       daily fill can run to the window's end even when the next row lies
+       beyond it) and the total net flow (which rebases the Home curve;
+       it is the cumulative_net_flow of the last row).
+    2. The rows inside the window, starting from the last row before
+       window_from so the window's first days can be carried forward.
+
+    Users without a materialized series fall back to computing it in memory
+    and slicing it the same way.
+    """
+    user_id = ledger.user_id
+    net_flow = (
+        DailyEquity.deposits_pre_open
+        + DailyEquity.deposits_after_close
+        - DailyEquity.withdrawals_pre_open
+        - DailyEquity.withdrawals_after_close
+    )
+    last_date, total_net_flow = (
+        db.query(func.max(DailyEquity.entry_date), func.sum(net_flow))
+        .filter(DailyEquity.user_id == user_id)
+        .one()
+    )
+
+    if last_date is None:
+        _load_equity_window_in_memory(db, ledger, window_from, window_to)
+        return
+
+    ledger.equity_window_from = window_from
+    ledger.equity_window_to = last_date if window_to is None else min(window_to, last_date)
+    ledger.equity_total_net_flow = round(float(total_net_flow or 0), 2)
+
+    query = (
+        db.query(DailyEquity.entry_date, *[getattr(DailyEquity, c) for c in EQUITY_COLUMNS])
+        .filter(DailyEquity.user_id == user_id)
+    )
+    if window_from is not None:
+        seed_date = (
+            db.query(func.max(DailyEquity.entry_date))
+            .filter(
+                DailyEquity.user_id == user_id,
+                DailyEquity.entry_date < window_from,
+            )
+            .scalar_subquery()
+        )
+        query = query.filter(DailyEquity.entry_date >= func.coalesce(seed_date, window_from))
+    if window_to is not None:
+        query = query.filter(DailyEquity.entry_date <= window_to)
+
+    for row in query.order_by(DailyEquity.entry_date.asc()).all():
+        _append_equity_row(ledger, row[0], row[1:])
+
+
+def _load_equity_window_in_memory(
+    db: Session,
+    ledger: LedgerSnapshot,
+    window_from: Optional[date],
+    window_to: Optional[date],
+) -> None:
+    portfolio_rows = (
+        db.query(Portfolio.entry_date, Portfolio.balance)
+        .filter(Portfolio.user_id == ledger.user_id)
+        .order_by(Portfolio.entry_date.asc())
+        .all()
+    )
+    if not portfolio_rows:
+        return
+
+    rows = compute_equity_rows(
+        [r[0] for r in portfolio_rows],
+        [float(r[1]) for r in portfolio_rows],
+        load_cash_flow_index(db, ledger.user_id),
+    )
+
+    last_date = rows[-1]["entry_date"]
+    ledger.equity_window_from = window_from
+    ledger.equity_window_to = last_date if window_to is None else min(window_to, last_date)
+    ledger.equity_total_net_flow = rows[-1]["cumulative_net_flow"]
+
+    start = 0
+    if window_from is not None:
+        # Same rows as the SQL path: the last one before the window, then on.
+        dates = [row["entry_date"] for row in rows]
+        start = max(bisect_left(dates, window_from) - 1, 0)
+
+    for row in rows[start:]:
+        if window_to is not None and row["entry_date"] > window_to:
+            break
+        _append_equity_row(ledger, row["entry_date"], [row[c] for c in EQUITY_COLUMNS])
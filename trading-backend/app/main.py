@@ -12,6 +12,10 @@ from .routers.trades import router as trades_router
 from .routers.rules import router as rules_router
 from .routers.financial import router as financial_router
 from .routers.dashboard import router as dashboard_router
+from .routers.dashboard_async import router as dashboard_async_router
+from .routers.metrics import router as metrics_router
+from .instrumentation import QueryTimingMiddleware
+from .database import async_engine
 
 
 app = FastAPI(
@@ -32,8 +36,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Query count and DB time per request (Server-Timing header, GET /metrics)
+app.add_middleware(QueryTimingMiddleware)
+
 # -----------------------------
 # ROUTERS
 # -----------------------------
@@ -45,7 +53,12 @@ app.include_router(transactions_router, prefix="/transactions", tags=["transacti
 app.include_router(trades_router, prefix="/trades", tags=["trades"])
 app.include_router(rules_router, prefix="/rules", tags=["rules"])
 app.include_router(financial_router, prefix="/financial", tags=["financial"])
+# With an async database the async dashboard routes come first and win;
+# the sync ones stay as the fallback.
+if async_engine is not None:
+    app.include_router(dashboard_async_router, tags=["dashboard"])
 app.include_router(dashboard_router, tags=["dashboard"])
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
 
 
 @app.get("/health")
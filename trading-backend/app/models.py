@@ -10,6 +10,7 @@ from sqlalchemy import (
     Enum,
     ForeignKey,
     BigInteger,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import declarative_base, relationship
@@ -74,6 +75,21 @@ class User(Base):
         cascade="all, delete-orphan",
         uselist=False,
     )
+    daily_equity = relationship(
+        "DailyEquity",
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
+    trade_pnl_sketches = relationship(
+        "TradePnlSketch",
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
+    trade_stats = relationship(
+        "TradeStats",
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
 
 
 class Portfolio(Base):
@@ -86,11 +102,79 @@ class Portfolio(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "entry_date", name="uq_portfolio_user_date"),
+        # equity / summary loads read (entry_date, balance) in date order
+        Index("idx_portfolio_user_date_balance", "user_id", "entry_date", "balance"),
     )
 
     user = relationship("User", back_populates="portfolio_entries")
 
 
+class DailyEquity(Base):
+    __tablename__ = "DailyEquity"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("Users.id", ondelete="CASCADE"), nullable=False)
+    entry_date = Column(Date, nullable=False)
+
+    portfolio_close = Column(Numeric(12, 2), nullable=False)
+
+    deposits_pre_open = Column(Numeric(12, 2), nullable=False, default=0)
+    withdrawals_pre_open = Column(Numeric(12, 2), nullable=False, default=0)
+    deposits_after_close = Column(Numeric(12, 2), nullable=False, default=0)
+    withdrawals_after_close = Column(Numeric(12, 2), nullable=False, default=0)
+
+    actual_value = Column(Numeric(12, 2), nullable=False)
+    normalized_value = Column(Numeric(12, 2), nullable=False)
+    cumulative_net_flow = Column(Numeric(12, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "entry_date", name="uq_daily_equity_user_date"),
+    )
+
+    user = relationship("User", back_populates="daily_equity")
+
+
+class TradePnlSketch(Base):
+    __tablename__ = "TradePnlSketch"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("Users.id", ondelete="CASCADE"), nullable=False)
+    bucket = Column(String(10), nullable=False)
+
+    count = Column(Integer, nullable=False, default=0)
+    sketch = Column(Text, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "bucket", name="uq_trade_pnl_sketch_user_bucket"),
+    )
+
+    user = relationship("User", back_populates="trade_pnl_sketches")
+
+
+class TradeStats(Base):
+    __tablename__ = "TradeStats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("Users.id", ondelete="CASCADE"), nullable=False)
+    dimension = Column(String(10), nullable=False)
+    key = Column(String(15), nullable=False, default="")
+
+    count = Column(Integer, nullable=False, default=0)
+    realized = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    sum_win = Column(Numeric(16, 2), nullable=False, default=0)
+    sum_loss = Column(Numeric(16, 2), nullable=False, default=0)
+    hold_count = Column(Integer, nullable=False, default=0)
+    sum_hold_days = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "dimension", "key", name="uq_trade_stats_user_dimension_key"),
+    )
+
+    user = relationship("User", back_populates="trade_stats")
+
+
 class Rules(Base):
     __tablename__ = "Rules"
 
@@ -99,6 +183,10 @@ class Rules(Base):
     entry_date = Column(Date, nullable=False, index=True)
     rule = Column(Text, nullable=True)
 
+    __table_args__ = (
+        Index("idx_rules_user_date", "user_id", "entry_date"),
+    )
+
     user = relationship("User", back_populates="rules")
 
 
@@ -142,6 +230,16 @@ class Trades(Base):
     profit_loss = Column(Numeric(12, 2), nullable=True)
     roi = Column(Numeric(12, 2), nullable=True)
 
+    __table_args__ = (
+        # list_trades order, realized P&L and hold bucket rebuilds (close_date set)
+        Index("idx_trades_user_close_entry", "user_id", "close_date", "entry_date"),
+        # ledger / trade stats scans: every column they read, in id order
+        Index(
+            "idx_trades_user_ledger",
+            "user_id", "id", "symbol", "entry_date", "close_date", "profit_loss",
+        ),
+    )
+
     user = relationship("User", back_populates="trades")
 
 
@@ -167,6 +265,14 @@ class Transactions(Base):
         default="after_close",
     )
 
+    __table_args__ = (
+        # load_cash_flow_index: per-day sums by timing and type, read from the index alone
+        Index(
+            "idx_transactions_user_date_timing_type",
+            "user_id", "transaction_date", "timing", "transaction_type", "amount",
+        ),
+    )
+
     user = relationship("User", back_populates="transactions")
 
 
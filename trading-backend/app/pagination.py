@@ -0,0 +1,116 @@
+# app/pagination.py
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Date, and_, false, or_
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class SortKey:
+    """
+    One column of a list endpoint's sort order.
+
+    value reads the key from a result row (defaults to the attribute of the
+    same name). A None value only works when an earlier key already puts
+    all NULL rows together, like trades' close_date IS NULL key.
+    """
+    expression: Any
+    descending: bool = False
+    value: Optional[Callable] = None
+
+    def read(self, row):
+        if self.value is not None:
+            return self.value(row)
+        return getattr(row, self.expression.key)
+
+    def encode(self, v):
+        return v.isoformat() if isinstance(v, date) else v
+
+    def decode(self, v):
+        # Cursors come from clients: only scalars, and dates as ISO strings.
+        if isinstance(v, (list, dict)):
+            raise ValueError("cursor value is not a scalar")
+        if v is not None and isinstance(getattr(self.expression, "type", None), Date):
+            return date.fromisoformat(v)
+        return v
+
+
+def encode_cursor(keys: List[SortKey], row) -> str:
+    raw = json.dumps([key.encode(key.read(row)) for key in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keys: List[SortKey], cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [key.decode(v) for key, v in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _after(keys: List[SortKey], values: list):
+    """
+    Rows strictly after values in keys order:
+      k1 after v1 OR (k1 = v1 AND (k2 after v2 OR (k2 = v2 AND ...)))
+    """
+    clause = None
+    for key, v in reversed(list(zip(keys, values))):
+        column = key.expression
+        if v is None:
+            after, same = false(), column.is_(None)
+        else:
+            after = column < v if key.descending else column > v
+            same = column == v
+        clause = after if clause is None else or_(after, and_(same, clause))
+    return clause
+
+
+def paginate(
+    query,
+    keys: List[SortKey],
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> list:
+    """
+    Order query by keys and return one page.
+
+    Keyset pagination: the cursor holds the last row's sort values and the
+    next page starts right after them, so every page costs the same
+    index range scan however deep it is. The next page's cursor goes in
+    the X-Next-Cursor header (absent on the last page).
+
+    Without cursor and limit the whole list is returned, as before; a
+    cursor alone pages by DEFAULT_PAGE_SIZE.
+    """
+    query = query.order_by(*[
+        key.expression.desc() if key.descending else key.expression.asc()
+        for key in keys
+    ])
+
+    if cursor is None and limit is None:
+        return query.all()
+
+    if cursor is not None:
+        query = query.filter(_after(keys, decode_cursor(keys, cursor)))
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(keys, rows[-1])
+    return rows
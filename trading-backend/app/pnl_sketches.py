@@ -0,0 +1,342 @@
+# app/pnl_sketches.py
+
+import json
+import math
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import Trades, TradePnlSketch, User
+
+
+# Hold-time buckets (<= 1, 3, 7, 14 days, then longer).
+# searchsorted(HOLD_BUCKET_EDGES, days, "left") is the index into HOLD_BUCKET_ORDER.
+HOLD_BUCKET_ORDER = ["0–1d", "1–3d", "3–7d", "7–14d", "14d+"]
+HOLD_BUCKET_EDGES = np.array([1, 3, 7, 14])
+
+HOLD_BUCKET_PERCENTILES = (
+    ("p10", 0.10),
+    ("p25", 0.25),
+    ("median", 0.50),
+    ("p75", 0.75),
+    ("p90", 0.90),
+)
+
+
+def percentile(sorted_vals, p: float) -> float:
+    """Linear interpolation between the closest ranks of sorted_vals."""
+    if not sorted_vals:
+        return 0.0
+    if len(sorted_vals) == 1:
+        return float(sorted_vals[0])
+
+    idx = (len(sorted_vals) - 1) * p
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    frac = idx - lo
+    return float(sorted_vals[lo]) * (1 - frac) + float(sorted_vals[hi]) * frac
+
+
+def hold_bucket(entry_date: Optional[date], close_date: Optional[date]) -> Optional[str]:
+    if not entry_date or not close_date:
+        return None
+    days = (close_date - entry_date).days
+    return HOLD_BUCKET_ORDER[int(np.searchsorted(HOLD_BUCKET_EDGES, days, side="left"))]
+
+
+def trade_bucket_entry(trade: Trades) -> Optional[tuple]:
+    """(hold bucket, realized P&L) a trade contributes, or None."""
+    if trade.profit_loss is None:
+        return None
+    bucket = hold_bucket(trade.entry_date, trade.close_date)
+    if bucket is None:
+        return None
+    return bucket, float(trade.profit_loss)
+
+
+class PnlSketch:
+    """
+    Quantile sketch for one hold bucket's realized P&L.
+
+    Up to EXACT_LIMIT values every value is kept (sorted), so percentiles
+    are exact. Past that it switches to log-spaced bins (DDSketch): each
+    value is counted in the bin of its magnitude, which bounds the relative
+    error of any percentile by ALPHA. Bins are plain counts, so adding or
+    removing a trade is O(1) and two sketches merge by adding counts.
+    """
+
+    EXACT_LIMIT = 1024
+    ALPHA = 0.005
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+
+    def __init__(self):
+        self.count = 0
+        self.exact: Optional[list] = []
+        self.positive: dict = {}
+        self.negative: dict = {}
+        self.zeros = 0
+
+    @classmethod
+    def exact_from_sorted(cls, values: list) -> "PnlSketch":
+        """An exact sketch over already-sorted values, whatever their count."""
+        sketch = cls()
+        sketch.exact = list(values)
+        sketch.count = len(values)
+        return sketch
+
+    @property
+    def is_exact(self) -> bool:
+        return self.exact is not None
+
+    # --- updates --- #
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if self.exact is not None:
+            insort(self.exact, value)
+            if len(self.exact) > self.EXACT_LIMIT:
+                values, self.exact = self.exact, None
+                for v in values:
+                    self._bin(v, 1)
+            return
+        self._bin(value, 1)
+
+    def remove(self, value: float) -> None:
+        if self.exact is not None:
+            i = bisect_left(self.exact, value)
+            if i == len(self.exact) or self.exact[i] != value:
+                return
+            del self.exact[i]
+        else:
+            self._bin(value, -1)
+        self.count -= 1
+
+    def _bin(self, value: float, delta: int) -> None:
+        if value == 0:
+            self.zeros += delta
+            return
+
+        bins = self.positive if value > 0 else self.negative
+        key = math.ceil(math.log(abs(value)) / math.log(self.GAMMA))
+        bins[key] = bins.get(key, 0) + delta
+        if bins[key] <= 0:
+            del bins[key]
+
+    # --- reads --- #
+
+    def _bin_value(self, key: int) -> float:
+        return 2 * self.GAMMA ** key / (self.GAMMA + 1)
+
+    def _sorted_bins(self) -> list:
+        """[(representative value, count)] in ascending value order."""
+        out = [(-self._bin_value(k), self.negative[k]) for k in sorted(self.negative, reverse=True)]
+        if self.zeros:
+            out.append((0.0, self.zeros))
+        out.extend((self._bin_value(k), self.positive[k]) for k in sorted(self.positive))
+        return out
+
+    def quantiles(self, ps) -> list:
+        """percentile() for each p, read from the sketch."""
+        if self.exact is not None:
+            return [percentile(self.exact, p) for p in ps]
+
+        bins = self._sorted_bins()
+        if not bins:
+            return [0.0 for _ in ps]
+
+        cumulative = np.cumsum([c for _, c in bins])
+        values = [v for v, _ in bins]
+
+        def value_at(rank: int) -> float:
+            return values[int(np.searchsorted(cumulative, rank, side="right"))]
+
+        n = self.count
+        out = []
+        for p in ps:
+            if n == 1:
+                out.append(value_at(0))
+                continue
+            idx = (n - 1) * p
+            lo = int(idx)
+            hi = min(lo + 1, n - 1)
+            frac = idx - lo
+            out.append(value_at(lo) * (1 - frac) + value_at(hi) * frac)
+        return out
+
+    # --- storage --- #
+
+    def to_json(self) -> str:
+        if self.exact is not None:
+            return json.dumps({"exact": self.exact})
+        return json.dumps({
+            "alpha": self.ALPHA,
+            "positive": self.positive,
+            "negative": self.negative,
+            "zeros": self.zeros,
+        })
+
+    @classmethod
+    def from_json(cls, count: int, raw: Optional[str]) -> "PnlSketch":
+        sketch = cls()
+        data = json.loads(raw) if raw else {"exact": []}
+        sketch.count = count
+        if "exact" in data:
+            sketch.exact = list(data["exact"])
+        else:
+            sketch.exact = None
+            sketch.positive = {int(k): v for k, v in data["positive"].items()}
+            sketch.negative = {int(k): v for k, v in data["negative"].items()}
+            sketch.zeros = data["zeros"]
+        return sketch
+
+
+def hold_bucket_summary(bucket: str, sketch: PnlSketch) -> dict:
+    """One pnl_by_hold_buckets entry."""
+    if sketch.count == 0:
+        return {"bucket": bucket, "count": 0, **{name: 0.0 for name, _ in HOLD_BUCKET_PERCENTILES}}
+
+    values = sketch.quantiles([p for _, p in HOLD_BUCKET_PERCENTILES])
+    return {
+        "bucket": bucket,
+        "count": sketch.count,
+        **{name: round(v, 2) for (name, _), v in zip(HOLD_BUCKET_PERCENTILES, values)},
+    }
+
+
+# -----------------------------
+# Persistence
+# -----------------------------
+
+def rebuild_pnl_sketches(db: Session, user_id: int) -> None:
+    """
+    Recompute every hold bucket sketch for one user from their trades.
+    Like refresh_daily_equity, call before db.commit().
+    """
+    db.flush()
+
+    db.query(TradePnlSketch).filter(TradePnlSketch.user_id == user_id).delete(
+        synchronize_session=False
+    )
+
+    sketches = {bucket: PnlSketch() for bucket in HOLD_BUCKET_ORDER}
+    rows = (
+        db.query(Trades.entry_date, Trades.close_date, Trades.profit_loss)
+        .filter(
+            Trades.user_id == user_id,
+            Trades.profit_loss.isnot(None),
+            Trades.close_date.isnot(None),
+        )
+        .order_by(Trades.id.asc())
+        .all()
+    )
+    for entry_date, close_date, profit_loss in rows:
+        bucket = hold_bucket(entry_date, close_date)
+        if bucket is not None:
+            sketches[bucket].add(float(profit_loss))
+
+    db.bulk_insert_mappings(TradePnlSketch, [
+        {
+            "user_id": user_id,
+            "bucket": bucket,
+            "count": sketch.count,
+            "sketch": sketch.to_json(),
+        }
+        for bucket, sketch in sketches.items()
+    ])
+
+
+def apply_trade_change(
+    db: Session,
+    user_id: int,
+    old_entries: list,
+    new_entries: list,
+) -> None:
+    """
+    Move trades' contributions between hold bucket sketches.
+
+    old_entries / new_entries are trade_bucket_entry() of the written trades
+    before and after the write (None entries, for open trades, are skipped;
+    [] for creates / deletes). Call before db.commit(). Users without
+    sketches yet get a full rebuild instead; so does a bucket that has
+    shrunk back under EXACT_LIMIT, to become exact again.
+    """
+    changes = {}
+    for entries, op in ((old_entries, PnlSketch.remove), (new_entries, PnlSketch.add)):
+        for entry in entries:
+            if entry is not None:
+                bucket, value = entry
+                changes.setdefault(bucket, []).append((op, value))
+
+    if old_entries == new_entries or not changes:
+        return
+
+    # Per-user writer lock, as in apply_trade_stats_change: concurrent first
+    # writes would otherwise both rebuild and clash on (user_id, bucket).
+    db.query(User.id).filter(User.id == user_id).with_for_update().first()
+
+    rows = {
+        row.bucket: row
+        for row in (
+            db.query(TradePnlSketch)
+            .filter(TradePnlSketch.user_id == user_id)
+            .with_for_update()
+            .all()
+        )
+    }
+    if len(rows) != len(HOLD_BUCKET_ORDER):
+        rebuild_pnl_sketches(db, user_id)
+        return
+
+    # Removals before additions, one decode / encode per bucket.
+    for bucket, ops in changes.items():
+        row = rows[bucket]
+        sketch = PnlSketch.from_json(row.count, row.sketch)
+        for op, value in ops:
+            op(sketch, value)
+
+        if not sketch.is_exact and sketch.count <= PnlSketch.EXACT_LIMIT:
+            rebuild_pnl_sketches(db, user_id)
+            return
+
+        row.count = sketch.count
+        row.sketch = sketch.to_json()
+
+
+def load_hold_bucket_stats(db: Session, user_id: int) -> Optional[list]:
+    """
+    pnl_by_hold_buckets read from the stored sketches (five small rows),
+    or None when the user has none yet.
+    """
+    rows = {
+        bucket: (count, raw)
+        for bucket, count, raw in (
+            db.query(TradePnlSketch.bucket, TradePnlSketch.count, TradePnlSketch.sketch)
+            .filter(TradePnlSketch.user_id == user_id)
+            .all()
+        )
+    }
+    if len(rows) != len(HOLD_BUCKET_ORDER):
+        return None
+
+    return [
+        hold_bucket_summary(bucket, PnlSketch.from_json(*rows[bucket]))
+        for bucket in HOLD_BUCKET_ORDER
+    ]
+
+
+if __name__ == "__main__":
+    # Backfill: python -m app.pnl_sketches
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user_ids = [r[0] for r in db.query(Trades.user_id).distinct().all()]
+        for uid in user_ids:
+            rebuild_pnl_sketches(db, uid)
+            db.commit()
+            print(f"user {uid}: hold bucket sketches rebuilt")
+    finally:
+        db.close()
@@ -1,13 +1,46 @@
 # app/routers/dashboard.py
 
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from ..database import get_db_connection
-from ..auth import get_current_user
-from ..models import User, Portfolio, Trades, Transactions, Financial, InitialCash
+from ..auth import get_current_user, get_read_db
+from ..cache import (
+    MSGPACK_MEDIA_TYPE,
+    cached_response,
+    render_msgpack,
+)
+from ..curves import (
+    NAT_DAYS,
+    Curve,
+    deviation_bands,
+    downsample_indices,
+    drawdown_profile,
+    linear_regression,
+    round2,
+    to_datetime64,
+    weekly_pnl,
+)
+from ..ledger import LedgerSnapshot, load_daily_summary_snapshot, load_ledger_snapshot
+from ..models import User
+from ..pnl_sketches import (
+    HOLD_BUCKET_EDGES,
+    HOLD_BUCKET_ORDER,
+    PnlSketch,
+    hold_bucket_summary,
+    load_hold_bucket_stats,
+)
+from ..trade_stats import (
+    DIMENSION_ALL,
+    DIMENSION_SYMBOL,
+    DIMENSION_WEEKDAY,
+    WEEKDAY_NAMES,
+    load_trade_stats,
+    normalize_symbol,
+)
 
 router = APIRouter()
 
@@ -17,28 +50,21 @@ router = APIRouter()
 # =========================================================
 
 def _sum_transactions_on_date(
-    db: Session,
-    user_id: int,
+    flow_index: dict,
     txn_type: str,
     txn_date: date,
     timing: str | None = None,
 ) -> float:
-    q = (
-        db.query(func.sum(Transactions.amount))
-        .filter(
-            Transactions.user_id == user_id,
-            Transactions.transaction_type == txn_type,
-            Transactions.transaction_date == txn_date,
-        )
-    )
-
     if timing is not None:
-        q = q.filter(Transactions.timing == timing)
+        return float(flow_index.get((txn_date, timing, txn_type), 0.0))
 
-    return float(q.scalar() or 0)
+    return float(
+        flow_index.get((txn_date, "pre_open", txn_type), 0.0)
+        + flow_index.get((txn_date, "after_close", txn_type), 0.0)
+    )
 
 
-def _prepend_initial_cash_anchor(points, initial_cash_row):
+def _prepend_initial_cash_anchor(curve: Curve, ledger: LedgerSnapshot) -> Curve:
     """
     Add a synthetic starting point so the chart can show initial cash separately
     from the first same-day portfolio close.
@@ -48,40 +74,37 @@ def _prepend_initial_cash_anchor(points, initial_cash_row):
       previous day with initial_cash value.
     - If first portfolio point is after the initial cash date, prepend the
       actual initial cash date.
-    - Otherwise return points unchanged.
+    - Otherwise return the curve unchanged.
     """
-    if not points or not initial_cash_row:
-        return points
+    if not len(curve) or not ledger.has_initial_cash:
+        return curve
 
-    initial_date = initial_cash_row.entry_date
-    initial_value = round(float(initial_cash_row.initial_cash), 2)
+    initial_date = ledger.initial_cash_date
+    initial_value = round(float(ledger.initial_cash), 2)
 
-    first_date = points[0]["date"]
-    first_value = round(float(points[0]["value"]), 2)
+    first_date = curve.first_date
+    first_value = round(float(curve.values[0]), 2)
 
     if first_date == initial_date and first_value == initial_value:
-        return points
+        return curve
 
     if first_date == initial_date:
         anchor_date = initial_date - timedelta(days=1)
     elif first_date > initial_date:
         anchor_date = initial_date
     else:
-        return points
+        return curve
 
-    # anchor = {"date": anchor_date, "value": initial_value}
-    anchor = {
-        "date": anchor_date,
+    return curve.prepend(anchor_date, {
         "value": initial_value,
         "actual_value": initial_value,
         "portfolio_close": initial_value,
         "deposits": 0.0,
         "withdrawals": 0.0,
         "net_flow": 0.0,
-    }
-    return [anchor] + points
+    })
 
-def _prepend_home_initial_cash_anchor(points, initial_cash_row):
+def _prepend_home_initial_cash_anchor(curve: Curve, ledger: LedgerSnapshot) -> Curve:
     """
     Home chart version of the initial cash anchor.
 
@@ -95,38 +118,37 @@ def _prepend_home_initial_cash_anchor(points, initial_cash_row):
       regular anchor would be 550, then next point may be 50.
       home anchor should be 50 so the chart does not show a fake drop.
     """
-    if not points or not initial_cash_row:
-        return points
+    if not len(curve) or not ledger.has_initial_cash:
+        return curve
 
-    initial_date = initial_cash_row.entry_date
-    initial_value = round(float(initial_cash_row.initial_cash), 2)
+    initial_date = ledger.initial_cash_date
+    initial_value = round(float(ledger.initial_cash), 2)
 
-    first_date = points[0]["date"]
+    first_date = curve.first_date
 
     if first_date == initial_date:
         anchor_date = initial_date - timedelta(days=1)
     elif first_date > initial_date:
         anchor_date = initial_date
     else:
-        return points
+        return curve
 
-    total_future_net_flow = sum(float(p.get("net_flow", 0) or 0) for p in points)
+    total_future_net_flow = ledger.equity_total_net_flow
+    if total_future_net_flow is None:
+        total_future_net_flow = sum(curve.columns["net_flow"].tolist())
     adjusted_initial_value = round(initial_value + total_future_net_flow, 2)
 
-    anchor = {
-        "date": anchor_date,
+    return curve.prepend(anchor_date, {
         "value": adjusted_initial_value,
         "actual_value": adjusted_initial_value,
         "portfolio_close": initial_value,
         "deposits": 0.0,
         "withdrawals": 0.0,
         "net_flow": 0.0,
-    }
-
-    return [anchor] + points
+    })
 
 
-def _cash_flows_on_date(db: Session, user_id: int, txn_date: date) -> tuple[float, float]:
+def _cash_flows_on_date(flow_index: dict, txn_date: date) -> tuple[float, float]:
     """
     Returns all normal cash movement on a specific date.
 
@@ -138,16 +160,14 @@ def _cash_flows_on_date(db: Session, user_id: int, txn_date: date) -> tuple[floa
     - Do not count initial cash as a normal deposit here.
     """
     deposits = _sum_transactions_on_date(
-        db=db,
-        user_id=user_id,
+        flow_index=flow_index,
         txn_type="deposit",
         txn_date=txn_date,
         timing=None,
     )
 
     withdrawals = _sum_transactions_on_date(
-        db=db,
-        user_id=user_id,
+        flow_index=flow_index,
         txn_type="withdrawal",
         txn_date=txn_date,
         timing=None,
@@ -156,8 +176,7 @@ def _cash_flows_on_date(db: Session, user_id: int, txn_date: date) -> tuple[floa
     return float(deposits), float(withdrawals)
 
 def _cash_flows_on_date_by_timing(
-    db: Session,
-    user_id: int,
+    flow_index: dict,
     txn_date: date,
     timing: str,
 ) -> tuple[float, float]:
@@ -169,16 +188,14 @@ def _cash_flows_on_date_by_timing(
     - after_close: cash moved after the trading close
     """
     deposits = _sum_transactions_on_date(
-        db=db,
-        user_id=user_id,
+        flow_index=flow_index,
         txn_type="deposit",
         txn_date=txn_date,
         timing=timing,
     )
 
     withdrawals = _sum_transactions_on_date(
-        db=db,
-        user_id=user_id,
+        flow_index=flow_index,
         txn_type="withdrawal",
         txn_date=txn_date,
         timing=timing,
@@ -186,7 +203,7 @@ def _cash_flows_on_date_by_timing(
 
     return float(deposits), float(withdrawals)
 
-def _actual_equity_for_entry(db: Session, user_id: int, portfolio_entry) -> float:
+def _actual_equity_for_entry(flow_index: dict, entry_date: date, balance: float) -> float:
     """
     Actual broker/FFA account value after the close for this portfolio date.
 
@@ -197,18 +214,43 @@ def _actual_equity_for_entry(db: Session, user_id: int, portfolio_entry) -> floa
     - pre_open deposits/withdrawals are already reflected in Portfolio.balance
     - after_close deposits/withdrawals must be applied after Portfolio.balance
     """
-    balance = float(portfolio_entry.balance)
+    balance = float(balance)
 
     deposits_after_close, withdrawals_after_close = _cash_flows_on_date_by_timing(
-        db=db,
-        user_id=user_id,
-        txn_date=portfolio_entry.entry_date,
+        flow_index=flow_index,
+        txn_date=entry_date,
         timing="after_close",
     )
 
     return balance + deposits_after_close - withdrawals_after_close
 
-def _build_actual_equity_points(db: Session, user_id: int, portfolio_entries):
+def _equity_curve(ledger: LedgerSnapshot, values) -> Curve:
+    """
+    Chart curve over the materialized DailyEquity rows, plotting values.
+    """
+    deposits_pre_open = np.asarray(ledger.equity_deposits_pre_open, dtype=np.float64)
+    withdrawals_pre_open = np.asarray(ledger.equity_withdrawals_pre_open, dtype=np.float64)
+    deposits_after_close = np.asarray(ledger.equity_deposits_after_close, dtype=np.float64)
+    withdrawals_after_close = np.asarray(ledger.equity_withdrawals_after_close, dtype=np.float64)
+
+    pre_open_net_flow = deposits_pre_open - withdrawals_pre_open
+    after_close_net_flow = deposits_after_close - withdrawals_after_close
+
+    value = round2(values)
+
+    return Curve(to_datetime64(ledger.equity_dates), {
+        "value": value,
+        "actual_value": value,
+        "portfolio_close": round2(ledger.equity_portfolio_close),
+        "deposits": round2(deposits_pre_open + deposits_after_close),
+        "withdrawals": round2(withdrawals_pre_open + withdrawals_after_close),
+        "pre_open_net_flow": round2(pre_open_net_flow),
+        "after_close_net_flow": round2(after_close_net_flow),
+        "net_flow": round2(pre_open_net_flow + after_close_net_flow),
+    })
+
+
+def _build_actual_equity_curve(ledger: LedgerSnapshot) -> Curve:
     """
     Raw actual account-value curve by date.
 
@@ -219,45 +261,9 @@ def _build_actual_equity_points(db: Session, user_id: int, portfolio_entries):
     - Portfolio.balance already includes pre_open flows.
     - Apply after_close flows to get true end-of-day account value.
     """
-    points = []
+    return _equity_curve(ledger, ledger.equity_actual)
 
-    for p in portfolio_entries:
-        deposits_pre_open, withdrawals_pre_open = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
-            txn_date=p.entry_date,
-            timing="pre_open",
-        )
-
-        deposits_after_close, withdrawals_after_close = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
-            txn_date=p.entry_date,
-            timing="after_close",
-        )
-
-        deposits_total = deposits_pre_open + deposits_after_close
-        withdrawals_total = withdrawals_pre_open + withdrawals_after_close
-
-        portfolio_close = float(p.balance)
-        actual_equity = portfolio_close + deposits_after_close - withdrawals_after_close
-        net_flow = deposits_total - withdrawals_total
-
-        points.append({
-            "date": p.entry_date,
-            "value": round(actual_equity, 2),
-            "actual_value": round(actual_equity, 2),
-            "portfolio_close": round(portfolio_close, 2),
-            "deposits": round(deposits_total, 2),
-            "withdrawals": round(withdrawals_total, 2),
-            "pre_open_net_flow": round(deposits_pre_open - withdrawals_pre_open, 2),
-            "after_close_net_flow": round(deposits_after_close - withdrawals_after_close, 2),
-            "net_flow": round(net_flow, 2),
-        })
-
-    return points
-
-def _build_home_equity_points(db: Session, user_id: int, portfolio_entries):
+def _build_home_equity_curve(ledger: LedgerSnapshot) -> Curve:
     """
     Broker-style Home equity curve.
 
@@ -270,74 +276,24 @@ def _build_home_equity_points(db: Session, user_id: int, portfolio_entries):
     - pre_open flows are already inside that day's Portfolio.balance.
     - after_close flows are applied to that same day's displayed account value.
     - future cash flows rebase earlier points so transfers don't look like PnL.
-    """
-    if not portfolio_entries:
-        return []
-
-    base_points = []
 
-    for p in portfolio_entries:
-        deposits_pre_open, withdrawals_pre_open = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
-            txn_date=p.entry_date,
-            timing="pre_open",
-        )
-
-        deposits_after_close, withdrawals_after_close = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
-            txn_date=p.entry_date,
-            timing="after_close",
-        )
-
-        portfolio_close = float(p.balance)
-
-        pre_open_net_flow = deposits_pre_open - withdrawals_pre_open
-        after_close_net_flow = deposits_after_close - withdrawals_after_close
-        total_net_flow = pre_open_net_flow + after_close_net_flow
-
-        base_points.append({
-            "date": p.entry_date,
-            "portfolio_close": round(portfolio_close, 2),
-            "deposits": round(deposits_pre_open + deposits_after_close, 2),
-            "withdrawals": round(withdrawals_pre_open + withdrawals_after_close, 2),
-            "pre_open_net_flow": round(pre_open_net_flow, 2),
-            "after_close_net_flow": round(after_close_net_flow, 2),
-            "net_flow": round(total_net_flow, 2),
-        })
-
-    adjusted_points = []
-    future_net_flow_after_this_date = 0.0
-
-    for point in reversed(base_points):
-        portfolio_close = float(point["portfolio_close"])
-        after_close_net_flow = float(point["after_close_net_flow"])
-
-        adjusted_value = (
-            portfolio_close
-            + after_close_net_flow
-            + future_net_flow_after_this_date
-        )
+    The future net flow after a date is total_net_flow - cumulative_net_flow,
+    so the rebased value is simply normalized_value + total_net_flow.
+    """
+    if not ledger.equity_dates:
+        return Curve(to_datetime64([]))
 
-        adjusted_points.append({
-            "date": point["date"],
-            "value": round(adjusted_value, 2),
-            "actual_value": round(adjusted_value, 2),
-            "portfolio_close": point["portfolio_close"],
-            "deposits": point["deposits"],
-            "withdrawals": point["withdrawals"],
-            "pre_open_net_flow": point["pre_open_net_flow"],
-            "after_close_net_flow": point["after_close_net_flow"],
-            "net_flow": point["net_flow"],
-        })
+    total_net_flow = ledger.equity_total_net_flow
+    if total_net_flow is None:
+        total_net_flow = ledger.equity_cumulative_net_flow[-1]
 
-        future_net_flow_after_this_date += float(point["net_flow"])
+    return _equity_curve(
+        ledger,
+        np.asarray(ledger.equity_normalized, dtype=np.float64) + total_net_flow,
+    )
 
-    adjusted_points.reverse()
-    return adjusted_points
 
-def compute_daily_trading_summary(db: Session, user_id: int, portfolio_entries):
+def compute_daily_trading_summary(ledger: LedgerSnapshot):
     """
     Daily trading performance for PortfolioSummary (normalized for cash flows):
 
@@ -355,78 +311,71 @@ def compute_daily_trading_summary(db: Session, user_id: int, portfolio_entries):
     - If only one portfolio row exists and InitialCash exists, use InitialCash
       as the day's open and the portfolio balance as the day's close.
     """
-    if not portfolio_entries:
+    if not ledger.portfolio_dates:
         return None
 
-    latest = portfolio_entries[-1]
+    flow_index = ledger.flow_index
+    latest_id = ledger.portfolio_ids[-1]
+    latest_date = ledger.portfolio_dates[-1]
 
-    if len(portfolio_entries) == 1:
-        initial_cash_row = (
-            db.query(InitialCash)
-            .filter(InitialCash.user_id == user_id)
-            .first()
-        )
+    if len(ledger.portfolio_dates) == 1:
+        close_equity = float(ledger.portfolio_balances[-1])
 
-        close_equity = float(latest.balance)
-
-        if initial_cash_row:
-            opening_balance = float(initial_cash_row.initial_cash)
+        if ledger.has_initial_cash:
+            opening_balance = float(ledger.initial_cash)
             pnl = close_equity - opening_balance
             roi = (pnl / opening_balance) * 100 if opening_balance != 0 else 0
 
             return {
-                "id": latest.id,
+                "id": latest_id,
                 "open": round(opening_balance, 2),
                 "close": round(close_equity, 2),
                 "pnl": round(pnl, 2),
                 "roi": round(roi, 2),
-                "date": latest.entry_date.strftime("%m/%d/%Y"),
+                "date": latest_date.strftime("%m/%d/%Y"),
             }
 
         return {
-            "id": latest.id,
+            "id": latest_id,
             "open": round(close_equity, 2),
             "close": round(close_equity, 2),
             "pnl": 0.0,
             "roi": 0.0,
-            "date": latest.entry_date.strftime("%m/%d/%Y"),
+            "date": latest_date.strftime("%m/%d/%Y"),
         }
 
-    previous = portfolio_entries[-2]
-
-    prev_balance = float(previous.balance)
-    prev_date = previous.entry_date
+    prev_balance = float(ledger.portfolio_balances[-2])
+    prev_date = ledger.portfolio_dates[-2]
 
     deposits_on_prev = _sum_transactions_on_date(
-        db, user_id, "deposit", prev_date, timing="after_close"
+        flow_index, "deposit", prev_date, timing="after_close"
     )
     withdrawals_on_prev = _sum_transactions_on_date(
-        db, user_id, "withdrawal", prev_date, timing="after_close"
+        flow_index, "withdrawal", prev_date, timing="after_close"
     )
     net_flow_prev = deposits_on_prev - withdrawals_on_prev
 
-    latest_date = latest.entry_date
     deposits_on_latest = _sum_transactions_on_date(
-        db, user_id, "deposit", latest_date, timing="pre_open"
+        flow_index, "deposit", latest_date, timing="pre_open"
     )
     withdrawals_on_latest = _sum_transactions_on_date(
-        db, user_id, "withdrawal", latest_date, timing="pre_open"
+        flow_index, "withdrawal", latest_date, timing="pre_open"
     )
     net_flow_latest = deposits_on_latest - withdrawals_on_latest
 
     normalized_open = prev_balance + net_flow_prev + net_flow_latest
 
-    close_equity = float(latest.balance)
+    close_equity = float(ledger.portfolio_balances[-1])
     pnl = close_equity - normalized_open
     roi = (pnl / normalized_open) * 100 if normalized_open != 0 else 0
 
     return {
-        "id": latest.id,
+        "id": latest_id,
         "open": round(normalized_open, 2),
         "close": round(close_equity, 2),
         "pnl": round(pnl, 2),
         "roi": round(roi, 2),
-        "date": latest.entry_date.strftime("%m/%d/%Y"),
+        "date": latest_date.strftime("%m/%d/%Y"),
 
         # Optional debug fields
         "prev_close_equity": round(prev_balance, 2),
@@ -510,7 +459,7 @@ def compute_daily_trading_summary(db: Session, user_id: int, portfolio_entries):
 #         "latest_date_withdrawals": round(withdrawals_on_latest, 2),
 #     }
 
-def compute_account_summary(db: Session, user_id: int, portfolio_entries, deposits, withdrawals):
+def compute_account_summary(ledger: LedgerSnapshot):
     """
     Lifetime account metrics used by AccountKpi.jsx.
 
@@ -521,13 +470,7 @@ def compute_account_summary(db: Session, user_id: int, portfolio_entries, deposi
     - current_equity is the actual FFA/broker value.
     - total_value adds withdrawals back so withdrawals do not reduce full trading progress.
     """
-    initial_cash_row = (
-        db.query(InitialCash)
-        .filter(InitialCash.user_id == user_id)
-        .first()
-    )
-
-    if not portfolio_entries and not initial_cash_row:
+    if not ledger.portfolio_dates and not ledger.has_initial_cash:
         return {
             "initial_capital": 0.0,
             "invested_capital": 0.0,
@@ -545,13 +488,13 @@ def compute_account_summary(db: Session, user_id: int, portfolio_entries, deposi
         }
 
     principal = (
-        float(initial_cash_row.initial_cash)
-        if initial_cash_row
-        else float(portfolio_entries[0].balance)
+        float(ledger.initial_cash)
+        if ledger.has_initial_cash
+        else float(ledger.portfolio_first_balance)
     )
 
-    total_deposits = float(deposits or 0)
-    total_withdrawals = float(withdrawals or 0)
+    total_deposits = float(ledger.total_deposits)
+    total_withdrawals = float(ledger.total_withdrawals)
 
     invested_capital = principal + total_deposits
 
@@ -561,21 +504,18 @@ def compute_account_summary(db: Session, user_id: int, portfolio_entries, deposi
     withdrawals_on_latest = 0.0
     current_equity = principal
 
-    if portfolio_entries:
-        latest = portfolio_entries[-1]
-        latest_balance = float(latest.balance)
-        latest_date = latest.entry_date
+    if ledger.portfolio_dates:
+        latest_balance = float(ledger.portfolio_balances[-1])
+        latest_date = ledger.portfolio_dates[-1]
 
         deposits_pre_open, withdrawals_pre_open = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
+            flow_index=ledger.flow_index,
             txn_date=latest_date,
             timing="pre_open",
         )
 
         deposits_after_close, withdrawals_after_close = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
+            flow_index=ledger.flow_index,
             txn_date=latest_date,
             timing="after_close",
         )
@@ -614,65 +554,7 @@ def compute_account_summary(db: Session, user_id: int, portfolio_entries, deposi
     }
 
 
-def _fill_daily_curve(points):
-    """
-    Given sparse points sorted asc, fill missing days by carrying forward
-    the latest full point.
-
-    Important:
-    Preserve extra fields such as:
-    - actual_value
-    - portfolio_close
-    - deposits
-    - withdrawals
-    - net_flow
-
-    This lets the Home chart plot one value while showing richer tooltip context.
-    """
-    if not points:
-        return []
-
-    start = points[0]["date"]
-    end = points[-1]["date"]
-
-    filled = []
-    date_pointer = start
-    index = 0
-
-    last_point = dict(points[0])
-
-    while date_pointer <= end:
-        if index < len(points) and points[index]["date"] == date_pointer:
-            last_point = dict(points[index])
-            index += 1
-
-        carried_point = dict(last_point)
-        carried_point["date"] = date_pointer
-
-        if "value" in carried_point:
-            carried_point["value"] = round(float(carried_point["value"]), 2)
-
-        if "actual_value" in carried_point:
-            carried_point["actual_value"] = round(float(carried_point["actual_value"]), 2)
-
-        if "portfolio_close" in carried_point:
-            carried_point["portfolio_close"] = round(float(carried_point["portfolio_close"]), 2)
-
-        if "deposits" in carried_point:
-            carried_point["deposits"] = round(float(carried_point["deposits"]), 2)
-
-        if "withdrawals" in carried_point:
-            carried_point["withdrawals"] = round(float(carried_point["withdrawals"]), 2)
-
-        if "net_flow" in carried_point:
-            carried_point["net_flow"] = round(float(carried_point["net_flow"]), 2)
-
-        filled.append(carried_point)
-        date_pointer += timedelta(days=1)
-
-    return filled
-
-def _build_normalized_equity_points(db: Session, user_id: int, portfolio_entries):
+def _build_normalized_equity_curve(ledger: LedgerSnapshot) -> Curve:
     """
     Build a normalized performance curve for Profile.
 
@@ -684,257 +566,244 @@ def _build_normalized_equity_points(db: Session, user_id: int, portfolio_entries
     Portfolio.balance already includes pre_open flows.
     Actual end-of-day equity only needs after_close flows applied.
     """
-    if not portfolio_entries:
-        return []
-
-    normalized = []
-
-    cumulative_deposits = 0.0
-    cumulative_withdrawals = 0.0
-
-    for p in portfolio_entries:
-        txn_date = p.entry_date
-
-        deposits_pre_open, withdrawals_pre_open = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
-            txn_date=txn_date,
-            timing="pre_open",
-        )
-
-        deposits_after_close, withdrawals_after_close = _cash_flows_on_date_by_timing(
-            db=db,
-            user_id=user_id,
-            txn_date=txn_date,
-            timing="after_close",
-        )
-
-        deposits_on_date = deposits_pre_open + deposits_after_close
-        withdrawals_on_date = withdrawals_pre_open + withdrawals_after_close
-
-        cumulative_deposits += deposits_on_date
-        cumulative_withdrawals += withdrawals_on_date
+    return Curve(
+        to_datetime64(ledger.equity_dates),
+        {"value": round2(ledger.equity_normalized)},
+    )
 
-        actual_equity = (
-            float(p.balance)
-            + deposits_after_close
-            - withdrawals_after_close
-        )
 
-        normalized_equity = (
-            actual_equity
-            + cumulative_withdrawals
-            - cumulative_deposits
-        )
-
-        normalized.append({
-            "date": txn_date,
-            "value": round(normalized_equity, 2),
-        })
+def _sequential_sum(values: np.ndarray) -> float:
+    """Left-to-right float sum (same result as Python's sum())."""
+    return float(np.cumsum(values)[-1]) if len(values) else 0
 
-    return normalized
 
-def _linear_regression_line(points):
+def _first_seen_groups(keys: np.ndarray):
     """
-    points: [{date, value}] sorted asc
-    Returns same-length [{date, value}] as the best-fit straight line.
+    (unique keys in order of first appearance, group number per element),
+    so grouped results come out in the order a one-pass dict would have.
     """
-    if not points:
-        return []
+    uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniq[order], rank[inverse.reshape(-1)]
 
-    n = len(points)
-    ys = [float(p["value"]) for p in points]
-    xs = list(range(n))
-
-    x_mean = sum(xs) / n
-    y_mean = sum(ys) / n
-
-    denom = sum((x - x_mean) ** 2 for x in xs)
-    if denom == 0:
-        return [{"date": points[i]["date"], "value": round(y_mean, 2)} for i in range(n)]
-
-    slope = sum((xs[i] - x_mean) * (ys[i] - y_mean) for i in range(n)) / denom
-    intercept = y_mean - slope * x_mean
-
-    line = []
-    for i in range(n):
-        yhat = intercept + slope * xs[i]
-        line.append({"date": points[i]["date"], "value": round(float(yhat), 2)})
-
-    return line
 
+# =========================================================
+# MAIN DASHBOARD ENDPOINT
+# =========================================================
 
-def _build_equity_deviation_bands(equity_points, ideal_points):
+def compute_dashboard(ledger: LedgerSnapshot, trade_stats: Optional[dict] = None):
     """
-    Returns:
-      above: max(equity, ideal)
-      below: min(equity, ideal)
-    """
-    if not equity_points or not ideal_points:
-        return {"above": [], "below": []}
-
-    n = min(len(equity_points), len(ideal_points))
-    above = []
-    below = []
+    Home page payload: account KPIs, daily summary, home equity curve,
+    trade performance and the latest financial snapshot.
 
-    for i in range(n):
-        eq = float(equity_points[i]["value"])
-        idv = float(ideal_points[i]["value"])
-        above.append({"date": equity_points[i]["date"], "value": round(max(eq, idv), 2)})
-        below.append({"date": equity_points[i]["date"], "value": round(min(eq, idv), 2)})
-
-    return {"above": above, "below": below}
+    trade_stats is the stored running aggregates (load_trade_stats); without
+    them performance is computed from the ledger's trades.
+    """
+    portfolio_daily_summary = compute_daily_trading_summary(ledger)
+    account_summary = compute_account_summary(ledger)
 
+    equity_curve = _build_home_equity_curve(ledger)
+    equity_curve = _prepend_home_initial_cash_anchor(equity_curve, ledger).to_points()
 
-def _percentile(sorted_vals, p: float) -> float:
-    if not sorted_vals:
-        return 0.0
-    if len(sorted_vals) == 1:
-        return float(sorted_vals[0])
+    if trade_stats is None:
+        trade_stats = ledger_trade_stats(ledger)
+    totals = trade_stats[DIMENSION_ALL]
 
-    idx = (len(sorted_vals) - 1) * p
-    lo = int(idx)
-    hi = min(lo + 1, len(sorted_vals) - 1)
-    frac = idx - lo
-    return float(sorted_vals[lo]) * (1 - frac) + float(sorted_vals[hi]) * frac
+    performance = {
+        "total_trades": totals["realized"],
+        "win_rate": round(
+            (totals["wins"] / totals["realized"] * 100)
+            if totals["realized"] else 0,
+            2,
+        ),
+        "total_realized_pnl": round(totals["total_pnl"], 2),
+    }
 
+    financial_summary = None
+    if ledger.financial_dates:
+        financial_summary = {
+            "networth": ledger.financial_networth[-1],
+            "income": ledger.financial_income[-1],
+            "expenses": ledger.financial_expenses[-1],
+            "gains": ledger.financial_gains[-1],
+        }
 
-def _hold_bucket_days(days: float) -> str:
-    if days <= 1:
-        return "0–1d"
-    if days <= 3:
-        return "1–3d"
-    if days <= 7:
-        return "3–7d"
-    if days <= 14:
-        return "7–14d"
-    return "14d+"
+    return {
+        "account": account_summary,
+        "portfolio_daily_summary": portfolio_daily_summary,
+        "equity_curve": equity_curve,
+        "performance": performance,
+        "financial_summary": financial_summary,
+    }
 
 
-# =========================================================
-# MAIN DASHBOARD ENDPOINT
-# =========================================================
-
 @router.get("/dashboard")
 def dashboard(
-    db: Session = Depends(get_db_connection),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    user_id = current_user.id
+    def compute():
+        trade_stats = load_trade_stats(db, current_user.id)
+        ledger = load_ledger_snapshot(
+            db,
+            current_user.id,
+            portfolio="latest",
+            trades=trade_stats is None,
+            financial=True,
+            equity=True,
+        )
 
-    portfolio_entries = (
-        db.query(Portfolio)
-        .filter(Portfolio.user_id == user_id)
-        .order_by(Portfolio.entry_date.asc())
-        .all()
-    )
+        if not ledger.portfolio_dates:
+            raise HTTPException(400, "No portfolio data available.")
 
-    if not portfolio_entries:
-        raise HTTPException(400, "No portfolio data available.")
+        return compute_dashboard(ledger, trade_stats)
 
-    deposits = (
-        db.query(func.sum(Transactions.amount))
-        .filter(
-            Transactions.user_id == user_id,
-            Transactions.transaction_type == "deposit",
-        )
-        .scalar()
-        or 0
-    )
+    return cached_response("dashboard", current_user.id, compute, request=request)
 
-    withdrawals = (
-        db.query(func.sum(Transactions.amount))
-        .filter(
-            Transactions.user_id == user_id,
-            Transactions.transaction_type == "withdrawal",
-        )
-        .scalar()
-        or 0
-    )
 
-    portfolio_daily_summary = compute_daily_trading_summary(db, user_id, portfolio_entries)
-    account_summary = compute_account_summary(
-        db,
-        user_id,
-        portfolio_entries,
-        float(deposits),
-        float(withdrawals),
-    )
+@router.get("/dashboard/today")
+def dashboard_today(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Just the daily trading summary (the home KPI), cheap enough to poll.
 
-    initial_cash_row = (
-        db.query(InitialCash)
-        .filter(InitialCash.user_id == user_id)
-        .first()
-    )
+    Reads the two latest portfolio rows and the flows on their dates only;
+    returns null when there is no portfolio data yet.
+    """
+    def compute():
+        ledger = load_daily_summary_snapshot(db, current_user.id)
+        return compute_daily_trading_summary(ledger)
 
-    # equity_curve = [
-    #     {
-    #         "date": p.entry_date,
-    #         "value": round(float(p.balance), 2),
-    #     }
-    #     for p in portfolio_entries
-    # ]
-    # equity_curve = _prepend_initial_cash_anchor(equity_curve, initial_cash_row)
+    return cached_response("today", current_user.id, compute, request=request)
 
-    equity_curve = _build_home_equity_points(db, user_id, portfolio_entries)
-    equity_curve = _prepend_home_initial_cash_anchor(equity_curve, initial_cash_row)
 
-    trades = db.query(Trades).filter(Trades.user_id == user_id).all()
-    realized = [float(t.profit_loss) for t in trades if t.profit_loss is not None]
+# ========================================================================
+# DASHBOARD STATS
+# ========================================================================
 
-    performance = {
-        "total_trades": len(realized),
-        "win_rate": round(
-            (len([p for p in realized if p > 0]) / len(realized) * 100)
-            if realized else 0,
-            2,
-        ),
-        "total_realized_pnl": round(sum(realized), 2),
+def ledger_trade_stats(ledger: LedgerSnapshot) -> dict:
+    """
+    load_trade_stats()-shaped aggregates from the ledger's trade columns,
+    for users without stored TradeStats. One vectorized pass; group sums
+    use bincount, which accumulates in trade order (same floats as summing
+    trade by trade).
+    """
+    pl = np.array(ledger.trade_profit_loss, dtype=np.float64)
+    entry_days = to_datetime64(ledger.trade_entry_dates).view(np.int64)
+    close_days = to_datetime64(ledger.trade_close_dates).view(np.int64)
+
+    realized_mask = ~np.isnan(pl)
+    has_dates = (entry_days != NAT_DAYS) & (close_days != NAT_DAYS)
+
+    realized = pl[realized_mask]
+    wins_list = realized[realized > 0]
+    losses_list = realized[realized < 0]
+    hold_days = (close_days - entry_days)[has_dates]
+
+    totals = {
+        "count": len(pl),
+        "realized": len(realized),
+        "wins": len(wins_list),
+        "losses": len(losses_list),
+        "sum_win": _sequential_sum(wins_list),
+        "sum_loss": _sequential_sum(losses_list),
+        "hold_count": len(hold_days),
+        "sum_hold_days": int(hold_days.sum()),
+        "total_pnl": _sequential_sum(realized),
     }
 
-    latest_financial = (
-        db.query(Financial)
-        .filter(Financial.user_id == user_id)
-        .order_by(Financial.entry_date.desc())
-        .first()
-    )
+    def grouped(keys: np.ndarray, values: np.ndarray) -> dict:
+        keys, groups = _first_seen_groups(keys)
+        n_keys = len(keys)
+        count = np.bincount(groups, minlength=n_keys)
+        wins = np.bincount(groups[values > 0], minlength=n_keys)
+        losses = np.bincount(groups[values < 0], minlength=n_keys)
+        total_pnl = np.bincount(groups, weights=values, minlength=n_keys)
+        sum_win = np.bincount(groups, weights=np.where(values > 0, values, 0.0), minlength=n_keys)
+        sum_loss = np.bincount(groups, weights=np.where(values < 0, values, 0.0), minlength=n_keys)
 
-    financial_summary = None
-    if latest_financial:
-        financial_summary = {
-            "networth": float(latest_financial.networth or 0),
-            "income": float(latest_financial.income or 0),
-            "expenses": float(latest_financial.expenses or 0),
-            "gains": float(latest_financial.gains or 0),
+        return {
+            key: {
+                "count": int(count[k]),
+                "realized": int(count[k]),
+                "wins": int(wins[k]),
+                "losses": int(losses[k]),
+                "sum_win": float(sum_win[k]),
+                "sum_loss": float(sum_loss[k]),
+                "total_pnl": float(total_pnl[k]),
+            }
+            for k, key in enumerate(keys.tolist())
+        }
+
+    by_symbol = {}
+    if len(realized):
+        raw_symbols = [ledger.trade_symbols[i] for i in np.flatnonzero(realized_mask).tolist()]
+        normalized = {sym: normalize_symbol(sym) for sym in set(raw_symbols)}
+        by_symbol = grouped(np.array([normalized[sym] for sym in raw_symbols]), realized)
+
+    by_weekday = {}
+    weekday_mask = realized_mask & (close_days != NAT_DAYS)
+    if weekday_mask.any():
+        # 1970-01-01 was a Thursday; Monday == 0.
+        weekdays = (close_days[weekday_mask] + 3) % 7
+        by_weekday = {
+            WEEKDAY_NAMES[k]: v for k, v in grouped(weekdays, pl[weekday_mask]).items()
         }
 
     return {
-        "account": account_summary,
-        "portfolio_daily_summary": portfolio_daily_summary,
-        "equity_curve": equity_curve,
-        "performance": performance,
-        "financial_summary": financial_summary,
+        DIMENSION_ALL: totals,
+        DIMENSION_SYMBOL: by_symbol,
+        DIMENSION_WEEKDAY: by_weekday,
     }
 
 
-# ========================================================================
-# DASHBOARD STATS
-# ========================================================================
+def _ledger_hold_buckets(ledger: LedgerSnapshot) -> list:
+    """pnl_by_hold_buckets computed exactly from the ledger's trades."""
+    pl = np.array(ledger.trade_profit_loss, dtype=np.float64)
+    entry_days = to_datetime64(ledger.trade_entry_dates).view(np.int64)
+    close_days = to_datetime64(ledger.trade_close_dates).view(np.int64)
 
-@router.get("/dashboard/stats")
-def dashboard_stats(
-    db: Session = Depends(get_db_connection),
-    current_user: User = Depends(get_current_user),
-):
-    user_id = current_user.id
-
-    trades = (
-        db.query(Trades)
-        .filter(Trades.user_id == user_id)
-        .all()
+    bucket_mask = ~np.isnan(pl) & (entry_days != NAT_DAYS) & (close_days != NAT_DAYS)
+    bucket_index = np.searchsorted(
+        HOLD_BUCKET_EDGES, (close_days - entry_days)[bucket_mask], side="left"
     )
+    bucket_pl = pl[bucket_mask]
+
+    pnl_by_hold_buckets = []
+    for i, b in enumerate(HOLD_BUCKET_ORDER):
+        sketch = PnlSketch.exact_from_sorted(np.sort(bucket_pl[bucket_index == i]).tolist())
+        pnl_by_hold_buckets.append(hold_bucket_summary(b, sketch))
+    return pnl_by_hold_buckets
+
+
+def compute_trade_stats(
+    ledger: LedgerSnapshot,
+    trade_stats: Optional[dict] = None,
+    hold_buckets: Optional[list] = None,
+):
+    """
+    Trade analytics for the Analysis page: win/loss sums, hold times,
+    P&L by weekday / symbol / hold bucket and max drawdown (of the
+    cash-flow-adjusted equity index, so deposits and withdrawals don't
+    move it).
+
+    trade_stats is the stored running aggregates (load_trade_stats) and
+    hold_buckets pnl_by_hold_buckets read from the stored sketches
+    (load_hold_bucket_stats); either one missing is computed from the
+    ledger's trades instead. The ledger itself is only needed for the
+    equity series then.
+    """
+    if trade_stats is None:
+        trade_stats = ledger_trade_stats(ledger)
 
-    if not trades:
+    totals = trade_stats[DIMENSION_ALL]
+    if not totals["count"]:
         return {
             "total_trades": 0,
             "wins": 0,
@@ -958,21 +827,17 @@ def dashboard_stats(
             "avg_hold_time_days_rounded": 0,
         }
 
-    realized = [float(t.profit_loss) for t in trades if t.profit_loss is not None]
-    wins_list = [p for p in realized if p > 0]
-    losses_list = [p for p in realized if p < 0]
-
-    wins = len(wins_list)
-    losses = len(losses_list)
+    wins = totals["wins"]
+    losses = totals["losses"]
 
-    gross_profit = sum(wins_list)
-    gross_loss = abs(sum(losses_list)) if losses_list else 0.0
+    gross_profit = totals["sum_win"] if wins else 0
+    gross_loss = abs(totals["sum_loss"]) if losses else 0.0
     net_pnl = gross_profit - gross_loss
 
-    total_trades = len(realized)
+    total_trades = totals["realized"]
     win_rate = (wins / total_trades) * 100 if total_trades else 0
-    avg_win = (sum(wins_list) / wins) if wins else 0
-    avg_loss = (sum(losses_list) / losses) if losses else 0
+    avg_win = (gross_profit / wins) if wins else 0
+    avg_loss = (totals["sum_loss"] / losses) if losses else 0
 
     expectancy = (
         (win_rate / 100) * avg_win +
@@ -984,58 +849,21 @@ def dashboard_stats(
     reward_per_dollar_risk = payoff_ratio
     profit_factor = (gross_profit / gross_loss) if gross_loss else 0
 
-    hold_times = []
-    for t in trades:
-        if t.entry_date and t.close_date:
-            delta_days = (t.close_date - t.entry_date).days
-            hold_times.append(delta_days * 24)
-
-    avg_hold_time_hours = sum(hold_times) / len(hold_times) if hold_times else 0.0
+    hold_count = totals["hold_count"]
+    avg_hold_time_hours = totals["sum_hold_days"] * 24 / hold_count if hold_count else 0.0
     avg_hold_time_days = avg_hold_time_hours / 24.0 if avg_hold_time_hours else 0.0
     avg_hold_time_days_rounded = int(avg_hold_time_days + 0.5)
 
-    pnl_by_weekday = {}
-    for t in trades:
-        if t.profit_loss is not None and t.close_date:
-            weekday = t.close_date.strftime("%A")
-            pnl_by_weekday[weekday] = pnl_by_weekday.get(weekday, 0) + float(t.profit_loss)
-
-    symbol_map = {}
-
-    for t in trades:
-        if t.profit_loss is None:
-            continue
-
-        sym = (t.symbol or "").upper().strip() or "UNKNOWN"
-        pl = float(t.profit_loss)
-
-        if sym not in symbol_map:
-            symbol_map[sym] = {
-                "symbol": sym,
-                "trade_count": 0,
-                "wins": 0,
-                "losses": 0,
-                "total_pnl": 0.0,
-                "sum_win": 0.0,
-                "sum_loss": 0.0,
-            }
-
-        s = symbol_map[sym]
-        s["trade_count"] += 1
-        s["total_pnl"] += pl
-
-        if pl > 0:
-            s["wins"] += 1
-            s["sum_win"] += pl
-        elif pl < 0:
-            s["losses"] += 1
-            s["sum_loss"] += pl
+    pnl_by_weekday = {
+        name: s["total_pnl"] for name, s in trade_stats[DIMENSION_WEEKDAY].items()
+    }
 
+    symbol_map = trade_stats[DIMENSION_SYMBOL]
     pnl_by_symbol = {k: round(v["total_pnl"], 2) for k, v in symbol_map.items()}
 
     pnl_by_symbol_detail = []
     for sym, s in symbol_map.items():
-        tc = s["trade_count"] or 0
+        tc = s["realized"] or 0
         wins_sym = s["wins"]
         losses_sym = s["losses"]
         total_pnl = float(s["total_pnl"])
@@ -1059,67 +887,12 @@ def dashboard_stats(
 
     pnl_by_symbol_detail.sort(key=lambda x: abs(float(x["total_pnl"])), reverse=True)
 
-    bucket_order = ["0–1d", "1–3d", "3–7d", "7–14d", "14d+"]
-    bucket_map = {b: [] for b in bucket_order}
-
-    for t in trades:
-        if t.profit_loss is None or not t.entry_date or not t.close_date:
-            continue
-
-        delta_days = (t.close_date - t.entry_date).days
-        hold_days = float(delta_days)
-
-        b = _hold_bucket_days(hold_days)
-        bucket_map[b].append(float(t.profit_loss))
-
-    pnl_by_hold_buckets = []
-    for b in bucket_order:
-        vals = sorted(bucket_map[b])
-        n = len(vals)
-
-        if n == 0:
-            pnl_by_hold_buckets.append({
-                "bucket": b,
-                "count": 0,
-                "p10": 0.0,
-                "p25": 0.0,
-                "median": 0.0,
-                "p75": 0.0,
-                "p90": 0.0,
-            })
-            continue
-
-        p10 = _percentile(vals, 0.10)
-        p25 = _percentile(vals, 0.25)
-        med = _percentile(vals, 0.50)
-        p75 = _percentile(vals, 0.75)
-        p90 = _percentile(vals, 0.90)
-
-        pnl_by_hold_buckets.append({
-            "bucket": b,
-            "count": n,
-            "p10": round(p10, 2),
-            "p25": round(p25, 2),
-            "median": round(med, 2),
-            "p75": round(p75, 2),
-            "p90": round(p90, 2),
-        })
-
-    portfolio_entries = (
-        db.query(Portfolio)
-        .filter(Portfolio.user_id == user_id)
-        .order_by(Portfolio.entry_date.asc())
-        .all()
-    )
+    if hold_buckets is not None:
+        pnl_by_hold_buckets = hold_buckets
+    else:
+        pnl_by_hold_buckets = _ledger_hold_buckets(ledger)
 
-    max_drawdown = 0
-    if portfolio_entries:
-        peak = float(portfolio_entries[0].balance)
-        for p in portfolio_entries:
-            val = float(p.balance)
-            peak = max(peak, val)
-            drawdown = (val - peak) / peak if peak else 0
-            max_drawdown = min(max_drawdown, drawdown)
+    max_drawdown_percent = drawdown_profile(_drawdown_curve(ledger), windows=()).max_drawdown_percent
 
     return {
         "total_trades": total_trades,
@@ -1139,7 +912,7 @@ def dashboard_stats(
         "avg_hold_time_days": round(avg_hold_time_days, 2),
         "avg_hold_time_days_rounded": avg_hold_time_days_rounded,
         "avg_hold_time_hours": round(avg_hold_time_hours, 2),
-        "max_drawdown_percent": round(max_drawdown * 100, 2),
+        "max_drawdown_percent": max_drawdown_percent,
         "pnl_by_weekday": pnl_by_weekday,
         "pnl_by_symbol": pnl_by_symbol,
         "pnl_by_symbol_detail": pnl_by_symbol_detail,
@@ -1147,150 +920,391 @@ def dashboard_stats(
     }
 
 
+@router.get("/dashboard/stats")
+def dashboard_stats(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    def compute():
+        trade_stats = load_trade_stats(db, current_user.id)
+        hold_buckets = load_hold_bucket_stats(db, current_user.id)
+        ledger = load_ledger_snapshot(
+            db,
+            current_user.id,
+            portfolio=False,
+            flows=False,
+            trades=trade_stats is None or hold_buckets is None,
+            equity=True,
+        )
+        return compute_trade_stats(ledger, trade_stats, hold_buckets)
+
+    return cached_response("stats", current_user.id, compute, request=request)
+
+
 # ========================================================================
 # DASHBOARD CHARTS
 # ========================================================================
 
-@router.get("/dashboard/charts")
-def dashboard_charts(
-    db: Session = Depends(get_db_connection),
-    current_user: User = Depends(get_current_user),
+# How each equity curve is laid out in the charts payload:
+# - points:   [{date, value, ...}] per day (default)
+# - columnar: {"dates": [...], "value": [...], ...}, dates sent once
+# - binary:   columnar with raw little-endian arrays, for msgpack bodies
+CURVE_RENDERERS = {
+    "points": Curve.to_points,
+    "columnar": Curve.to_columns,
+    "binary": Curve.to_binary_columns,
+}
+
+
+# Days covered by the fixed chart ranges (window ends on the given day).
+CHART_RANGE_DAYS = {"1M": 30, "3M": 91, "1Y": 365}
+
+
+def _chart_range_window(range_key: str, end_d: date):
+    """(from, to) for a chart range; (None, None) for ALL."""
+    if range_key == "ALL":
+        return None, None
+    if range_key == "YTD":
+        return date(end_d.year, 1, 1), end_d
+    return end_d - timedelta(days=CHART_RANGE_DAYS[range_key] - 1), end_d
+
+
+def resolve_chart_window(
+    range_key: Optional[str],
+    from_date: Optional[date],
+    to_date: Optional[date],
 ):
-    user_id = current_user.id
+    """Validated (from, to) for /dashboard/charts' range or from/to parameters."""
+    if range_key is not None and (from_date is not None or to_date is not None):
+        raise HTTPException(
+            status_code=400,
+            detail="Use either range or from/to, not both.",
+        )
+    if range_key is not None:
+        from_date, to_date = _chart_range_window(range_key, date.today())
+    if from_date is not None and to_date is not None and from_date > to_date:
+        raise HTTPException(status_code=400, detail="from must be on or before to.")
+    return from_date, to_date
 
-    portfolio_entries = (
-        db.query(Portfolio)
-        .filter(Portfolio.user_id == user_id)
-        .order_by(Portfolio.entry_date.asc())
-        .all()
-    )
 
-    if not portfolio_entries:
+def resolve_curve_format(format: str, encoding: str) -> str:
+    """columnar curves in a msgpack body are sent as binary columns."""
+    if format == "columnar" and encoding == "msgpack":
+        return "binary"
+    return format
+
+
+def compute_dashboard_charts(
+    ledger: LedgerSnapshot,
+    curve_format: str = "points",
+    max_points: Optional[int] = None,
+    trade_stats: Optional[dict] = None,
+):
+    """
+    Chart payload: home / actual / normalized equity curves (daily filled),
+    equity analysis bands, weekly PnL, win/loss, jar allocation and the
+    financial curve.
+
+    When the ledger holds an equity window, the curves are the full-history
+    curves restricted to it; regression, bands and weekly PnL are computed
+    over the window.
+
+    max_points downsamples each equity curve (see downsample_indices).
+    Regression, bands and weekly PnL are computed on the full daily curve
+    first; the analysis curves then share the normalized curve's points.
+
+    Win/loss counts come from trade_stats (load_trade_stats) when given,
+    else from the ledger's trades.
+    """
+    render = CURVE_RENDERERS[curve_format]
+
+    if not ledger.equity_dates:
+        empty_curve = render(Curve(to_datetime64([])))
         return {
-            "equity_curve": [],
-            "normalized_equity_curve": [],
+            "equity_curve": empty_curve,
+            "normalized_equity_curve": empty_curve,
             "weekly_pnl": [],
             "win_loss": {"wins": 0, "losses": 0},
             "allocation": [],
             "financial_curve": [],
         }
 
-    initial_cash_row = (
-        db.query(InitialCash)
-        .filter(InitialCash.user_id == user_id)
-        .first()
-    )
-
-    raw_points = _build_home_equity_points(db, user_id, portfolio_entries)
-    raw_points = _prepend_home_initial_cash_anchor(raw_points, initial_cash_row)
-    filled_curve = _fill_daily_curve(raw_points)
+    home_curve = _build_home_equity_curve(ledger)
+    actual_curve = _build_actual_equity_curve(ledger)
+    normalized_curve = _build_normalized_equity_curve(ledger)
 
-    actual_points = _build_actual_equity_points(db, user_id, portfolio_entries)
-    actual_points = _prepend_initial_cash_anchor(actual_points, initial_cash_row)
-    actual_filled_curve = _fill_daily_curve(actual_points)
+    window_from = ledger.equity_window_from
+    window_to = ledger.equity_window_to
 
-    normalized_points = _build_normalized_equity_points(db, user_id, portfolio_entries)
-    normalized_points = _prepend_initial_cash_anchor(normalized_points, initial_cash_row)
-    normalized_filled_curve = _fill_daily_curve(normalized_points)
+    # The initial cash anchor sits before the first row; when the window
+    # starts after a seed row it is outside the window anyway.
+    if window_from is None or ledger.equity_dates[0] >= window_from:
+        home_curve = _prepend_home_initial_cash_anchor(home_curve, ledger)
+        actual_curve = _prepend_initial_cash_anchor(actual_curve, ledger)
+        normalized_curve = _prepend_initial_cash_anchor(normalized_curve, ledger)
 
-    trades = (
-        db.query(Trades)
-        .filter(Trades.user_id == user_id)
-        .all()
-    )
+    home_curve = home_curve.fill_daily(window_from, window_to)
+    actual_curve = actual_curve.fill_daily(window_from, window_to)
+    normalized_curve = normalized_curve.fill_daily(window_from, window_to)
 
-    wins = len([t for t in trades if t.profit_loss is not None and t.profit_loss > 0])
-    losses = len([t for t in trades if t.profit_loss is not None and t.profit_loss < 0])
+    if trade_stats is not None:
+        wins = trade_stats[DIMENSION_ALL]["wins"]
+        losses = trade_stats[DIMENSION_ALL]["losses"]
+    else:
+        wins = len([pl for pl in ledger.trade_profit_loss if pl is not None and pl > 0])
+        losses = len([pl for pl in ledger.trade_profit_loss if pl is not None and pl < 0])
 
     win_loss = {"wins": wins, "losses": losses}
     trade_count = wins + losses
     win_rate = round((wins / trade_count * 100) if trade_count else 0.0, 2)
 
-    ideal_line = _linear_regression_line(normalized_filled_curve)
-    bands = _build_equity_deviation_bands(normalized_filled_curve, ideal_line)
+    ideal_line = linear_regression(normalized_curve)
+    above_band, below_band = deviation_bands(normalized_curve, ideal_line)
+    weekly = weekly_pnl(normalized_curve)
+
+    if max_points is not None:
+        home_curve = home_curve.take(downsample_indices(home_curve, max_points))
+        actual_curve = actual_curve.take(downsample_indices(actual_curve, max_points))
+
+        idx = downsample_indices(normalized_curve, max_points)
+        normalized_curve = normalized_curve.take(idx)
+        ideal_line = ideal_line.take(idx)
+        above_band = above_band.take(idx)
+        below_band = below_band.take(idx)
+
+    normalized_filled_curve = render(normalized_curve)
 
     equity_analysis = {
         "equity": normalized_filled_curve,
-        "ideal_line": ideal_line,
-        "above_band": bands["above"],
-        "below_band": bands["below"],
+        "ideal_line": render(ideal_line),
+        "above_band": render(above_band),
+        "below_band": render(below_band),
         "trade_count": trade_count,
         "wins": wins,
         "losses": losses,
         "win_rate": win_rate,
     }
 
-    weekly_pnl_map = {}
-
-    for i in range(1, len(normalized_filled_curve)):
-        prev = normalized_filled_curve[i - 1]["value"]
-        curr = normalized_filled_curve[i]["value"]
-        delta = curr - prev
-
-        week_key = normalized_filled_curve[i]["date"].strftime("%Y-W%U")
-        weekly_pnl_map[week_key] = weekly_pnl_map.get(week_key, 0) + delta
-
-    weekly_pnl = [
-        {"week": k, "pnl": round(v, 2)}
-        for k, v in sorted(weekly_pnl_map.items())
-    ]
-
-    latest_financial = (
-        db.query(Financial)
-        .filter(Financial.user_id == user_id)
-        .order_by(Financial.entry_date.desc())
-        .first()
-    )
-
     allocation = []
-    if latest_financial:
+    if ledger.financial_dates:
         allocation = [
-            {"jar": "NEC", "value": float(latest_financial.nec or 0)},
-            {"jar": "FFA", "value": float(latest_financial.ffa or 0)},
-            {"jar": "PLAY", "value": float(latest_financial.play or 0)},
-            {"jar": "LTSS", "value": float(latest_financial.ltss or 0)},
-            {"jar": "GIVE", "value": float(latest_financial.give or 0)},
+            {"jar": "NEC", "value": ledger.financial_nec[-1]},
+            {"jar": "FFA", "value": ledger.financial_ffa[-1]},
+            {"jar": "PLAY", "value": ledger.financial_play[-1]},
+            {"jar": "LTSS", "value": ledger.financial_ltss[-1]},
+            {"jar": "GIVE", "value": ledger.financial_give[-1]},
         ]
 
-    financial_rows = (
-        db.query(Financial)
-        .filter(Financial.user_id == user_id)
-        .order_by(Financial.entry_date.asc())
-        .all()
-    )
-
     financial_curve = [
         {
-            "entry_date": f.entry_date,
-            "date": f.entry_date,
-            "income": float(f.income or 0),
-            "expenses": float(f.expenses or 0),
-            "gains": float(f.gains or 0),
-            "networth": float(f.networth or 0),
+            "entry_date": ledger.financial_dates[i],
+            "date": ledger.financial_dates[i],
+            "income": ledger.financial_income[i],
+            "expenses": ledger.financial_expenses[i],
+            "gains": ledger.financial_gains[i],
+            "networth": ledger.financial_networth[i],
         }
-        for f in financial_rows
+        for i in range(len(ledger.financial_dates))
     ]
 
-    # return {
-    #     "equity_curve": filled_curve,
-    #     "normalized_equity_curve": normalized_filled_curve,
-    #     "equity_analysis": equity_analysis,
-    #     "weekly_pnl": weekly_pnl,
-    #     "win_loss": win_loss,
-    #     "allocation": allocation,
-    #     "financial_curve": financial_curve,
-    # }
     return {
-        "equity_curve": filled_curve,
-        "actual_equity_curve": actual_filled_curve,
+        "equity_curve": render(home_curve),
+        "actual_equity_curve": render(actual_curve),
         "normalized_equity_curve": normalized_filled_curve,
         "equity_analysis": equity_analysis,
-        "weekly_pnl": weekly_pnl,
+        "weekly_pnl": weekly,
         "win_loss": win_loss,
         "allocation": allocation,
         "financial_curve": financial_curve,
     }
 
+
+@router.get("/dashboard/charts")
+def dashboard_charts(
+    request: Request,
+    format: str = Query("points", pattern="^(points|columnar)$"),
+    encoding: str = Query("json", pattern="^(json|msgpack)$"),
+    max_points: Optional[int] = Query(None, ge=10),
+    range: Optional[str] = Query(None, pattern="^(1M|3M|YTD|1Y|ALL)$"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    format=columnar sends each equity curve as parallel arrays instead of
+    per-day objects. encoding=msgpack returns a MessagePack body; combined
+    with format=columnar the arrays are packed as raw binary columns
+    (see Curve.to_binary_columns).
+
+    max_points caps each equity curve's length with shape-preserving
+    downsampling, always keeping the initial cash anchor and the max
+    drawdown peak/trough.
+
+    range=1M|3M|YTD|1Y|ALL (ending today) or from/to limit the equity curves
+    to a date window; only that window is read from DailyEquity.
+    """
+    from_date, to_date = resolve_chart_window(range, from_date, to_date)
+    curve_format = resolve_curve_format(format, encoding)
+
+    def compute():
+        trade_stats = load_trade_stats(db, current_user.id)
+        ledger = load_ledger_snapshot(
+            db,
+            current_user.id,
+            portfolio=False,
+            flows=False,
+            trades=trade_stats is None,
+            financial=True,
+            equity=True,
+            equity_from=from_date,
+            equity_to=to_date,
+        )
+        return compute_dashboard_charts(ledger, curve_format, max_points, trade_stats)
+
+    if encoding == "msgpack":
+        return cached_response(
+            "charts", current_user.id, compute,
+            curve_format, encoding, max_points, from_date, to_date,
+            request=request,
+            render=render_msgpack,
+            media_type=MSGPACK_MEDIA_TYPE,
+        )
+
+    return cached_response(
+        "charts", current_user.id, compute,
+        curve_format, encoding, max_points, from_date, to_date,
+        request=request,
+    )
+
+# =========================================================
+# Drawdown
+# =========================================================
+
+DRAWDOWN_WINDOWS = (30, 90)
+
+
+def _drawdown_curve(ledger: LedgerSnapshot) -> Curve:
+    """
+    Daily cash-flow-adjusted (time-weighted) equity index that drawdowns
+    are measured on, with the initial cash anchor.
+
+    Each day's return is portfolio_close over the capital it started with
+    (previous actual value plus that day's pre-open flows), so a
+    withdrawal is not a drawdown and a deposit does not hide one. The
+    index starts at the initial cash (or the first close) and follows the
+    normalized curve's shape without its additive rebasing, which can
+    reach zero or below once deposits outweigh the initial cash.
+    """
+    if not ledger.equity_dates:
+        return Curve(to_datetime64([]), {"value": np.empty(0)})
+
+    close = np.asarray(ledger.equity_portfolio_close, dtype=np.float64)
+    actual = np.asarray(ledger.equity_actual, dtype=np.float64)
+    pre_open_net_flow = (
+        np.asarray(ledger.equity_deposits_pre_open, dtype=np.float64)
+        - np.asarray(ledger.equity_withdrawals_pre_open, dtype=np.float64)
+    )
+
+    start_value = close[0]
+    if ledger.has_initial_cash and ledger.initial_cash_date <= ledger.equity_dates[0]:
+        start_value = float(ledger.initial_cash)
+        previous = np.concatenate(([start_value], actual[:-1])) + pre_open_net_flow
+    else:
+        previous = np.concatenate(([close[0]], actual[:-1] + pre_open_net_flow[1:]))
+
+    safe_previous = np.where(previous > 0, previous, 1.0)
+    growth = np.where(previous > 0, close / safe_previous, 1.0)
+
+    curve = Curve(
+        to_datetime64(ledger.equity_dates),
+        {"value": round2(start_value * np.cumprod(growth))},
+    )
+    return _prepend_initial_cash_anchor(curve, ledger).fill_daily()
+
+
+def compute_drawdown(
+    ledger: LedgerSnapshot,
+    curve_format: str = "points",
+    max_points: Optional[int] = None,
+):
+    """
+    Drawdown payload: max drawdown with its peak / trough / recovery and
+    durations, longest and current drawdown, the underwater curve and the
+    rolling 30/90-day drawdown curves (all in percent, <= 0).
+
+    max_points downsamples the curves; they share the underwater curve's
+    points, which always include the max drawdown trough.
+    """
+    render = CURVE_RENDERERS[curve_format]
+
+    profile = drawdown_profile(_drawdown_curve(ledger), DRAWDOWN_WINDOWS)
+    summary = profile.summary()
+
+    underwater = profile.underwater
+    rolling = profile.rolling
+    if max_points is not None:
+        idx = downsample_indices(underwater, max_points)
+        underwater = underwater.take(idx)
+        rolling = {w: curve.take(idx) for w, curve in rolling.items()}
+
+    return {
+        "max_drawdown": summary["max_drawdown"],
+        "longest_drawdown_days": summary["longest_drawdown_days"],
+        "current_drawdown": summary["current_drawdown"],
+        "underwater_curve": render(underwater),
+        "rolling": {
+            f"{w}d": {
+                "max_drawdown_percent": summary["rolling"][f"{w}d"],
+                "curve": render(curve),
+            }
+            for w, curve in rolling.items()
+        },
+    }
+
+
+@router.get("/dashboard/drawdown")
+def dashboard_drawdown(
+    request: Request,
+    format: str = Query("points", pattern="^(points|columnar)$"),
+    encoding: str = Query("json", pattern="^(json|msgpack)$"),
+    max_points: Optional[int] = Query(None, ge=10),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Drawdown analysis of the cash-flow-adjusted equity curve for risk views.
+    format / encoding / max_points work as on /dashboard/charts.
+    """
+    curve_format = resolve_curve_format(format, encoding)
+
+    def compute():
+        ledger = load_ledger_snapshot(
+            db,
+            current_user.id,
+            portfolio=False,
+            flows=False,
+            equity=True,
+        )
+        return compute_drawdown(ledger, curve_format, max_points)
+
+    if encoding == "msgpack":
+        return cached_response(
+            "drawdown", current_user.id, compute,
+            curve_format, encoding, max_points,
+            request=request,
+            render=render_msgpack,
+            media_type=MSGPACK_MEDIA_TYPE,
+        )
+
+    return cached_response(
+        "drawdown", current_user.id, compute,
+        curve_format, encoding, max_points,
+        request=request,
+    )
+
+
 # =========================================================
 # Realized PnL Histogram
 # =========================================================
@@ -1340,23 +1354,19 @@ def _label_for_bucket(granularity: str, bucket_start: date) -> str:
     return bucket_start.strftime("%b")
 
 
-@router.get("/dashboard/realized-pnl")
-def dashboard_realized_pnl(
-    range: str = Query("1W", pattern="^(1W|1M|1Y)$"),
-    db: Session = Depends(get_db_connection),
-    current_user: User = Depends(get_current_user),
-):
-    user_id = current_user.id
-    end_d = date.today()
-
-    if range == "1W":
+def compute_realized_pnl(ledger: LedgerSnapshot, range_key: str, end_d: date):
+    """
+    Realized PnL bars for the 1W (daily), 1M (weekly) or 1Y (monthly) view
+    ending on end_d.
+    """
+    if range_key == "1W":
         granularity = "day"
         start_d = end_d - timedelta(days=6)
         bucket_starts = list(_iter_days(start_d, end_d))
         bucket_end = lambda s: s
         bucket_of = lambda d: d
 
-    elif range == "1M":
+    elif range_key == "1M":
         granularity = "week"
         start_d = end_d - timedelta(days=29)
         bucket_starts = list(_iter_weeks(start_d, end_d))
@@ -1386,16 +1396,7 @@ def dashboard_realized_pnl(
         for bs in bucket_starts
     }
 
-    rows = (
-        db.query(Trades.close_date, Trades.profit_loss)
-        .filter(
-            Trades.user_id == user_id,
-            Trades.close_date.isnot(None),
-        )
-        .all()
-    )
-
-    for close_dt, pl in rows:
+    for close_dt, pl in zip(ledger.trade_close_dates, ledger.trade_profit_loss):
         if pl is None or close_dt is None:
             continue
 
@@ -1414,11 +1415,36 @@ def dashboard_realized_pnl(
     bars = [buckets[bs] for bs in bucket_starts]
 
     return {
-        "range": range,
+        "range": range_key,
         "granularity": granularity,
         "start": start_d.isoformat(),
         "end": end_d.isoformat(),
         "bars": bars,
     }
 
+
+@router.get("/dashboard/realized-pnl")
+def dashboard_realized_pnl(
+    request: Request,
+    range: str = Query("1W", pattern="^(1W|1M|1Y)$"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    end_d = date.today()
+
+    def compute():
+        ledger = load_ledger_snapshot(
+            db,
+            current_user.id,
+            portfolio=False,
+            flows=False,
+            initial_cash=False,
+            trades=True,
+        )
+        return compute_realized_pnl(ledger, range, end_d)
+
+    return cached_response(
+        "realized-pnl", current_user.id, compute, range, end_d, request=request
+    )
+
     
\ No newline at end of file
@@ -0,0 +1,218 @@
+# app/routers/dashboard_async.py
+#
+# Async variants of the dashboard reads, mounted in front of the sync
+# routes when an async database is configured (see main.py). Paths,
+# parameters, cache entries and payloads are the same; the tables behind
+# each endpoint are read concurrently (load_ledger_snapshot_async) and the
+# numpy work and rendering run in the threadpool.
+
+import asyncio
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+
+from ..database import AsyncDB
+from ..auth import get_async_db, get_current_user
+from ..cache import MSGPACK_MEDIA_TYPE, cached_response_async, render_json, render_msgpack
+from ..ledger import load_daily_summary_snapshot, load_ledger_snapshot_async, load_ledger_trades
+from ..models import User
+from ..pnl_sketches import load_hold_bucket_stats
+from ..trade_stats import load_trade_stats
+from .dashboard import (
+    compute_daily_trading_summary,
+    compute_dashboard,
+    compute_dashboard_charts,
+    compute_drawdown,
+    compute_realized_pnl,
+    compute_trade_stats,
+    resolve_chart_window,
+    resolve_curve_format,
+)
+
+router = APIRouter()
+
+
+def _encoder(encoding: str) -> dict:
+    if encoding == "msgpack":
+        return {"render": render_msgpack, "media_type": MSGPACK_MEDIA_TYPE}
+    return {"render": render_json, "media_type": "application/json"}
+
+
+@router.get("/dashboard")
+async def dashboard(
+    request: Request,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+
+    async def compute():
+        trade_stats, ledger = await asyncio.gather(
+            db.run_sync(load_trade_stats, user_id),
+            load_ledger_snapshot_async(
+                db,
+                user_id,
+                portfolio="latest",
+                financial=True,
+                equity=True,
+            ),
+        )
+
+        if not ledger.portfolio_dates:
+            raise HTTPException(400, "No portfolio data available.")
+
+        if trade_stats is None:
+            await db.run_sync(load_ledger_trades, ledger)
+
+        return await run_in_threadpool(compute_dashboard, ledger, trade_stats)
+
+    return await cached_response_async("dashboard", user_id, compute, request=request)
+
+
+@router.get("/dashboard/today")
+async def dashboard_today(
+    request: Request,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+
+    async def compute():
+        # Each query needs the previous one's result; nothing to overlap.
+        ledger = await db.run_sync(load_daily_summary_snapshot, user_id)
+        return compute_daily_trading_summary(ledger)
+
+    return await cached_response_async("today", user_id, compute, request=request)
+
+
+@router.get("/dashboard/stats")
+async def dashboard_stats(
+    request: Request,
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+
+    async def compute():
+        trade_stats, hold_buckets, ledger = await asyncio.gather(
+            db.run_sync(load_trade_stats, user_id),
+            db.run_sync(load_hold_bucket_stats, user_id),
+            load_ledger_snapshot_async(
+                db,
+                user_id,
+                portfolio=False,
+                flows=False,
+                equity=True,
+            ),
+        )
+
+        if trade_stats is None or hold_buckets is None:
+            await db.run_sync(load_ledger_trades, ledger)
+
+        return await run_in_threadpool(compute_trade_stats, ledger, trade_stats, hold_buckets)
+
+    return await cached_response_async("stats", user_id, compute, request=request)
+
+
+@router.get("/dashboard/charts")
+async def dashboard_charts(
+    request: Request,
+    format: str = Query("points", pattern="^(points|columnar)$"),
+    encoding: str = Query("json", pattern="^(json|msgpack)$"),
+    max_points: Optional[int] = Query(None, ge=10),
+    range: Optional[str] = Query(None, pattern="^(1M|3M|YTD|1Y|ALL)$"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+    from_date, to_date = resolve_chart_window(range, from_date, to_date)
+    curve_format = resolve_curve_format(format, encoding)
+
+    async def compute():
+        trade_stats, ledger = await asyncio.gather(
+            db.run_sync(load_trade_stats, user_id),
+            load_ledger_snapshot_async(
+                db,
+                user_id,
+                portfolio=False,
+                flows=False,
+                financial=True,
+                equity=True,
+                equity_from=from_date,
+                equity_to=to_date,
+            ),
+        )
+
+        if trade_stats is None:
+            await db.run_sync(load_ledger_trades, ledger)
+
+        return await run_in_threadpool(
+            compute_dashboard_charts, ledger, curve_format, max_points, trade_stats
+        )
+
+    return await cached_response_async(
+        "charts", user_id, compute,
+        curve_format, encoding, max_points, from_date, to_date,
+        request=request,
+        **_encoder(encoding),
+    )
+
+
+@router.get("/dashboard/drawdown")
+async def dashboard_drawdown(
+    request: Request,
+    format: str = Query("points", pattern="^(points|columnar)$"),
+    encoding: str = Query("json", pattern="^(json|msgpack)$"),
+    max_points: Optional[int] = Query(None, ge=10),
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+    curve_format = resolve_curve_format(format, encoding)
+
+    async def compute():
+        ledger = await load_ledger_snapshot_async(
+            db,
+            user_id,
+            portfolio=False,
+            flows=False,
+            equity=True,
+        )
+        return await run_in_threadpool(compute_drawdown, ledger, curve_format, max_points)
+
+    return await cached_response_async(
+        "drawdown", user_id, compute,
+        curve_format, encoding, max_points,
+        request=request,
+        **_encoder(encoding),
+    )
+
+
+@router.get("/dashboard/realized-pnl")
+async def dashboard_realized_pnl(
+    request: Request,
+    range: str = Query("1W", pattern="^(1W|1M|1Y)$"),
+    db: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    user_id = current_user.id
+    end_d = date.today()
+
+    async def compute():
+        ledger = await load_ledger_snapshot_async(
+            db,
+            user_id,
+            portfolio=False,
+            flows=False,
+            initial_cash=False,
+            trades=True,
+        )
+        return await run_in_threadpool(compute_realized_pnl, ledger, range, end_d)
+
+    return await cached_response_async(
+        "realized-pnl", user_id, compute, range, end_d, request=request
+    )
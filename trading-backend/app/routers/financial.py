@@ -3,12 +3,15 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, check_etag
 from ..database import get_db_connection
+from ..exports import export_response
+from ..pagination import MAX_PAGE_SIZE, SortKey, paginate
 from ..models import User, Financial
-from ..auth import get_current_user
+from ..auth import get_current_user, get_read_db
 from ..schema import FinancialCreate, FinancialUpdate, FinancialResponse
 
 router = APIRouter()
@@ -68,11 +71,20 @@ def compute_financial_values(
 
 @router.get("/", response_model=List[FinancialResponse])
 def list_financial_entries(
+    request: Request,
+    response: Response,
     from_date: Optional[date] = Query(default=None),
     to_date: Optional[date] = Query(default=None),
-    db: Session = Depends(get_db_connection),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
+    check_etag(
+        request, response, "financial", current_user.id,
+        from_date, to_date, cursor, limit,
+    )
+
     query = db.query(Financial).filter(Financial.user_id == current_user.id)
 
     if from_date:
@@ -80,12 +92,16 @@ def list_financial_entries(
     if to_date:
         query = query.filter(Financial.entry_date <= to_date)
 
-    return query.order_by(Financial.entry_date.desc()).all()
+    return paginate(
+        query,
+        [SortKey(Financial.entry_date, descending=True), SortKey(Financial.id, descending=True)],
+        response, cursor, limit,
+    )
 
 
 @router.get("/latest", response_model=FinancialResponse)
 def get_latest_financial(
-    db: Session = Depends(get_db_connection),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     entry = (
@@ -101,10 +117,27 @@ def get_latest_financial(
     return entry
 
 
+@router.get("/export")
+def export_financial_entries(
+    format: str = Query(default="csv", pattern="^(csv|ndjson|parquet)$"),
+    from_date: Optional[date] = Query(default=None),
+    to_date: Optional[date] = Query(default=None),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the current user's financial entries as csv, ndjson or parquet, by date."""
+    filters = [Financial.user_id == current_user.id]
+    if from_date:
+        filters.append(Financial.entry_date >= from_date)
+    if to_date:
+        filters.append(Financial.entry_date <= to_date)
+
+    return export_response(Financial, filters, [Financial.entry_date.asc()], format, "financial", current_user.id)
+
+
 @router.get("/{financial_id}", response_model=FinancialResponse)
 def get_financial_by_id(
     financial_id: int,
-    db: Session = Depends(get_db_connection),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     entry = db.query(Financial).filter(Financial.id == financial_id).first()
@@ -170,6 +203,7 @@ def create_financial(
 
     db.add(entry)
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(entry)
 
     return entry
@@ -230,6 +264,7 @@ def update_financial(
 
     db.add(entry)
     db.commit()
+    bump_data_version(entry.user_id)
     db.refresh(entry)
 
     return entry
@@ -250,6 +285,7 @@ def delete_financial(
 
     db.delete(entry)
     db.commit()
+    bump_data_version(entry.user_id)
 
 
 # @router.post("/recompute", status_code=200)
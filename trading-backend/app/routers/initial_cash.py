@@ -1,10 +1,12 @@
 # app/routers/initial_cash.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, check_etag
 from ..database import get_db_connection
 from ..auth import get_current_user
+from ..daily_equity import refresh_daily_equity
 from ..models import User, InitialCash, Portfolio
 from ..schema import (
     InitialCashCreate,
@@ -50,9 +52,13 @@ def _sync_initial_portfolio_row(
 
 @router.get("/", response_model=InitialCashResponse | None)
 def get_initial_cash(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db_connection),
     current_user: User = Depends(get_current_user),
 ):
+    check_etag(request, response, "initial-cash", current_user.id)
+
     row = (
         db.query(InitialCash)
         .filter(InitialCash.user_id == current_user.id)
@@ -99,7 +105,9 @@ def create_initial_cash(
         initial_cash=payload.initial_cash,
     )
 
+    refresh_daily_equity(db, current_user.id, payload.entry_date)
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(row)
     return row
 
@@ -130,6 +138,8 @@ def update_initial_cash(
                 detail="Initial cash must be non-negative.",
             )
 
+    old_entry_date = row.entry_date
+
     for field, value in update_data.items():
         setattr(row, field, value)
 
@@ -140,7 +150,9 @@ def update_initial_cash(
         initial_cash=row.initial_cash,
     )
 
+    refresh_daily_equity(db, current_user.id, min(old_entry_date, row.entry_date))
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(row)
     return row
 
@@ -163,5 +175,6 @@ def delete_initial_cash(
 
     db.delete(row)
     db.commit()
+    bump_data_version(current_user.id)
 
     return {"message": "Initial cash deleted successfully."}
\ No newline at end of file
@@ -0,0 +1,48 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.models import User
+from app.auth import get_current_user, password_pool
+from app.instrumentation import pool_metrics, reset_pool_metrics, route_metrics
+
+router = APIRouter()
+
+
+def is_admin(user: User) -> bool:
+    """Temporary admin rule: treat user with id == 1 as admin."""
+    return user.id == 1
+
+
+@router.get("/")
+def get_request_metrics(
+    reset: bool = Query(default=False, description="Clear the totals after reading them"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Per-route SQL and latency totals of this worker since it started (or
+    the last reset): request count, query count, DB time, total time and
+    the slowest statement seen. Admin only.
+
+    password_hashing is the bcrypt pool's queue depth and latency.
+
+    pools has each database pool's gauges (checked out, overflow, waiting)
+    and histograms of checkout latency and of waiters at checkout, for
+    sizing DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    """
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view metrics.",
+        )
+
+    metrics = {
+        "routes": route_metrics.snapshot(),
+        "password_hashing": password_pool.snapshot(),
+        "pools": pool_metrics(),
+    }
+    if reset:
+        route_metrics.reset()
+        password_pool.reset()
+        reset_pool_metrics()
+    return metrics
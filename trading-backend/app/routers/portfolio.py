@@ -3,12 +3,16 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, check_etag
 from ..database import get_db_connection
+from ..exports import export_response
+from ..pagination import MAX_PAGE_SIZE, SortKey, paginate
+from ..daily_equity import refresh_daily_equity
 from ..models import User, Portfolio
-from ..auth import get_current_user
+from ..auth import get_current_user, get_read_db
 from ..schema import PortfolioCreate, PortfolioUpdate, PortfolioResponse
 
 router = APIRouter()
@@ -21,14 +25,25 @@ def is_admin(user: User) -> bool:
 
 @router.get("/", response_model=List[PortfolioResponse])
 def list_portfolio_entries(
+    request: Request,
+    response: Response,
     from_date: Optional[date] = Query(default=None, description="Filter from this date (inclusive)"),
     to_date: Optional[date] = Query(default=None, description="Filter up to this date (inclusive)"),
-    db: Session = Depends(get_db_connection),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     List portfolio entries (balances) for the current user.
+
+    Pass limit (and then cursor) to page through the list; see paginate().
     """
+    check_etag(
+        request, response, "portfolio", current_user.id,
+        from_date, to_date, cursor, limit,
+    )
+
     query = db.query(Portfolio).filter(Portfolio.user_id == current_user.id)
 
     if from_date is not None:
@@ -36,13 +51,17 @@ def list_portfolio_entries(
     if to_date is not None:
         query = query.filter(Portfolio.entry_date <= to_date)
 
-    entries = query.order_by(Portfolio.entry_date.asc()).all()
+    entries = paginate(
+        query,
+        [SortKey(Portfolio.entry_date), SortKey(Portfolio.id)],
+        response, cursor, limit,
+    )
     return entries
 
 
 @router.get("/latest", response_model=PortfolioResponse)
 def get_latest_portfolio_entry(
-    db: Session = Depends(get_db_connection),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -96,16 +115,38 @@ def create_portfolio_entry(
     )
 
     db.add(db_entry)
+    refresh_daily_equity(db, current_user.id, payload.entry_date)
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(db_entry)
 
     return db_entry
 
 
+@router.get("/export")
+def export_portfolio_entries(
+    format: str = Query(default="csv", pattern="^(csv|ndjson|parquet)$"),
+    from_date: Optional[date] = Query(default=None, description="Filter from this date (inclusive)"),
+    to_date: Optional[date] = Query(default=None, description="Filter up to this date (inclusive)"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream the current user's portfolio entries as csv, ndjson or parquet,
+    by date.
+    """
+    filters = [Portfolio.user_id == current_user.id]
+    if from_date is not None:
+        filters.append(Portfolio.entry_date >= from_date)
+    if to_date is not None:
+        filters.append(Portfolio.entry_date <= to_date)
+
+    return export_response(Portfolio, filters, [Portfolio.entry_date.asc()], format, "portfolio", current_user.id)
+
+
 @router.get("/{portfolio_id}", response_model=PortfolioResponse)
 def get_portfolio_entry_by_id(
     portfolio_id: int,
-    db: Session = Depends(get_db_connection),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -169,11 +210,15 @@ def update_portfolio_entry(
                 detail="Another portfolio entry already exists for this date.",
             )
 
+    old_entry_date = entry.entry_date
+
     for field, value in update_data.items():
         setattr(entry, field, value)
 
     db.add(entry)
+    refresh_daily_equity(db, entry.user_id, min(old_entry_date, entry.entry_date))
     db.commit()
+    bump_data_version(entry.user_id)
     db.refresh(entry)
 
     return entry
@@ -202,5 +247,7 @@ def delete_portfolio_entry(
         )
 
     db.delete(entry)
+    refresh_daily_equity(db, entry.user_id, entry.entry_date)
     db.commit()
+    bump_data_version(entry.user_id)
     return  # 204
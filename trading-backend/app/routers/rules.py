@@ -3,11 +3,13 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, check_etag
 from ..database import get_db_connection
 from ..models import User, Rules
+from ..pagination import MAX_PAGE_SIZE, SortKey, paginate
 from ..auth import get_current_user
 from ..schema import RuleCreate, RuleUpdate, RuleResponse
 
@@ -21,14 +23,25 @@ def is_admin(user: User) -> bool:
 
 @router.get("/", response_model=List[RuleResponse])
 def list_rules(
+    request: Request,
+    response: Response,
     from_date: Optional[date] = Query(default=None, description="Filter from this date (inclusive)"),
     to_date: Optional[date] = Query(default=None, description="Filter up to this date (inclusive)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
     db: Session = Depends(get_db_connection),
     current_user: User = Depends(get_current_user),
 ):
     """
     List rule entries (trading rules / notes) for the current user.
+
+    Pass limit (and then cursor) to page through the list; see paginate().
     """
+    check_etag(
+        request, response, "rules", current_user.id,
+        from_date, to_date, cursor, limit,
+    )
+
     query = db.query(Rules).filter(Rules.user_id == current_user.id)
 
     if from_date is not None:
@@ -36,7 +49,11 @@ def list_rules(
     if to_date is not None:
         query = query.filter(Rules.entry_date <= to_date)
 
-    rules = query.order_by(Rules.entry_date.asc(), Rules.id.asc()).all()
+    rules = paginate(
+        query,
+        [SortKey(Rules.entry_date), SortKey(Rules.id)],
+        response, cursor, limit,
+    )
     return rules
 
 
@@ -82,6 +99,7 @@ def create_rule(
 
     db.add(db_rule)
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(db_rule)
 
     return db_rule
@@ -117,6 +135,7 @@ def update_rule(
 
     db.add(rule)
     db.commit()
+    bump_data_version(rule.user_id)
     db.refresh(rule)
 
     return rule
@@ -146,4 +165,5 @@ def delete_rule(
 
     db.delete(rule)
     db.commit()
+    bump_data_version(rule.user_id)
     return  # 204
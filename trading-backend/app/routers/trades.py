@@ -1,17 +1,29 @@
 # app/routers/trades.py
 
+import csv
+import io
+import json
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import case
 
 
+from ..cache import bump_data_version, check_etag
+from ..config import TRADE_IMPORT_CHUNK_SIZE, TRADE_IMPORT_MAX_BYTES, TRADE_IMPORT_MAX_ROWS
 from ..database import get_db_connection
+from ..exports import export_response
+from ..pagination import MAX_PAGE_SIZE, SortKey, paginate
 from ..models import User, Trades
-from ..auth import get_current_user
-from ..schema import TradeCreate, TradeUpdate, TradeResponse
+from ..pnl_sketches import apply_trade_change, rebuild_pnl_sketches, trade_bucket_entry
+from ..trade_stats import apply_trade_stats_change, rebuild_trade_stats, trade_stat_entries
+from ..auth import get_current_user, get_read_db
+from ..schema import TradeCreate, TradeUpdate, TradeResponse, TradeImportResponse
 
 router = APIRouter()
 
@@ -73,14 +85,159 @@ def _recalculate_metrics(trade: Trades) -> None:
     trade.net = round(net, 2) if net is not None else None
     trade.roi = round(roi, 2) if roi is not None else None
 
+def _recalculate_metrics_bulk(payloads: List[TradeCreate]) -> dict:
+    """
+    _recalculate_metrics for many validated trades at once: the same float
+    operations, done column-wise. Returns {field: float64 array}, NaN where
+    the field is None (open trades have no total / profit_loss / net / roi).
+    Values are not rounded yet.
+    """
+    entry_price = np.array([p.entry_price for p in payloads], dtype=np.float64)
+    exit_price = np.array(
+        [p.exit_price if p.exit_price is not None else np.nan for p in payloads],
+        dtype=np.float64,
+    )
+    contracts = np.array([p.contracts for p in payloads], dtype=np.float64)
+
+    principal = entry_price * contracts * 100
+    total = exit_price * contracts * 100
+    profit_loss = (exit_price - entry_price) * contracts * 100
+
+    safe_principal = np.where(principal > 0, principal, 1.0)
+    roi = np.where(principal > 0, (profit_loss / safe_principal) * 100.0, np.nan)
+
+    return {
+        "principal": principal,
+        "total": total,
+        "profit_loss": profit_loss,
+        "net": profit_loss,
+        "roi": roi,
+    }
+
+
+def _trade_value_errors(payload: TradeCreate) -> List[str]:
+    """The value checks create_trade makes, as messages."""
+    errors = []
+    if payload.contracts <= 0:
+        errors.append("Contracts must be a positive integer.")
+    if payload.entry_price < 0:
+        errors.append("Entry price must be non-negative.")
+    if payload.exit_price is not None and payload.exit_price < 0:
+        errors.append("Exit price must be non-negative.")
+    return errors
+
+
+# Content-Type -> import format for POST /trades/bulk
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def _parse_import_rows(raw: bytes, fmt: str) -> list:
+    """
+    Split an import body into [(row number, dict | error message)], rows
+    numbered from 1. Malformed bodies raise 400; a malformed NDJSON line
+    only fails its row.
+    """
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be UTF-8.",
+        )
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        return [
+            (i, {k.strip(): (v.strip() or None) if v is not None else None
+                 for k, v in row.items() if k is not None})
+            for i, row in enumerate(reader, start=1)
+        ]
+
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Body is not valid JSON.",
+            )
+        if not isinstance(data, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="JSON body must be an array of trades.",
+            )
+        return [
+            (i, row if isinstance(row, dict) else "Row must be an object.")
+            for i, row in enumerate(data, start=1)
+        ]
+
+    rows = []
+    for i, line in enumerate((l for l in text.splitlines() if l.strip()), start=1):
+        try:
+            row = json.loads(line)
+        except ValueError:
+            rows.append((i, "Invalid JSON."))
+            continue
+        rows.append((i, row if isinstance(row, dict) else "Row must be an object."))
+    return rows
+
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Import bodies are limited to {TRADE_IMPORT_MAX_BYTES} bytes.",
+    )
+
+
+async def _request_body(request: Request) -> bytes:
+    """
+    The raw body, refused with 413 past TRADE_IMPORT_MAX_BYTES: up front
+    from Content-Length, or while reading a chunked upload, so an oversized
+    import is never held in memory or parsed.
+    """
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > TRADE_IMPORT_MAX_BYTES:
+        raise _body_too_large()
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > TRADE_IMPORT_MAX_BYTES:
+            raise _body_too_large()
+    return bytes(body)
+
+
+# list_trades order: closed trades newest first, then open trades newest first
+TRADE_LIST_ORDER = [
+    SortKey(
+        case((Trades.close_date.is_(None), 1), else_=0),  # NULLs last (MySQL-safe)
+        value=lambda t: 1 if t.close_date is None else 0,
+    ),
+    SortKey(Trades.close_date, descending=True),
+    SortKey(Trades.entry_date, descending=True),
+    SortKey(Trades.id, descending=True),
+]
+
+
 # --- Routes --- #
 
 @router.get("/", response_model=List[TradeResponse])
 def list_trades(
+    request: Request,
+    response: Response,
     symbol: Optional[str] = Query(default=None, description="Filter by symbol (e.g. 'AAPL')"),
     from_date: Optional[date] = Query(default=None, description="Filter from this entry_date (inclusive)"),
     to_date: Optional[date] = Query(default=None, description="Filter up to this entry_date (inclusive)"),
-    db: Session = Depends(get_db_connection),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -90,7 +247,14 @@ def list_trades(
     - symbol
     - from_date (entry_date >=)
     - to_date (entry_date <=)
+
+    Pass limit (and then cursor) to page through the list; see paginate().
     """
+    check_etag(
+        request, response, "trades", current_user.id,
+        symbol, from_date, to_date, cursor, limit,
+    )
+
     query = db.query(Trades).filter(Trades.user_id == current_user.id)
 
     if symbol is not None:
@@ -102,24 +266,184 @@ def list_trades(
         query = query.filter(Trades.entry_date <= to_date)
 
     # trades = query.order_by(Trades.entry_date.asc(), Trades.id.asc()).all()
-    trades = (
-        query
-        .order_by(
-            (Trades.close_date.is_(None)),  # NULLs last (MySQL-safe)
-            desc(Trades.close_date),        # newest closed trades first
-            desc(Trades.entry_date),        # then newest open trades
-            desc(Trades.id),
-        )
-        .all()
-    )
+    trades = paginate(query, TRADE_LIST_ORDER, response, cursor, limit)
 
     return trades
 
 
+@router.post("/bulk", response_model=TradeImportResponse, status_code=status.HTTP_201_CREATED)
+def import_trades(
+    request: Request,
+    format: Optional[str] = Query(default=None, pattern="^(csv|json|ndjson)$", description="Defaults to the Content-Type"),
+    raw: bytes = Depends(_request_body),
+    db: Session = Depends(get_db_connection),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Import many trades for the current user from a CSV file (header row
+    with the TradeCreate field names), a JSON array or NDJSON.
+
+    Every row is validated like POST /trades/; valid rows are inserted in
+    chunks of TRADE_IMPORT_CHUNK_SIZE, one transaction each, and the rest
+    are reported per row (row numbers start at 1). Bodies over
+    TRADE_IMPORT_MAX_BYTES or TRADE_IMPORT_MAX_ROWS get a 413.
+    """
+    if format is None:
+        media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_FORMATS.get(media_type)
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv, application/json or application/x-ndjson (or pass format).",
+            )
+
+    rows = _parse_import_rows(raw, format)
+    if len(rows) > TRADE_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {TRADE_IMPORT_MAX_ROWS} trades per import.",
+        )
+
+    errors = []
+    valid_rows = []
+    payloads = []
+    for row_number, row in rows:
+        if isinstance(row, str):
+            errors.append({"row": row_number, "errors": [row]})
+            continue
+        try:
+            payload = TradeCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [
+                    f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+                    for err in e.errors()
+                ],
+            })
+            continue
+
+        value_errors = _trade_value_errors(payload)
+        if value_errors:
+            errors.append({"row": row_number, "errors": value_errors})
+            continue
+
+        valid_rows.append(row_number)
+        payloads.append(payload)
+
+    metrics = _recalculate_metrics_bulk(payloads)
+    metrics = {name: values.tolist() for name, values in metrics.items()}
+
+    mappings = []
+    for i, p in enumerate(payloads):
+        mapping = {
+            "user_id": current_user.id,
+            "symbol": p.symbol.upper(),
+            "option_type": p.option_type,
+            "strike_price": p.strike_price,
+            "exp_date": p.exp_date,
+            "entry_price": p.entry_price,
+            "exit_price": p.exit_price,
+            "contracts": p.contracts,
+            "entry_date": p.entry_date,
+            "close_date": p.close_date,
+        }
+        for name, values in metrics.items():
+            v = values[i]
+            mapping[name] = round(v, 2) if v == v else None
+        mappings.append(mapping)
+
+    inserted = 0
+    for start in range(0, len(mappings), TRADE_IMPORT_CHUNK_SIZE):
+        chunk = mappings[start:start + TRADE_IMPORT_CHUNK_SIZE]
+        try:
+            db.bulk_insert_mappings(Trades, chunk)
+            chunk_trades = [Trades(**m) for m in chunk]
+            apply_trade_stats_change(
+                db, current_user.id, [],
+                [entry for t in chunk_trades for entry in trade_stat_entries(t)],
+            )
+            apply_trade_change(
+                db, current_user.id, [],
+                [trade_bucket_entry(t) for t in chunk_trades],
+            )
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            errors.extend(
+                {"row": row_number, "errors": ["Could not be saved."]}
+                for row_number in valid_rows[start:start + TRADE_IMPORT_CHUNK_SIZE]
+            )
+            continue
+        inserted += len(chunk)
+
+    if inserted:
+        bump_data_version(current_user.id)
+
+    errors.sort(key=lambda e: e["row"])
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+
+@router.post("/stats/rebuild")
+def rebuild_trade_aggregates(
+    user_id: Optional[int] = Query(default=None, description="Only this user (default: every user with trades)"),
+    db: Session = Depends(get_db_connection),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Admin repair: recompute the stored trade stats and hold bucket sketches
+    from the Trades table.
+    """
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized.",
+        )
+
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = [r[0] for r in db.query(Trades.user_id).distinct().all()]
+
+    for uid in user_ids:
+        rebuild_trade_stats(db, uid)
+        rebuild_pnl_sketches(db, uid)
+        db.commit()
+        bump_data_version(uid)
+
+    return {
+        "message": "Trade stats rebuilt.",
+        "users_rebuilt": len(user_ids),
+    }
+
+
+@router.get("/export")
+def export_trades(
+    format: str = Query(default="csv", pattern="^(csv|ndjson|parquet)$"),
+    symbol: Optional[str] = Query(default=None, description="Filter by symbol (e.g. 'AAPL')"),
+    from_date: Optional[date] = Query(default=None, description="Filter from this entry_date (inclusive)"),
+    to_date: Optional[date] = Query(default=None, description="Filter up to this entry_date (inclusive)"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream the current user's trades as csv, ndjson or parquet, in id
+    order. Same filters as the list endpoint.
+    """
+    filters = [Trades.user_id == current_user.id]
+    if symbol is not None:
+        filters.append(Trades.symbol == symbol.upper())
+    if from_date is not None:
+        filters.append(Trades.entry_date >= from_date)
+    if to_date is not None:
+        filters.append(Trades.entry_date <= to_date)
+
+    return export_response(Trades, filters, [Trades.id.asc()], format, "trades", current_user.id)
+
+
 @router.get("/{trade_id}", response_model=TradeResponse)
 def get_trade_by_id(
     trade_id: int,
-    db: Session = Depends(get_db_connection),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -199,7 +523,10 @@ def create_trade(
     _recalculate_metrics(db_trade)
 
     db.add(db_trade)
+    apply_trade_change(db, current_user.id, [], [trade_bucket_entry(db_trade)])
+    apply_trade_stats_change(db, current_user.id, [], trade_stat_entries(db_trade))
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(db_trade)
 
     return db_trade
@@ -257,13 +584,19 @@ def update_trade(
     if "symbol" in update_data and update_data["symbol"] is not None:
         update_data["symbol"] = update_data["symbol"].upper()
 
+    old_bucket_entry = trade_bucket_entry(trade)
+    old_stat_entries = trade_stat_entries(trade)
+
     for field, value in update_data.items():
         setattr(trade, field, value)
 
     _recalculate_metrics(trade)
 
     db.add(trade)
+    apply_trade_change(db, trade.user_id, [old_bucket_entry], [trade_bucket_entry(trade)])
+    apply_trade_stats_change(db, trade.user_id, old_stat_entries, trade_stat_entries(trade))
     db.commit()
+    bump_data_version(trade.user_id)
     db.refresh(trade)
 
     return trade
@@ -295,6 +628,9 @@ def delete_trade(
         )
 
     db.delete(trade)
+    apply_trade_change(db, trade.user_id, [trade_bucket_entry(trade)], [])
+    apply_trade_stats_change(db, trade.user_id, trade_stat_entries(trade), [])
     db.commit()
+    bump_data_version(trade.user_id)
     return  # 204
 
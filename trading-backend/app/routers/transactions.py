@@ -3,12 +3,16 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from sqlalchemy.orm import Session
 
+from ..cache import bump_data_version, check_etag
 from ..database import get_db_connection
+from ..exports import export_response
+from ..pagination import MAX_PAGE_SIZE, SortKey, paginate
+from ..daily_equity import refresh_daily_equity
 from ..models import User, Transactions
-from ..auth import get_current_user
+from ..auth import get_current_user, get_read_db
 from ..schema import (
     TransactionCreate,
     TransactionUpdate,
@@ -25,13 +29,17 @@ def is_admin(user: User) -> bool:
 
 @router.get("/", response_model=List[TransactionResponse])
 def list_transactions(
+    request: Request,
+    response: Response,
     from_date: Optional[date] = Query(default=None, description="Filter from this date (inclusive)"),
     to_date: Optional[date] = Query(default=None, description="Filter up to this date (inclusive)"),
     transaction_type: Optional[str] = Query(
         default=None,
         description="Filter by transaction_type: 'deposit' or 'withdrawal'",
     ),
-    db: Session = Depends(get_db_connection),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -41,7 +49,14 @@ def list_transactions(
     - from_date
     - to_date
     - transaction_type ('deposit' or 'withdrawal')
+
+    Pass limit (and then cursor) to page through the list; see paginate().
     """
+    check_etag(
+        request, response, "transactions", current_user.id,
+        from_date, to_date, transaction_type, cursor, limit,
+    )
+
     query = db.query(Transactions).filter(Transactions.user_id == current_user.id)
 
     if from_date is not None:
@@ -57,21 +72,51 @@ def list_transactions(
             )
         query = query.filter(Transactions.transaction_type == tx_type_lower)
 
-    txs = (
-        query
-        .order_by(
-            Transactions.transaction_date.desc(),
-            Transactions.id.desc(),
-        )
-        .all()
+    txs = paginate(
+        query,
+        [
+            SortKey(Transactions.transaction_date, descending=True),
+            SortKey(Transactions.id, descending=True),
+        ],
+        response, cursor, limit,
     )
     return txs
 
 
+@router.get("/export")
+def export_transactions(
+    format: str = Query(default="csv", pattern="^(csv|ndjson|parquet)$"),
+    from_date: Optional[date] = Query(default=None, description="Filter from this date (inclusive)"),
+    to_date: Optional[date] = Query(default=None, description="Filter up to this date (inclusive)"),
+    transaction_type: Optional[str] = Query(
+        default=None,
+        description="Filter by transaction_type: 'deposit' or 'withdrawal'",
+    ),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream the current user's transactions as csv, ndjson or parquet, by
+    date. Same filters as the list endpoint.
+    """
+    filters = [Transactions.user_id == current_user.id]
+    if from_date is not None:
+        filters.append(Transactions.transaction_date >= from_date)
+    if to_date is not None:
+        filters.append(Transactions.transaction_date <= to_date)
+    if transaction_type is not None:
+        filters.append(Transactions.transaction_type == transaction_type)
+
+    return export_response(
+        Transactions, filters,
+        [Transactions.transaction_date.asc(), Transactions.id.asc()],
+        format, "transactions", current_user.id,
+    )
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction_by_id(
     transaction_id: int,
-    db: Session = Depends(get_db_connection),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -134,7 +179,9 @@ def create_transaction(
     )
 
     db.add(db_tx)
+    refresh_daily_equity(db, current_user.id, payload.transaction_date)
     db.commit()
+    bump_data_version(current_user.id)
     db.refresh(db_tx)
     return db_tx
 
@@ -190,10 +237,14 @@ def update_transaction(
                 detail="Amount must be non-negative.",
             )
 
+    old_transaction_date = tx.transaction_date
+
     for field, value in update_data.items():
         setattr(tx, field, value)
 
+    refresh_daily_equity(db, tx.user_id, min(old_transaction_date, tx.transaction_date))
     db.commit()
+    bump_data_version(tx.user_id)
     db.refresh(tx)
     return tx
 
@@ -224,7 +275,9 @@ def delete_transaction(
         )
 
     db.delete(tx)
+    refresh_daily_equity(db, tx.user_id, tx.transaction_date)
     db.commit()
+    bump_data_version(tx.user_id)
     return
 
 
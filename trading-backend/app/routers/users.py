@@ -1,14 +1,15 @@
 # app/routers/users.py
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.database import get_db_connection
 from app.models import User
 from app.schema import UserResponse, UserUpdate
-from app.auth import get_current_user
+from app.auth import get_current_user, invalidate_cached_user
+from app.pagination import MAX_PAGE_SIZE, SortKey, paginate
 
 router = APIRouter()
 
@@ -113,6 +114,7 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
 
     return user
 
@@ -144,19 +146,23 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_cached_user(user_id)
     return  # 204 NO CONTENT
 
 
 @router.get("/", response_model=List[UserResponse])
 def list_users(
+    response: Response,
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
     db: Session = Depends(get_db_connection),
     current_user: User = Depends(get_current_user),
 ):
     """
-    List all users.
+    List all users, by id.
 
     - Admin only (id == 1 for now).
-    - Pagination can be added later.
+    - Pass limit (and then cursor) to page through the list; see paginate().
     """
     if not is_admin(current_user):
         raise HTTPException(
@@ -164,5 +170,5 @@ def list_users(
             detail="Not authorized to list all users.",
         )
 
-    users = db.query(User).all()
+    users = paginate(db.query(User), [SortKey(User.id)], response, cursor, limit)
     return users
@@ -1,7 +1,7 @@
 # app/schema.py
 
 from datetime import date
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 
 from pydantic import BaseModel, EmailStr
 
@@ -148,6 +148,17 @@ class TradeCreate(TradeBase):
     pass
 
 
+class TradeImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class TradeImportResponse(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[TradeImportError]
+
+
 class TradeUpdate(BaseModel):
     symbol: Optional[str] = None
     option_type: Optional[Literal["CALL", "PUT"]] = None
@@ -25,7 +25,54 @@ CREATE TABLE IF NOT EXISTS Portfolio (
     FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
     INDEX (user_id),
     INDEX (entry_date),
-    UNIQUE KEY uq_portfolio_user_date (user_id, entry_date)
+    UNIQUE KEY uq_portfolio_user_date (user_id, entry_date),
+    INDEX idx_portfolio_user_date_balance (user_id, entry_date, balance)
+);
+
+-- Daily Equity (materialized from Portfolio + Transactions)
+CREATE TABLE IF NOT EXISTS DailyEquity (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entry_date DATE NOT NULL,
+    portfolio_close DECIMAL(12, 2) NOT NULL,
+    deposits_pre_open DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    withdrawals_pre_open DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    deposits_after_close DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    withdrawals_after_close DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    actual_value DECIMAL(12, 2) NOT NULL,
+    normalized_value DECIMAL(12, 2) NOT NULL,
+    cumulative_net_flow DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_daily_equity_user_date (user_id, entry_date)
+);
+
+-- Trade P&L sketches (per-user hold bucket percentiles)
+CREATE TABLE IF NOT EXISTS TradePnlSketch (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    bucket VARCHAR(10) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    sketch MEDIUMTEXT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_trade_pnl_sketch_user_bucket (user_id, bucket)
+);
+
+-- Trade Stats (per-user running aggregates: all / symbol / weekday)
+CREATE TABLE IF NOT EXISTS TradeStats (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    dimension VARCHAR(10) NOT NULL,
+    `key` VARCHAR(15) NOT NULL DEFAULT '',
+    count INT NOT NULL DEFAULT 0,
+    realized INT NOT NULL DEFAULT 0,
+    wins INT NOT NULL DEFAULT 0,
+    losses INT NOT NULL DEFAULT 0,
+    sum_win DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    sum_loss DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    hold_count INT NOT NULL DEFAULT 0,
+    sum_hold_days BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_trade_stats_user_dimension_key (user_id, dimension, `key`)
 );
 
 -- Initial Cash
@@ -47,7 +94,8 @@ CREATE TABLE IF NOT EXISTS Rules (
     rule TEXT DEFAULT NULL,
     FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
     INDEX (user_id),
-    INDEX (entry_date)
+    INDEX (entry_date),
+    INDEX idx_rules_user_date (user_id, entry_date)
 );
 
 -- Trades
@@ -71,7 +119,9 @@ CREATE TABLE IF NOT EXISTS Trades (
     INDEX (user_id),
     INDEX (symbol),
     INDEX (entry_date),
-    INDEX (close_date)
+    INDEX (close_date),
+    INDEX idx_trades_user_close_entry (user_id, close_date, entry_date),
+    INDEX idx_trades_user_ledger (user_id, id, symbol, entry_date, close_date, profit_loss)
 );
 
 -- Transactions 
@@ -86,7 +136,8 @@ CREATE TABLE IF NOT EXISTS Transactions (
     FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE,
     INDEX (user_id),
     INDEX (transaction_date),
-    INDEX (transaction_type)
+    INDEX (transaction_type),
+    INDEX idx_transactions_user_date_timing_type (user_id, transaction_date, timing, transaction_type, amount)
 );
 
 -- Financial
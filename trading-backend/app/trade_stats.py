@@ -0,0 +1,212 @@
+# app/trade_stats.py
+
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from .models import Trades, TradeStats, User
+
+
+# TradeStats rows per user:
+# - ("all", "")          every trade
+# - ("symbol", SYMBOL)   realized trades by normalized symbol
+# - ("weekday", NAME)    realized trades by close_date weekday
+#
+# count covers every trade in the row; realized / wins / losses / sums only
+# trades with a profit_loss; hold_count / sum_hold_days trades with both dates.
+DIMENSION_ALL = "all"
+DIMENSION_SYMBOL = "symbol"
+DIMENSION_WEEKDAY = "weekday"
+
+STAT_FIELDS = (
+    "count",
+    "realized",
+    "wins",
+    "losses",
+    "sum_win",
+    "sum_loss",
+    "hold_count",
+    "sum_hold_days",
+)
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def normalize_symbol(symbol: Optional[str]) -> str:
+    return (symbol or "").upper().strip() or "UNKNOWN"
+
+
+def empty_stats() -> dict:
+    return {name: 0 for name in STAT_FIELDS}
+
+
+def _to_decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def trade_stat_entries(trade: Trades) -> list:
+    """[(dimension, key, deltas)] a trade contributes to its owner's TradeStats."""
+    deltas = empty_stats()
+    deltas["count"] = 1
+    realized = trade.profit_loss is not None
+
+    if realized:
+        pl = _to_decimal(trade.profit_loss)
+        deltas["realized"] = 1
+        if pl > 0:
+            deltas["wins"] = 1
+            deltas["sum_win"] = pl
+        elif pl < 0:
+            deltas["losses"] = 1
+            deltas["sum_loss"] = pl
+
+    if trade.entry_date and trade.close_date:
+        deltas["hold_count"] = 1
+        deltas["sum_hold_days"] = (trade.close_date - trade.entry_date).days
+
+    entries = [(DIMENSION_ALL, "", deltas)]
+    if realized:
+        entries.append((DIMENSION_SYMBOL, normalize_symbol(trade.symbol), deltas))
+        if trade.close_date:
+            entries.append((DIMENSION_WEEKDAY, WEEKDAY_NAMES[trade.close_date.weekday()], deltas))
+    return entries
+
+
+def _add_entries(stats: dict, entries: list, sign: int) -> None:
+    for dimension, key, deltas in entries:
+        row = stats.setdefault((dimension, key), empty_stats())
+        for name in STAT_FIELDS:
+            row[name] += sign * deltas[name]
+
+
+def rebuild_trade_stats(db: Session, user_id: int) -> None:
+    """
+    Recompute every TradeStats row for one user from their trades.
+    Like refresh_daily_equity, call before db.commit().
+    """
+    db.flush()
+
+    db.query(TradeStats).filter(TradeStats.user_id == user_id).delete(
+        synchronize_session=False
+    )
+
+    rows = (
+        db.query(Trades.symbol, Trades.entry_date, Trades.close_date, Trades.profit_loss)
+        .filter(Trades.user_id == user_id)
+        .order_by(Trades.id.asc())
+        .all()
+    )
+
+    # Insertion order is first-seen order, which the stats payload keeps.
+    stats = {(DIMENSION_ALL, ""): empty_stats()}
+    for row in rows:
+        _add_entries(stats, trade_stat_entries(row), 1)
+
+    db.bulk_insert_mappings(TradeStats, [
+        {"user_id": user_id, "dimension": dimension, "key": key, **values}
+        for (dimension, key), values in stats.items()
+    ])
+
+
+def apply_trade_stats_change(
+    db: Session,
+    user_id: int,
+    old_entries: list,
+    new_entries: list,
+) -> None:
+    """
+    Replace a trade's old contribution (trade_stat_entries before the write;
+    [] for creates) with its new one ([] for deletes), inside the caller's
+    transaction. Call before db.commit(). Users without stats yet get a
+    full rebuild.
+    """
+    # Serializes writers per user: two concurrent first writes would both
+    # rebuild, and one would fail on the (user_id, dimension, key) key. The
+    # second now waits and then sees the first one's rows.
+    db.query(User.id).filter(User.id == user_id).with_for_update().first()
+
+    rows = {
+        (row.dimension, row.key): row
+        for row in (
+            db.query(TradeStats)
+            .filter(TradeStats.user_id == user_id)
+            .with_for_update()
+            .all()
+        )
+    }
+    if (DIMENSION_ALL, "") not in rows:
+        rebuild_trade_stats(db, user_id)
+        return
+
+    changes = {}
+    _add_entries(changes, old_entries, -1)
+    _add_entries(changes, new_entries, 1)
+
+    for (dimension, key), deltas in changes.items():
+        if not any(deltas.values()):
+            continue
+
+        row = rows.get((dimension, key))
+        if row is None:
+            row = TradeStats(user_id=user_id, dimension=dimension, key=key, **empty_stats())
+            db.add(row)
+
+        for name in STAT_FIELDS:
+            setattr(row, name, (getattr(row, name) or 0) + deltas[name])
+
+
+def load_trade_stats(db: Session, user_id: int) -> Optional[dict]:
+    """
+    A user's TradeStats as {"all": stats, "symbol": {sym: stats},
+    "weekday": {name: stats}} (dicts in first-seen order, empty groups
+    dropped), or None when the user has none yet.
+
+    Each stats dict has the STAT_FIELDS (sums as float) plus total_pnl,
+    the realized P&L summed exactly before the float conversion.
+    """
+    rows = (
+        db.query(TradeStats.dimension, TradeStats.key, *[getattr(TradeStats, n) for n in STAT_FIELDS])
+        .filter(TradeStats.user_id == user_id)
+        .order_by(TradeStats.id.asc())
+        .all()
+    )
+
+    aggregates = {DIMENSION_ALL: None, DIMENSION_SYMBOL: {}, DIMENSION_WEEKDAY: {}}
+    for dimension, key, *values in rows:
+        raw = dict(zip(STAT_FIELDS, values))
+        stats = {
+            name: float(v) if name in ("sum_win", "sum_loss") else int(v)
+            for name, v in raw.items()
+        }
+        stats["total_pnl"] = float(_to_decimal(raw["sum_win"]) + _to_decimal(raw["sum_loss"]))
+
+        if dimension == DIMENSION_ALL:
+            aggregates[DIMENSION_ALL] = stats
+        elif stats["count"]:
+            aggregates[dimension][key] = stats
+
+    if aggregates[DIMENSION_ALL] is None:
+        return None
+    return aggregates
+
+
+if __name__ == "__main__":
+    # Repair: python -m app.trade_stats [user_id ...]
+    import sys
+
+    from .database import SessionLocal
+    from .pnl_sketches import rebuild_pnl_sketches
+
+    db = SessionLocal()
+    try:
+        user_ids = [int(a) for a in sys.argv[1:]] or [
+            r[0] for r in db.query(Trades.user_id).distinct().all()
+        ]
+        for uid in user_ids:
+            rebuild_trade_stats(db, uid)
+            rebuild_pnl_sketches(db, uid)
+            db.commit()
+            print(f"user {uid}: trade stats and hold bucket sketches rebuilt")
+    finally:
+        db.close()
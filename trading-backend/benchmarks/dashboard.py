@@ -0,0 +1,267 @@
+# benchmarks/dashboard.py
+"""
+Latency, query count and peak memory of the dashboard endpoints on
+synthetic users.
+
+    python -m benchmarks.dashboard [--url URL] [--sizes 1000,10000,100000]
+                                   [--years 5] [--repeat 10] [--no-derived]
+                                   [--json PATH] [--baseline PATH]
+
+One user is generated per size in --sizes (that many trades, --years of
+daily portfolio / flow history; see benchmarks.synthetic) in a scratch
+database: in-memory SQLite by default, or an empty MySQL database via
+--url. Requests go through the real app with only the session and the
+current user overridden, so routing, caching and serialization count.
+
+Per endpoint and user:
+- cold: the user's data version is bumped before every request, so each
+  one recomputes (what the first request after a write costs)
+- warm: the same request served from the response cache
+- queries: SQL statements sent by one cold request
+- peak_kb: tracemalloc peak of one cold request
+
+--json writes the results for regression tracking; --baseline compares
+against an earlier file and exits 1 if a cold p50 got slower by more
+than --tolerance or a request sends more queries.
+"""
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import sqlalchemy
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth import get_current_user, get_read_db
+from app.cache import bump_data_version
+from app.database import get_db_connection
+from app.main import app
+from app.models import Base, User
+
+from .synthetic import TRADING_DAYS_PER_YEAR, build_derived, seed_user
+
+
+ENDPOINTS = [
+    "/dashboard",
+    "/dashboard/stats",
+    "/dashboard/charts",
+    "/dashboard/realized-pnl",
+]
+
+DEFAULT_SIZES = "1000,10000,100000"
+
+
+def _percentile(samples: list, p: float) -> float:
+    """Nearest-rank percentile of samples (p in 0-100)."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class Bench:
+    """The app wired to a scratch database, with a SQL statement counter."""
+
+    def __init__(self, url: str):
+        if url == "sqlite://" or url.endswith(":memory:"):
+            self.engine = create_engine(
+                url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+            )
+        else:
+            self.engine = create_engine(url)
+        self.Session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.queries = 0
+        self.users = {}
+        self.user_id = None
+
+        event.listen(self.engine, "before_cursor_execute", self._count)
+
+        app.dependency_overrides[get_db_connection] = self._get_db
+        app.dependency_overrides[get_read_db] = self._get_db
+        app.dependency_overrides[get_current_user] = lambda: self.users[self.user_id]
+        self.client = TestClient(app)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries += 1
+
+    def _get_db(self):
+        db = self.Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def add_user(self, user_id: int, trades: int, days: int, derived: bool, seed: int) -> None:
+        with self.Session() as db:
+            seed_user(db, user_id, trades, days, seed=seed)
+            if derived:
+                build_derived(db, user_id)
+            user = db.get(User, user_id)
+            db.expunge(user)
+        self.users[user_id] = user
+
+    def request(self, path: str, cold: bool) -> tuple:
+        """(status, ms, queries, response bytes) of one GET as self.user_id."""
+        if cold:
+            bump_data_version(self.user_id)
+        self.queries = 0
+        started = time.perf_counter()
+        response = self.client.get(path)
+        elapsed = (time.perf_counter() - started) * 1000
+        return response.status_code, elapsed, self.queries, len(response.content)
+
+    def peak_kb(self, path: str) -> float:
+        bump_data_version(self.user_id)
+        tracemalloc.start()
+        try:
+            self.client.get(path)
+            return tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    def measure(self, user_id: int, path: str, repeat: int) -> dict:
+        self.user_id = user_id
+        self.request(path, cold=True)  # warm-up: imports, pool, first-call caches
+
+        cold = [self.request(path, cold=True) for _ in range(repeat)]
+        warm = [self.request(path, cold=False) for _ in range(repeat)]
+        cold_ms = [ms for _, ms, _, _ in cold]
+        warm_ms = [ms for _, ms, _, _ in warm]
+        status, _, queries, size = cold[-1]
+
+        return {
+            "status": status,
+            "cold_ms": {
+                "p50": round(statistics.median(cold_ms), 3),
+                "p95": round(_percentile(cold_ms, 95), 3),
+                "mean": round(statistics.fmean(cold_ms), 3),
+                "min": round(min(cold_ms), 3),
+            },
+            "warm_ms": {
+                "p50": round(statistics.median(warm_ms), 3),
+                "p95": round(_percentile(warm_ms, 95), 3),
+            },
+            "queries": queries,
+            "peak_kb": round(self.peak_kb(path), 1),
+            "bytes": size,
+        }
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Regressions of results against a baseline report, printed as a table."""
+    previous = {(r["trades"], r["endpoint"]): r for r in baseline.get("results", [])}
+    regressions = []
+
+    print(f"\nvs baseline {baseline.get('meta', {}).get('revision') or '?'}")
+    for r in results:
+        old = previous.get((r["trades"], r["endpoint"]))
+        if old is None:
+            continue
+        ratio = r["cold_ms"]["p50"] / old["cold_ms"]["p50"] if old["cold_ms"]["p50"] else 1.0
+        flags = []
+        if ratio > 1 + tolerance:
+            flags.append("SLOWER")
+        if r["queries"] > old["queries"]:
+            flags.append("MORE QUERIES")
+        print(
+            f"  {r['trades']:>7} {r['endpoint']:<28} p50 x{ratio:5.2f}"
+            f"  queries {old['queries']:>3} -> {r['queries']:<3} {' '.join(flags)}"
+        )
+        if flags:
+            regressions.append(r)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="scratch database URL (must be empty)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="trades per user, comma separated")
+    parser.add_argument("--years", type=float, default=5, help="daily history per user")
+    parser.add_argument("--repeat", type=int, default=10, help="timed requests per endpoint")
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, help="paths to request")
+    parser.add_argument("--no-derived", action="store_true",
+                        help="skip DailyEquity / TradeStats / sketches (measure the fallbacks)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--baseline", help="earlier --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed cold p50 slowdown vs the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    days = round(args.years * TRADING_DAYS_PER_YEAR)
+
+    bench = Bench(args.url)
+    # SQLite stores Numeric as float; irrelevant to the timings.
+    warnings.filterwarnings("ignore", message="Dialect sqlite\\+pysqlite does \\*not\\* support Decimal")
+
+    Base.metadata.create_all(bench.engine)
+    with bench.Session() as db:
+        if db.query(User.id).first() is not None:
+            print("refusing to run: the database already has users", file=sys.stderr)
+            return 1
+
+    for user_id, trades in enumerate(sizes, 1):
+        started = time.perf_counter()
+        bench.add_user(user_id, trades, days, not args.no_derived, args.seed)
+        print(f"seeded {trades} trades / {days} days in {time.perf_counter() - started:.1f}s",
+              file=sys.stderr)
+
+    results = []
+    print(f"{'trades':>7} {'endpoint':<28} {'status':>6} {'cold p50':>9} {'p95':>9}"
+          f" {'warm p50':>9} {'queries':>7} {'peak KB':>9} {'bytes':>9}")
+    for user_id, trades in enumerate(sizes, 1):
+        for path in args.endpoints:
+            r = {"trades": trades, "days": days, "endpoint": path,
+                 **bench.measure(user_id, path, args.repeat)}
+            results.append(r)
+            print(f"{trades:>7} {path:<28} {r['status']:>6} {r['cold_ms']['p50']:>9.2f}"
+                  f" {r['cold_ms']['p95']:>9.2f} {r['warm_ms']['p50']:>9.2f}"
+                  f" {r['queries']:>7} {r['peak_kb']:>9.0f} {r['bytes']:>9}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "dialect": bench.engine.dialect.name,
+            "derived": not args.no_derived,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# benchmarks/query_plans.py
+"""
+Query plans of the per-user dashboard queries before and after the
+composite indexes (alembic revision 3f6c1a9d2b7e).
+
+    python -m benchmarks.query_plans [--url URL] [--users N] [--days N]
+                                     [--trades N] [--repeat N] [--json PATH]
+
+Builds the schema on a scratch database (in-memory SQLite by default; a
+MySQL URL must point at an empty database), drops the idx_* indexes,
+seeds synthetic users and runs the app's own loaders for one of them,
+capturing the SQL they send. Each captured SELECT is EXPLAINed and
+timed, then the indexes are created and everything runs again.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import warnings
+from datetime import date, timedelta
+
+from fastapi import Response
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.ledger import load_cash_flow_index, load_daily_summary_snapshot, load_ledger_snapshot
+from app.models import Base, Rules, Trades, User
+from app.pagination import SortKey, paginate
+from app.pnl_sketches import rebuild_pnl_sketches
+from app.routers.trades import TRADE_LIST_ORDER
+from app.trade_stats import rebuild_trade_stats
+
+from .synthetic import seed_user
+
+
+COMPOSITE_INDEXES = [
+    index
+    for table in Base.metadata.sorted_tables
+    for index in table.indexes
+    if index.name and index.name.startswith("idx_")
+]
+
+
+# -----------------------------
+# Scenarios: the app's loaders, run for one user
+# -----------------------------
+
+def _rebuild_derived(db, user_id: int) -> None:
+    rebuild_pnl_sketches(db, user_id)
+    rebuild_trade_stats(db, user_id)
+    db.rollback()
+
+
+def _trade_list_page(db, user_id: int) -> None:
+    query = db.query(Trades).filter(Trades.user_id == user_id)
+    paginate(query, TRADE_LIST_ORDER, Response(), limit=100)
+
+
+def _rules_range(db, user_id: int) -> None:
+    query = db.query(Rules).filter(
+        Rules.user_id == user_id,
+        Rules.entry_date >= date.today() - timedelta(days=180),
+        Rules.entry_date <= date.today() - timedelta(days=90),
+    )
+    paginate(query, [SortKey(Rules.entry_date), SortKey(Rules.id)], Response(), limit=100)
+
+
+SCENARIOS = [
+    ("cash_flow_index", lambda db, uid: load_cash_flow_index(db, uid)),
+    ("daily_summary", load_daily_summary_snapshot),
+    ("ledger_snapshot", lambda db, uid: load_ledger_snapshot(db, uid, trades=True)),
+    ("derived_rebuild", _rebuild_derived),
+    ("trade_list_page", _trade_list_page),
+    ("rules_range", _rules_range),
+]
+
+
+# -----------------------------
+# EXPLAIN / timing
+# -----------------------------
+
+def capture_selects(engine, Session, user_id: int) -> dict:
+    """{scenario: [(statement, parameters)]} for every SELECT it sends."""
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        statements = {}
+        for name, run in SCENARIOS:
+            captured.clear()
+            db = Session()
+            try:
+                run(db, user_id)
+            finally:
+                db.close()
+            statements[name] = list(captured)
+        return statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def explain(conn, statement: str, parameters) -> list:
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return [row[-1] for row in rows]
+
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().fetchall()
+    return [
+        f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row['Extra'] or ''}".rstrip()
+        for row in rows
+    ]
+
+
+def time_statement(conn, statement: str, parameters, repeat: int) -> float:
+    """Median wall time in ms, after one warm-up run."""
+    conn.exec_driver_sql(statement, parameters).fetchall()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.exec_driver_sql(statement, parameters).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def analyze(conn) -> None:
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("ANALYZE")
+    else:
+        for table in ("Portfolio", "Transactions", "Trades", "Rules"):
+            conn.exec_driver_sql(f"ANALYZE TABLE `{table}`").fetchall()
+
+
+def measure(engine, Session, user_id: int, repeat: int) -> dict:
+    statements = capture_selects(engine, Session, user_id)
+    with engine.connect() as conn:
+        analyze(conn)
+        return {
+            name: [
+                {
+                    "sql": " ".join(statement.split()),
+                    "plan": explain(conn, statement, parameters),
+                    "ms": round(time_statement(conn, statement, parameters, repeat), 3),
+                }
+                for statement, parameters in captured
+            ]
+            for name, captured in statements.items()
+        }
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def make_engine(url: str):
+    if url == "sqlite://" or url.endswith(":memory:"):
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    return create_engine(url)
+
+
+def print_report(report: dict) -> None:
+    for name, before in report["before"].items():
+        after = report["after"][name]
+        print(f"\n== {name}")
+        for i, (b, a) in enumerate(zip(before, after), 1):
+            print(f"  [{i}] {b['sql'][:110]}{'...' if len(b['sql']) > 110 else ''}")
+            print(f"      before {b['ms']:9.3f} ms")
+            for line in b["plan"]:
+                print(f"        {line}")
+            print(f"      after  {a['ms']:9.3f} ms")
+            for line in a["plan"]:
+                print(f"        {line}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="scratch database URL (must be empty)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=1500, help="trading days of history per user")
+    parser.add_argument("--trades", type=int, default=1000, help="trades per user")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per statement")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.url)
+    # SQLite stores Numeric as float; irrelevant to the plans.
+    warnings.filterwarnings("ignore", message="Dialect sqlite\\+pysqlite does \\*not\\* support Decimal")
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    Base.metadata.create_all(engine)
+    with Session() as db:
+        if db.query(User.id).first() is not None:
+            print("refusing to run: the database already has users", file=sys.stderr)
+            return 1
+
+    existing = {
+        table: {index["name"] for index in inspect(engine).get_indexes(table)}
+        for table in {index.table.name for index in COMPOSITE_INDEXES}
+    }
+    for index in COMPOSITE_INDEXES:
+        if index.name in existing[index.table.name]:
+            index.drop(bind=engine)
+
+    with Session() as db:
+        for uid in range(1, args.users + 1):
+            seed_user(db, uid, args.trades, args.days, seed=args.seed)
+    user_id = (args.users + 1) // 2
+
+    report = {
+        "dialect": engine.dialect.name,
+        "users": args.users,
+        "days": args.days,
+        "trades": args.trades,
+        "indexes": [index.name for index in COMPOSITE_INDEXES],
+    }
+    report["before"] = measure(engine, Session, user_id, args.repeat)
+    for index in COMPOSITE_INDEXES:
+        index.create(bind=engine)
+    report["after"] = measure(engine, Session, user_id, args.repeat)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
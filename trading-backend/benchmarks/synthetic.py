@@ -0,0 +1,156 @@
+# benchmarks/synthetic.py
+"""
+Reproducible synthetic users for the benchmarks.
+
+A user gets `days` weekdays of history ending at `end`: one Portfolio row
+per day, deposits / withdrawals and rule notes on a fraction of the days,
+a Financial row per month and `trades` option trades (90% closed) spread
+over the history. The same seed always yields the same rows.
+"""
+
+import random
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.daily_equity import refresh_daily_equity
+from app.models import Financial, InitialCash, Portfolio, Rules, Trades, Transactions, User
+from app.pnl_sketches import rebuild_pnl_sketches
+from app.trade_stats import rebuild_trade_stats
+
+
+SYMBOLS = ["AAPL", "TSLA", "SPY", "QQQ", "NVDA", "AMD", "MSFT", "META"]
+
+# Rows per bulk_insert_mappings call, so 100k-trade users stay cheap to build.
+INSERT_BATCH_SIZE = 5000
+
+TRADING_DAYS_PER_YEAR = 261
+
+
+def trading_days(days: int, end: date) -> list:
+    """The `days` weekdays up to and including end (or the Friday before it)."""
+    out = []
+    day = end
+    while len(out) < days:
+        if day.weekday() < 5:
+            out.append(day)
+        day -= timedelta(days=1)
+    out.reverse()
+    return out
+
+
+def _insert(db: Session, model, rows: list) -> None:
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.bulk_insert_mappings(model, rows[i:i + INSERT_BATCH_SIZE])
+
+
+def _trade_row(user_id: int, dates: list, rnd: random.Random) -> dict:
+    entry_date = rnd.choice(dates)
+    entry_price = round(rnd.uniform(0.5, 8), 2)
+    contracts = rnd.randint(1, 10)
+    row = {
+        "user_id": user_id,
+        "symbol": rnd.choice(SYMBOLS),
+        "option_type": rnd.choice(["CALL", "PUT"]),
+        "strike_price": 100,
+        "exp_date": entry_date + timedelta(days=30),
+        "entry_price": entry_price,
+        "contracts": contracts,
+        "entry_date": entry_date,
+        "principal": round(entry_price * contracts * 100, 2),
+    }
+
+    close_date = entry_date + timedelta(days=rnd.randint(0, 25))
+    if rnd.random() < 0.9 and close_date <= dates[-1]:
+        exit_price = round(entry_price * rnd.uniform(0.2, 2.2), 2)
+        profit_loss = round((exit_price - entry_price) * contracts * 100, 2)
+        row.update(
+            exit_price=exit_price,
+            close_date=close_date,
+            total=round(exit_price * contracts * 100, 2),
+            net=profit_loss,
+            profit_loss=profit_loss,
+            roi=round(profit_loss / row["principal"] * 100, 2),
+        )
+    return row
+
+
+def seed_user(
+    db: Session,
+    user_id: int,
+    trades: int,
+    days: int,
+    end: Optional[date] = None,
+    seed: int = 1,
+) -> None:
+    """Insert one synthetic user and their history, then commit."""
+    rnd = random.Random(f"{seed}:{user_id}")
+    dates = trading_days(days, end or date.today())
+
+    db.bulk_insert_mappings(User, [{
+        "id": user_id,
+        "fname": "Bench",
+        "lname": str(user_id),
+        "username": f"bench{user_id}",
+        "email": f"bench{user_id}@example.com",
+        "password_hash": "x",
+        "account_type": "personal",
+    }])
+    db.bulk_insert_mappings(InitialCash, [
+        {"user_id": user_id, "entry_date": dates[0], "initial_cash": 10000}
+    ])
+
+    portfolio, flows, rules, financial = [], [], [], []
+    balance = 10000.0
+    month = None
+    for day in dates:
+        balance *= 1 + rnd.uniform(-0.02, 0.022)
+        if rnd.random() < 0.08:
+            amount = rnd.choice([100, 250, 500, 1000])
+            kind = "withdrawal" if rnd.random() < 0.3 else "deposit"
+            balance += amount if kind == "deposit" else -amount
+            flows.append({
+                "user_id": user_id,
+                "transaction_type": kind,
+                "transaction_date": day,
+                "amount": amount,
+                "timing": rnd.choice(["pre_open", "after_close"]),
+            })
+        balance = max(balance, 100.0)
+        portfolio.append({"user_id": user_id, "entry_date": day, "balance": round(balance, 2)})
+
+        if rnd.random() < 0.1:
+            rules.append({"user_id": user_id, "entry_date": day, "rule": "note"})
+
+        if (day.year, day.month) != month:
+            month = (day.year, day.month)
+            income = rnd.choice([4000, 5000, 6000])
+            financial.append({
+                "user_id": user_id,
+                "entry_date": day,
+                "income": income,
+                "nec": income * 0.55,
+                "ffa": income * 0.1,
+                "play": income * 0.1,
+                "ltss": income * 0.1,
+                "give": income * 0.05,
+                "expenses": income * 0.8,
+                "gains": round(rnd.uniform(-500, 800), 2),
+                "networth": round(balance + 20000, 2),
+            })
+
+    _insert(db, Portfolio, portfolio)
+    _insert(db, Transactions, flows)
+    _insert(db, Rules, rules)
+    _insert(db, Financial, financial)
+    _insert(db, Trades, [_trade_row(user_id, dates, rnd) for _ in range(trades)])
+    db.commit()
+
+
+def build_derived(db: Session, user_id: int) -> None:
+    """Fill DailyEquity, TradeStats and TradePnlSketch as the write paths would."""
+    refresh_daily_equity(db, user_id)
+    rebuild_trade_stats(db, user_id)
+    rebuild_pnl_sketches(db, user_id)
+    db.commit()
@@ -0,0 +1,58 @@
+# tests/conftest.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import cache
+from app.auth import UserPrincipal, get_current_user, get_read_db
+from app.database import get_db_connection
+from app.main import app
+from app.models import Base
+
+USER_ID = 2
+
+
+def pytest_configure(config):
+    # SQLite stores Numeric as float; irrelevant to these tests.
+    config.addinivalue_line(
+        "filterwarnings", "ignore:Dialect sqlite\\+pysqlite does \\*not\\* support Decimal"
+    )
+
+
+@pytest.fixture
+def Session():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(Session, monkeypatch):
+    """The app on the scratch database, signed in as USER_ID, with an empty cache."""
+    monkeypatch.setattr(
+        cache, "backend",
+        cache.InProcessCacheBackend(cache.CACHE_MAX_ENTRIES, cache.CACHE_MAX_BYTES),
+    )
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_connection] = get_db
+    app.dependency_overrides[get_read_db] = get_db
+    app.dependency_overrides[get_current_user] = lambda: UserPrincipal(
+        USER_ID, f"bench{USER_ID}", f"bench{USER_ID}@example.com", "personal"
+    )
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,158 @@
+# tests/test_dashboard_async.py
+#
+# The async dashboard routes (mounted when ASYNC_DB_DRIVER / ASYNC_DB_URL is
+# set) must answer exactly like the sync ones: same bytes, same ETag.
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import auth, cache, database
+from app.main import app
+from app.models import Base, DailyEquity, TradePnlSketch, TradeStats, Trades
+from app.routers.dashboard import router as dashboard_router
+from app.routers.dashboard_async import router as dashboard_async_router
+from benchmarks.synthetic import build_derived, seed_user
+
+from .conftest import USER_ID
+
+pytest.importorskip("aiosqlite")
+
+PATHS = [
+    "/dashboard",
+    "/dashboard/today",
+    "/dashboard/stats",
+    "/dashboard/charts",
+    "/dashboard/charts?format=columnar&max_points=50",
+    "/dashboard/charts?encoding=msgpack&range=3M",
+    "/dashboard/charts?from=2025-01-01&to=2025-06-30",
+    "/dashboard/drawdown",
+    "/dashboard/drawdown?format=columnar&encoding=msgpack",
+    "/dashboard/realized-pnl",
+    "/dashboard/realized-pnl?range=1Y",
+]
+
+
+@pytest.fixture
+def Session(tmp_path):
+    """File database, so the sync and the aiosqlite engine see the same rows."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+
+def _async_factory(Session):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    url = str(Session.kw["bind"].url).replace("sqlite://", "sqlite+aiosqlite://", 1)
+    engine = create_async_engine(url, poolclass=NullPool)
+    return sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def async_client(client, Session, monkeypatch):
+    """Same app setup as main.py with an async database: async routes first."""
+    monkeypatch.setattr(database, "AsyncSessionLocal", _async_factory(Session))
+
+    async_app = FastAPI()
+    async_app.include_router(dashboard_async_router, tags=["dashboard"])
+    async_app.include_router(dashboard_router, tags=["dashboard"])
+    async_app.dependency_overrides = app.dependency_overrides
+    yield TestClient(async_app)
+
+
+def _get(client, path: str):
+    # Compute every time: the cache is shared between the two apps.
+    cache.backend._entries.clear()
+    r = client.get(path)
+    assert r.status_code == 200, (path, r.text)
+    return r.content, r.headers["etag"], r.headers["content-type"]
+
+
+def _assert_same(client, async_client) -> None:
+    for path in PATHS:
+        assert _get(async_client, path) == _get(client, path), path
+
+
+@pytest.mark.parametrize("derived", [True, False])
+def test_async_routes_match_sync(client, async_client, Session, derived):
+    with Session() as db:
+        seed_user(db, USER_ID, trades=300, days=400)
+        if derived:
+            build_derived(db, USER_ID)
+            assert db.query(DailyEquity).count() and db.query(TradeStats).count()
+        else:
+            assert not db.query(TradePnlSketch).count()
+
+    _assert_same(client, async_client)
+
+
+def test_async_routes_are_mounted_with_async_db_url():
+    script = (
+        "from app.main import app\n"
+        "from app.routers.dashboard_async import router\n"
+        "first = next(r for r in app.routes if getattr(r, 'path', None) == '/dashboard')\n"
+        "print(first.endpoint in [r.endpoint for r in router.routes])\n"
+    )
+    env = {**os.environ, "ASYNC_DB_URL": "sqlite+aiosqlite://"}
+    out = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert out.stdout.strip() == "True"
+
+
+@pytest.fixture
+def async_replica(async_client, Session, tmp_path, monkeypatch):
+    """A lagging async replica: it has the user's first 20 trades, the primary 30."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(engine)
+    Replica = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    for factory, trades in ((Session, 30), (Replica, 20)):
+        with factory() as db:
+            seed_user(db, USER_ID, trades=trades, days=60)
+            build_derived(db, USER_ID)
+
+    AsyncReplica = _async_factory(Replica)
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", AsyncReplica)
+    monkeypatch.setattr(auth, "AsyncReadSessionLocal", AsyncReplica)
+    monkeypatch.setattr(cache, "READ_YOUR_WRITES_SECONDS", 0.2)
+    yield Replica
+    engine.dispose()
+
+
+def _realized(factory) -> int:
+    with factory() as db:
+        return db.query(Trades).filter(Trades.profit_loss.isnot(None)).count()
+
+
+def test_async_reads_go_to_the_replica_uncached(async_client, Session, async_replica):
+    r = async_client.get("/dashboard/stats")
+    assert r.json()["total_trades"] == _realized(async_replica) != _realized(Session)
+    assert "ETag" not in r.headers
+    assert not [k for k in cache.backend._entries if k.startswith("resp:")]
+
+
+def test_async_own_writes_are_read_from_the_primary(client, async_client, Session, async_replica):
+    r = client.post("/portfolio/", json={"entry_date": "2000-01-03", "balance": 1000})
+    assert r.status_code == 201
+
+    r = async_client.get("/dashboard/stats")
+    assert r.json()["total_trades"] == _realized(Session)
+    assert "ETag" in r.headers
+
+    # Past the window the lagging replica is read again, but the body cached
+    # from the primary under the current version is still what is served.
+    time.sleep(0.3)
+    assert async_client.get("/dashboard/stats").json()["total_trades"] == _realized(Session)
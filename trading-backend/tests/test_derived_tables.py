@@ -0,0 +1,169 @@
+# tests/test_derived_tables.py
+#
+# DailyEquity, TradeStats and TradePnlSketch are maintained incrementally by
+# the write routes. After every write the dashboard must read the same as
+# with those rows dropped, i.e. computed from the base tables.
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.cache import bump_data_version
+from app.models import DailyEquity, Portfolio, TradePnlSketch, TradeStats
+from benchmarks.synthetic import build_derived, seed_user
+
+from .conftest import USER_ID
+
+DERIVED = (DailyEquity, TradeStats, TradePnlSketch)
+
+ENDPOINTS = [
+    "/dashboard",
+    "/dashboard/today",
+    "/dashboard/stats",
+    "/dashboard/charts",
+    "/dashboard/charts?range=1M",
+    "/dashboard/drawdown",
+    "/dashboard/realized-pnl?range=1M",
+]
+
+END = date.today() - timedelta(days=7)
+
+
+def _dashboard(client) -> dict:
+    bump_data_version(USER_ID)
+    responses = {path: client.get(path) for path in ENDPOINTS}
+    assert {path: r.status_code for path, r in responses.items()} == {path: 200 for path in ENDPOINTS}
+    return {path: r.json() for path, r in responses.items()}
+
+
+def assert_matches_rebuild(client, Session) -> None:
+    """Dashboard with the stored derived rows == dashboard without them."""
+    maintained = _dashboard(client)
+
+    with Session() as db:
+        saved = {
+            model: [
+                {c.name: getattr(row, c.name) for c in model.__table__.columns}
+                for row in db.query(model).filter(model.user_id == USER_ID)
+            ]
+            for model in DERIVED
+        }
+        for model in DERIVED:
+            db.query(model).filter(model.user_id == USER_ID).delete()
+        db.commit()
+
+    try:
+        assert _dashboard(client) == maintained
+    finally:
+        with Session() as db:
+            for model, rows in saved.items():
+                db.bulk_insert_mappings(model, rows)
+            db.commit()
+
+
+def _trade(entry: date, close=None, exit_price=None, symbol="AAPL") -> dict:
+    return {
+        "symbol": symbol,
+        "option_type": "CALL",
+        "strike_price": 100,
+        "exp_date": (entry + timedelta(days=30)).isoformat(),
+        "entry_price": 2.5,
+        "contracts": 3,
+        "entry_date": entry.isoformat(),
+        "close_date": close and close.isoformat(),
+        "exit_price": exit_price,
+    }
+
+
+@pytest.fixture
+def backfilled(Session):
+    with Session() as db:
+        seed_user(db, USER_ID, trades=80, days=120, end=END)
+        build_derived(db, USER_ID)
+
+
+def test_first_write_without_backfill_rebuilds_daily_equity(client, Session):
+    with Session() as db:
+        seed_user(db, USER_ID, trades=40, days=120, end=END)
+
+    r = client.post("/portfolio/", json={"entry_date": (END + timedelta(days=3)).isoformat(), "balance": 12345.67})
+    assert r.status_code == 201
+
+    with Session() as db:
+        days = db.query(Portfolio).filter(Portfolio.user_id == USER_ID).count()
+        assert db.query(DailyEquity).filter(DailyEquity.user_id == USER_ID).count() == days
+    assert_matches_rebuild(client, Session)
+
+
+def test_portfolio_writes(client, Session, backfilled):
+    r = client.post("/portfolio/", json={"entry_date": (END + timedelta(days=3)).isoformat(), "balance": 15000})
+    assert r.status_code == 201
+    assert_matches_rebuild(client, Session)
+    entry_id = r.json()["id"]
+
+    # Moved into the middle of the history (a weekend, so no clash).
+    saturday = END - timedelta(days=30)
+    saturday -= timedelta(days=(saturday.weekday() - 5) % 7)
+    assert client.put(f"/portfolio/{entry_id}", json={"entry_date": saturday.isoformat(), "balance": 9000}).status_code == 200
+    assert_matches_rebuild(client, Session)
+
+    assert client.delete(f"/portfolio/{entry_id}").status_code == 204
+    assert_matches_rebuild(client, Session)
+
+
+def test_transaction_writes(client, Session, backfilled):
+    r = client.post("/transactions/", json={
+        "transaction_type": "deposit",
+        "transaction_date": (END - timedelta(days=40)).isoformat(),
+        "amount": 750,
+        "timing": "pre_open",
+    })
+    assert r.status_code == 201
+    assert_matches_rebuild(client, Session)
+    tx_id = r.json()["id"]
+
+    r = client.put(f"/transactions/{tx_id}", json={
+        "transaction_type": "withdrawal",
+        "transaction_date": (END - timedelta(days=10)).isoformat(),
+        "timing": "after_close",
+    })
+    assert r.status_code == 200
+    assert_matches_rebuild(client, Session)
+
+    assert client.delete(f"/transactions/{tx_id}").status_code == 204
+    assert_matches_rebuild(client, Session)
+
+
+def test_trade_writes(client, Session, backfilled):
+    entry = END - timedelta(days=20)
+    r = client.post("/trades/", json=_trade(entry, entry + timedelta(days=2), 3.75, symbol="ZZZ"))
+    assert r.status_code == 201
+    assert_matches_rebuild(client, Session)
+    trade_id = r.json()["id"]
+
+    # Different symbol, weekday and hold bucket; then reopened.
+    r = client.put(f"/trades/{trade_id}", json={"symbol": "SPY", "close_date": (entry + timedelta(days=9)).isoformat(), "exit_price": 1.1})
+    assert r.status_code == 200
+    assert_matches_rebuild(client, Session)
+
+    r = client.post("/trades/", json=_trade(entry))
+    assert r.status_code == 201
+    assert_matches_rebuild(client, Session)
+
+    assert client.delete(f"/trades/{trade_id}").status_code == 204
+    assert_matches_rebuild(client, Session)
+
+
+def test_bulk_import(client, Session, backfilled, monkeypatch):
+    from app.routers import trades
+
+    monkeypatch.setattr(trades, "TRADE_IMPORT_CHUNK_SIZE", 7)
+    rows = [
+        _trade(END - timedelta(days=i), END - timedelta(days=i % 5), 1 + i % 4, symbol=f"S{i % 3}")
+        for i in range(5, 30)
+    ] + [_trade(END - timedelta(days=2))]
+
+    r = client.post("/trades/bulk", json=rows)
+    assert r.status_code == 201
+    assert r.json()["inserted"] == len(rows)
+    assert_matches_rebuild(client, Session)
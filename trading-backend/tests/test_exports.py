@@ -0,0 +1,120 @@
+# tests/test_exports.py
+
+import csv
+import io
+import json
+import sys
+from datetime import date
+
+import pytest
+
+from app import database, exports
+from app.exports import export_columns
+from app.models import Trades, Transactions
+from benchmarks.synthetic import seed_user
+
+from .conftest import USER_ID
+
+# Not a divisor of the row counts below, so the last batch is partial.
+BATCH_SIZE = 7
+
+TRADE_COLUMNS = export_columns(Trades)
+TRADE_NAMES = [name for name, _ in TRADE_COLUMNS]
+
+
+@pytest.fixture
+def seeded(client, Session, monkeypatch):
+    with Session() as db:
+        seed_user(db, USER_ID, trades=75, days=250)
+        seed_user(db, USER_ID + 1, trades=20, days=60)
+
+    # Exports open their own session, outside the request's dependencies.
+    monkeypatch.setattr(database, "SessionLocal", Session)
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", BATCH_SIZE)
+
+
+def _value(kind: str, v):
+    if v is None or v == "":
+        return None
+    if kind == "int":
+        return int(v)
+    if kind == "money":
+        return round(float(v), 2)
+    if kind == "date":
+        return v if isinstance(v, date) else date.fromisoformat(v)
+    return v
+
+
+def _rows(columns, rows) -> list:
+    return [[_value(kind, v) for (_, kind), v in zip(columns, row)] for row in rows]
+
+
+def _expected(Session, model, columns, *filters, order_by=None) -> list:
+    with Session() as db:
+        query = (
+            db.query(*[getattr(model, name) for name, _ in columns])
+            .filter(model.user_id == USER_ID, *filters)
+            .order_by(*(order_by or [model.id.asc()]))
+        )
+        return _rows(columns, query.all())
+
+
+def test_csv(client, Session, seeded):
+    r = client.get("/trades/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"] == 'attachment; filename="trades.csv"'
+
+    header, *rows = list(csv.reader(io.StringIO(r.text)))
+    assert header == TRADE_NAMES
+    expected = _expected(Session, Trades, TRADE_COLUMNS)
+    assert len(expected) == 75
+    assert _rows(TRADE_COLUMNS, rows) == expected
+
+
+def test_csv_filters(client, Session, seeded):
+    r = client.get("/trades/export", params={
+        "symbol": "aapl", "from_date": "2000-01-01", "to_date": date.today().isoformat(),
+    })
+    _, *rows = list(csv.reader(io.StringIO(r.text)))
+    expected = _expected(Session, Trades, TRADE_COLUMNS, Trades.symbol == "AAPL")
+    assert expected
+    assert _rows(TRADE_COLUMNS, rows) == expected
+
+
+def test_ndjson(client, Session, seeded):
+    columns = export_columns(Transactions)
+    r = client.get("/transactions/export", params={"format": "ndjson", "transaction_type": "deposit"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert len(records) > BATCH_SIZE
+    assert all(list(record) == [name for name, _ in columns] for record in records)
+    assert _rows(columns, [list(record.values()) for record in records]) == _expected(
+        Session, Transactions, columns, Transactions.transaction_type == "deposit",
+        order_by=[Transactions.transaction_date.asc(), Transactions.id.asc()],
+    )
+
+
+def test_parquet(client, Session, seeded):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    r = client.get("/trades/export", params={"format": "parquet"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/vnd.apache.parquet"
+
+    table = pq.read_table(io.BytesIO(r.content))
+    assert table.schema.names == TRADE_NAMES
+    # One row group per batch.
+    assert pq.ParquetFile(io.BytesIO(r.content)).num_row_groups == -(-75 // BATCH_SIZE)
+    rows = [list(record.values()) for record in table.to_pylist()]
+    assert _rows(TRADE_COLUMNS, rows) == _expected(Session, Trades, TRADE_COLUMNS)
+
+
+def test_parquet_without_pyarrow_is_406(client, seeded, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+
+    r = client.get("/trades/export", params={"format": "parquet"})
+    assert r.status_code == 406
@@ -0,0 +1,26 @@
+# tests/test_pagination.py
+
+import base64
+import json
+
+import pytest
+
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("path", ["/portfolio/", "/transactions/", "/trades/", "/financial/"])
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    _cursor({"a": 1}),
+    _cursor([1]),
+    _cursor([1, 2]),
+    _cursor([{"a": 1}, 2]),
+    _cursor([[1], 2]),
+    _cursor(["2026-13-01", 2]),
+])
+def test_malformed_cursor_is_a_400(client, path, cursor):
+    r = client.get(path, params={"cursor": cursor, "limit": 10})
+    assert r.status_code == 400
+    assert r.json() == {"detail": "Invalid cursor."}
@@ -0,0 +1,131 @@
+# tests/test_trade_import.py
+
+import json
+
+import pytest
+
+from app.models import TradePnlSketch, Trades, TradeStats
+from app.pnl_sketches import rebuild_pnl_sketches
+from app.routers import trades
+from app.trade_stats import rebuild_trade_stats
+from benchmarks.synthetic import build_derived, seed_user
+
+from .conftest import USER_ID
+
+CSV_HEADER = "symbol,option_type,strike_price,exp_date,entry_price,exit_price,contracts,entry_date,close_date\n"
+
+
+def _row(i: int, **overrides) -> dict:
+    row = {
+        "symbol": ["aapl", "SPY", "tsla"][i % 3],
+        "option_type": "CALL" if i % 2 else "PUT",
+        "strike_price": 100 + i,
+        "exp_date": "2026-06-19",
+        "entry_price": 1 + i % 5,
+        "exit_price": 0.5 + i % 7 if i % 4 else None,
+        "contracts": 1 + i % 3,
+        "entry_date": f"2026-05-{1 + i % 28:02d}",
+        "close_date": f"2026-06-{1 + i % 17:02d}" if i % 4 else None,
+    }
+    row.update(overrides)
+    return row
+
+
+def _csv(rows) -> str:
+    keys = CSV_HEADER.strip().split(",")
+    return CSV_HEADER + "".join(
+        ",".join("" if r.get(k) is None else str(r[k]) for k in keys) + "\n" for r in rows
+    )
+
+
+def _aggregates(Session) -> dict:
+    with Session() as db:
+        return {
+            "stats": sorted(
+                (r.dimension, r.key, r.count, r.realized, r.wins, r.losses,
+                 round(float(r.sum_win), 2), round(float(r.sum_loss), 2), r.hold_count, r.sum_hold_days)
+                for r in db.query(TradeStats).filter(TradeStats.user_id == USER_ID)
+            ),
+            "sketches": sorted(
+                (r.bucket, r.count, r.sketch)
+                for r in db.query(TradePnlSketch).filter(TradePnlSketch.user_id == USER_ID)
+            ),
+        }
+
+
+@pytest.fixture
+def seeded(Session):
+    with Session() as db:
+        seed_user(db, USER_ID, trades=50, days=60)
+        build_derived(db, USER_ID)
+
+
+def test_csv_reports_invalid_rows(client, Session, seeded):
+    rows = [_row(i) for i in range(6)]
+    rows[1]["contracts"] = 0
+    rows[3]["option_type"] = "STRADDLE"
+    rows[4]["entry_price"] = -2
+
+    r = client.post("/trades/bulk", content=_csv(rows), headers={"Content-Type": "text/csv"})
+    assert r.status_code == 201
+    body = r.json()
+    assert (body["inserted"], body["failed"]) == (3, 3)
+    assert [e["row"] for e in body["errors"]] == [2, 4, 5]
+    assert body["errors"][0]["errors"] == ["Contracts must be a positive integer."]
+    assert body["errors"][1]["errors"][0].startswith("option_type:")
+    assert body["errors"][2]["errors"] == ["Entry price must be non-negative."]
+
+    with Session() as db:
+        imported = db.query(Trades).filter(Trades.user_id == USER_ID, Trades.exp_date == rows[0]["exp_date"])
+        assert sorted(t.symbol for t in imported) == ["AAPL", "TSLA", "TSLA"]
+
+
+def test_ndjson_bad_lines_fail_only_their_row(client, seeded):
+    lines = [
+        json.dumps(_row(0)),
+        "{not json",
+        "",
+        json.dumps([1, 2]),
+        json.dumps(_row(1)),
+    ]
+    r = client.post("/trades/bulk?format=ndjson", content="\n".join(lines))
+    assert r.status_code == 201
+    body = r.json()
+    assert (body["inserted"], body["failed"]) == (2, 2)
+    assert body["errors"] == [
+        {"row": 2, "errors": ["Invalid JSON."]},
+        {"row": 3, "errors": ["Row must be an object."]},
+    ]
+
+
+def test_oversized_imports_are_413(client, seeded, monkeypatch):
+    body = json.dumps([_row(i) for i in range(20)])
+
+    monkeypatch.setattr(trades, "TRADE_IMPORT_MAX_BYTES", len(body) - 1)
+    r = client.post("/trades/bulk", content=body, headers={"Content-Type": "application/json"})
+    assert r.status_code == 413
+
+    # Chunked upload (no Content-Length): refused while reading.
+    r = client.post(
+        "/trades/bulk", content=(body[i:i + 100].encode() for i in range(0, len(body), 100)),
+        headers={"Content-Type": "application/json"},
+    )
+    assert r.status_code == 413
+
+    monkeypatch.setattr(trades, "TRADE_IMPORT_MAX_BYTES", len(body))
+    monkeypatch.setattr(trades, "TRADE_IMPORT_MAX_ROWS", 19)
+    r = client.post("/trades/bulk", content=body, headers={"Content-Type": "application/json"})
+    assert r.status_code == 413
+
+
+def test_aggregates_after_import_equal_rebuild(client, Session, seeded, monkeypatch):
+    monkeypatch.setattr(trades, "TRADE_IMPORT_CHUNK_SIZE", 9)
+    r = client.post("/trades/bulk", json=[_row(i) for i in range(40)])
+    assert r.json()["inserted"] == 40
+
+    imported = _aggregates(Session)
+    with Session() as db:
+        rebuild_trade_stats(db, USER_ID)
+        rebuild_pnl_sketches(db, USER_ID)
+        db.commit()
+    assert imported == _aggregates(Session)